@@ -0,0 +1,299 @@
+import time
+import random
+
+from game_state import PASS, ATTACK, QUESTIONS_NEEDED, MoveCache
+from zobrist import TranspositionTable, EXACT
+from distance_maps import DistanceMaps, FAR
+
+# -----------------------------
+# Expectimax computer opponent
+#
+# Decision nodes belong to whoever is on turn: the AI maximizes its own
+# evaluation, opponents are assumed to minimize it (paranoid search). Every
+# move / attack is followed by a chance node: with probability p^questions
+# the step happens, otherwise the turn is simply lost. Because a failed
+# answer leaves the board untouched, that branch is searched once per node
+# and shared by all of its actions.
+#
+# Search is iterative deepening with a deadline. The front ends run it
+# away from the render loop through ai_scheduler (a worker process that
+# reports every finished depth); think() still runs a search in slices
+# for callers that drive it from their own loop, and the transposition
+# table keeps finished subtrees between slices.
+# -----------------------------
+
+DEFAULT_ACCURACY = 0.6
+PRIOR_WEIGHT = 4.0    # pseudo-answers behind the default accuracy
+WIN_VALUE = 10000.0
+MAX_DEPTH = 12
+CHECK_EVERY = 64      # nodes between deadline checks
+
+
+class AccuracyModel:
+    """Per-player, per-category chance of answering right (smoothed counts)."""
+
+    def __init__(self, default=DEFAULT_ACCURACY, prior_weight=PRIOR_WEIGHT, known=None):
+        self.default = default
+        self.prior_weight = prior_weight
+        self.counts = {}       # (player, category) -> [right, asked]
+        self.known = dict(known or {})   # (player, category) or category -> fixed accuracy
+
+    def observe(self, player, category, correct):
+        """One answered question (an attack's two questions are two observations)."""
+        c = self.counts.setdefault((player, category), [0, 0])
+        c[0] += bool(correct)
+        c[1] += 1
+
+    def observe_answers(self, player, category, answers):
+        for correct in answers:
+            self.observe(player, category, correct)
+
+    def p(self, player, category):
+        fixed = self.known.get((player, category), self.known.get(category))
+        if fixed is not None:
+            return fixed
+        right, asked = self.counts.get((player, category), (0, 0))
+        return (right + self.default * self.prior_weight) / (asked + self.prior_weight)
+
+    def success(self, player, category, kind):
+        """Chance the whole action goes through (1 question move, 2 attack)."""
+        return self.p(player, category) ** QUESTIONS_NEEDED[kind]
+
+
+def roll_answers(accuracy, player, category, kind, rng):
+    """
+    A computer player's answers, one per question actually asked: like the
+    question screens, an attack stops at the first wrong answer. The action
+    goes through if all of them are right.
+    """
+    p = accuracy.p(player, category)
+    answers = []
+    for _ in range(QUESTIONS_NEEDED[kind]):
+        answers.append(rng.random() < p)
+        if not answers[-1]:
+            break
+    return answers
+
+
+class _Timeout(Exception):
+    pass
+
+
+def evaluate(state, player, dist=None):
+    """
+    Static value of state for player (material, flag safety, flag pressure).
+    Distances are walking steps around the holes, from dist (a DistanceMaps
+    of state; the state's shared one by default).
+    """
+    if state.winner is not None:
+        return WIN_VALUE if state.winner == player else -WIN_VALUE
+
+    size = state.board.size
+    material = {}
+    flags = {}
+    for pawn in state.pawns:
+        if pawn.alive:
+            material[pawn.player] = material.get(pawn.player, 0) + 1
+            if pawn.is_flag:
+                flags[pawn.player] = pawn.row * size + pawn.col
+
+    enemies = [p for p in flags if p != player]
+    if player not in flags or not enemies:
+        return -WIN_VALUE if player not in flags else WIN_VALUE
+
+    if dist is None:
+        dist = DistanceMaps.of(state)
+    own_field = dist.field(flags[player])
+    enemy_fields = [dist.field(flags[e]) for e in enemies]
+    attack_dist = FAR
+    threat_dist = FAR
+    for pawn in state.pawns:
+        if not pawn.alive:
+            continue
+        sq = pawn.row * size + pawn.col
+        if pawn.player == player:
+            if not pawn.is_flag:
+                for field in enemy_fields:
+                    if field[sq] < attack_dist:
+                        attack_dist = field[sq]
+        elif own_field[sq] < threat_dist:
+            threat_dist = own_field[sq]
+
+    enemy_material = sum(material[e] for e in enemies) / len(enemies)
+    value = 10.0 * (material.get(player, 0) - enemy_material)
+    if attack_dist < FAR:
+        value -= 1.5 * attack_dist
+    value += 2.0 * min(threat_dist, 6)
+    return value
+
+
+class ExpectimaxAI:
+    def __init__(self, player, accuracy=None, move_time=0.6, max_depth=MAX_DEPTH,
+                 tt_bytes=8 << 20, rng=None):
+        self.player = player
+        self.accuracy = accuracy if accuracy is not None else AccuracyModel()
+        self.move_time = move_time
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_bytes)
+        self.rng = rng if rng is not None else random.Random()
+        self.state = None
+        self.moves = None
+        self.dist = None
+        # optional hooks for background search (see ai_scheduler.py):
+        #   stop.is_set() aborts the search, on_depth(depth, value, best, pv)
+        #   is called after every finished iteration
+        self.stop = None
+        self.on_depth = None
+        self.reset_stats()
+
+    def __getstate__(self):
+        # a picklable copy keeps the settings (depth, table size, rng) but not
+        # the hooks or the per-turn caches, which begin_turn rebuilds
+        state = self.__dict__.copy()
+        state.update(stop=None, on_depth=None, state=None, moves=None, dist=None)
+        return state
+
+    def reset_stats(self):
+        self.best_action = None
+        self.best_value = 0.0
+        self.depth_done = 0
+        self.nodes = 0
+        self.spent = 0.0
+        self._deadline = 0.0
+
+    # --- per-frame driver ---
+
+    def begin_turn(self, state):
+        """Start thinking about state (a private copy is searched)."""
+        self.state = state.copy()
+        # per-pawn move lists, only recomputed next to squares a step touched
+        self.moves = MoveCache(self.state)
+        # flag distance fields survive between turns as long as the holes do
+        self.dist = DistanceMaps(self.state, base=self.dist)
+        self.reset_stats()
+        # answer statistics change between turns, so cached values go stale
+        self.tt.clear()
+        actions = self.moves.legal_actions()
+        self.best_action = actions[0] if actions else None
+        if len(actions) <= 1:
+            self.depth_done = self.max_depth
+
+    def think(self, slice_time):
+        """Search for up to slice_time seconds; returns the chosen Action once done."""
+        if self.state is None:
+            return None
+        if self.stop is not None and self.stop.is_set():
+            self.state = None
+            return self.best_action
+        if self.depth_done < self.max_depth and self.spent < self.move_time:
+            t0 = time.perf_counter()
+            self._search(min(slice_time, self.move_time - self.spent))
+            self.spent += time.perf_counter() - t0
+        if self.depth_done >= self.max_depth or self.spent >= self.move_time:
+            self.state = None
+            return self.best_action
+        return None
+
+    def choose(self, state):
+        """Blocking search for the whole move_time (simulations, tools)."""
+        self.begin_turn(state)
+        action = None
+        while action is None:
+            action = self.think(self.move_time)
+        return action
+
+    def roll_answers(self, category, kind):
+        """The AI's answers to its own questions (see roll_answers), drawn from its accuracy model."""
+        return roll_answers(self.accuracy, self.player, category, kind, self.rng)
+
+    # --- search ---
+
+    def _search(self, budget):
+        self._deadline = time.perf_counter() + budget
+        self.tt.new_search()
+        try:
+            for depth in range(1, self.max_depth + 1):
+                value, action = self._node(self.state, depth, root=True)
+                if depth >= self.depth_done:
+                    self.depth_done = depth
+                    self.best_value = value
+                    if action is not None:
+                        self.best_action = action
+                    if self.on_depth is not None:
+                        self.on_depth(depth, value, self.best_action, self.principal_variation())
+                if abs(value) >= WIN_VALUE:
+                    self.depth_done = self.max_depth
+                    break
+        except _Timeout:
+            # unwind the private copy back to the root position
+            while self.state.history:
+                self.state.undo()
+
+    def principal_variation(self, max_len=MAX_DEPTH):
+        """Expected line from the root, following best moves stored in the TT."""
+        state = self.state
+        pv = []
+        seen = set()
+        while len(pv) < max_len and state.winner is None and state.hash not in seen:
+            seen.add(state.hash)
+            hit = self.tt.probe(state.hash)
+            if hit is None or hit[3] is None:
+                break
+            pv.append(hit[3])
+            state.apply(hit[3], True)
+        for _ in pv:
+            state.undo()
+        return pv
+
+    def _ordered(self, state, actions, hint):
+        actions = sorted(actions, key=lambda a: a.kind != ATTACK)
+        if hint is not None and hint in actions:
+            actions.remove(hint)
+            actions.insert(0, hint)
+        return actions
+
+    def _node(self, state, depth, root=False):
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and (time.perf_counter() > self._deadline
+                                              or (self.stop is not None and self.stop.is_set())):
+            raise _Timeout()
+
+        if state.winner is not None or depth == 0:
+            return evaluate(state, self.player, self.dist), None
+
+        hit = self.tt.probe(state.hash)
+        hint = None
+        if hit is not None:
+            hit_depth, hit_value, _bound, hit_move = hit
+            if hit_depth >= depth and not root:
+                return hit_value, hit_move
+            hint = hit_move
+
+        maximize = state.current == self.player
+        board = state.board
+        fail_value = None
+        best_value = None
+        best_action = None
+        for action in self._ordered(state, self.moves.legal_actions(), hint):
+            if action.kind == PASS:
+                state.apply(action, True)
+                value = self._node(state, depth - 1)[0]
+                state.undo()
+            else:
+                p = self.accuracy.success(state.current, board.category[action.row * board.size + action.col],
+                                          action.kind)
+                state.apply(action, True)
+                value = self._node(state, depth - 1)[0]
+                state.undo()
+                if p < 1.0:
+                    if fail_value is None:
+                        state.apply(action, False)
+                        fail_value = self._node(state, depth - 1)[0]
+                        state.undo()
+                    value = p * value + (1.0 - p) * fail_value
+
+            if best_value is None or (value > best_value if maximize else value < best_value):
+                best_value, best_action = value, action
+
+        self.tt.store(state.hash, depth, best_value, EXACT, best_action)
+        return best_value, best_action
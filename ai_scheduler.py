@@ -0,0 +1,181 @@
+import queue
+import pickle
+import weakref
+import threading
+import multiprocessing
+from collections import namedtuple
+
+# -----------------------------
+# Background AI search
+#
+# Runs a bot's search away from the render loop and streams progress back
+# through a queue, so main_game_real keeps animating at full FPS:
+#
+#   scheduler = shared_scheduler()
+#   if not scheduler.running:
+#       scheduler.start(bot, game)
+#   action = scheduler.poll(game)   # None until the move is ready
+#
+# Expectimax bots run in a worker process (search is pure Python and would
+# otherwise fight the UI for the GIL) as a pickled copy of the caller's bot,
+# so every constructor setting carries over; bots that already farm their work
+# out to a process pool (parallel = True, e.g. MCTSAI) run in a thread.
+# Starting a new job, calling cancel(), or polling with a state whose hash
+# changed stops the running search; stale messages are dropped by job id.
+# -----------------------------
+
+THREAD = "thread"
+PROCESS = "process"
+
+# depth / value / best / pv so far; done=True carries the final move
+Progress = namedtuple("Progress", "job depth value best pv done")
+
+
+class _JobFlag:
+    """stop hook for a bot: set once a newer job started or this one was cancelled."""
+
+    def __init__(self, active, job):
+        self.active = active
+        self.job = job
+
+    def is_set(self):
+        return self.active.value != self.job
+
+
+def _run_job(bot, state, job, active, out):
+    def on_depth(depth, value, best, pv):
+        out.put(Progress(job, depth, value, best, pv, False))
+
+    bot.stop = _JobFlag(active, job)
+    if hasattr(bot, "on_depth"):
+        bot.on_depth = on_depth
+    try:
+        action = bot.choose(state)
+    finally:
+        bot.stop = None
+        if hasattr(bot, "on_depth"):
+            bot.on_depth = None
+    out.put(Progress(job, getattr(bot, "depth_done", 0), getattr(bot, "best_value", 0.0), action, [], True))
+
+
+def _process_main(jobs, out, active):
+    # each bot arrives once as a pickled copy (settings kept, hooks dropped)
+    # and is reused for later jobs sent under the same token
+    bots = {}
+    while True:
+        item = jobs.get()
+        if item is None:
+            return
+        job, token, pickled, accuracy, move_time, state = item
+        if pickled is not None:
+            bots[token] = pickle.loads(pickled)
+        bot = bots[token]
+        bot.accuracy = accuracy
+        bot.move_time = move_time
+        _run_job(bot, state, job, active, out)
+
+
+class AIScheduler:
+    def __init__(self, mode=PROCESS):
+        self.mode = mode
+        self._ctx = multiprocessing.get_context("spawn")
+        self._active = self._ctx.Value("q", 0, lock=False)
+        self._thread_out = queue.Queue()
+        self._jobs = None
+        self._process_out = None
+        self._process = None
+        self._thread = None
+        # bot -> token of its copy in the worker process
+        self._sent = weakref.WeakKeyDictionary()
+        self.job = 0
+        self.job_hash = None
+        self.running = False
+        self._reset_progress()
+
+    def _reset_progress(self):
+        self.depth = 0
+        self.value = 0.0
+        self.best = None
+        self.pv = []
+
+    def _ensure_process(self):
+        if self._process is None or not self._process.is_alive():
+            self._jobs = self._ctx.Queue()
+            self._process_out = self._ctx.Queue()
+            self._sent.clear()
+            self._process = self._ctx.Process(target=_process_main,
+                                              args=(self._jobs, self._process_out, self._active),
+                                              daemon=True)
+            self._process.start()
+
+    def start(self, bot, state):
+        """Begin searching state for bot; any running search is cancelled."""
+        self.cancel()
+        self.job += 1
+        self._active.value = self.job
+        self.job_hash = state.hash
+        self.running = True
+        self._reset_progress()
+        snapshot = state.copy()
+        if self.mode == PROCESS and not getattr(bot, "parallel", False):
+            self._ensure_process()
+            # pickled now rather than by the queue's feeder thread, so later
+            # changes to the caller's bot cannot race the copy
+            token = self._sent.get(bot)
+            pickled = None
+            if token is None:
+                token = self._sent[bot] = self.job
+                pickled = pickle.dumps(bot)
+            self._jobs.put((self.job, token, pickled, bot.accuracy, bot.move_time, snapshot))
+        else:
+            # a cancelled search notices within a few nodes; never share a bot between threads
+            if self._thread is not None:
+                self._thread.join()
+            self._thread = threading.Thread(target=_run_job, daemon=True,
+                                            args=(bot, snapshot, self.job, self._active, self._thread_out))
+            self._thread.start()
+
+    def cancel(self):
+        if self.running:
+            self._active.value = 0
+            self.running = False
+
+    def poll(self, state=None):
+        """Drain progress messages; returns the chosen Action once, else None."""
+        if not self.running:
+            return None
+        if state is not None and state.hash != self.job_hash:
+            self.cancel()
+            return None
+        for out in (self._thread_out, self._process_out):
+            while out is not None:
+                try:
+                    msg = out.get_nowait()
+                except queue.Empty:
+                    break
+                if msg.job != self.job:
+                    continue
+                if msg.done:
+                    self.running = False
+                    self.best = msg.best
+                    return msg.best
+                self.depth, self.value, self.best, self.pv = msg.depth, msg.value, msg.best, msg.pv
+        return None
+
+    def close(self):
+        self.cancel()
+        if self._process is not None:
+            self._jobs.put(None)
+            self._process.join(timeout=1.0)
+            self._process = None
+
+
+_scheduler = None
+
+
+def shared_scheduler():
+    """One scheduler (and worker process) for the whole session."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AIScheduler()
+    return _scheduler
@@ -0,0 +1,311 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+
+import numpy as np
+
+from game_state import CATEGORIES, ATTACK
+
+# -----------------------------
+# Sharded game archive (per game and per turn columns)
+#
+# An archive is a directory of shards plus manifest.json. Each shard is one
+# compressed .npz holding a block of whole games as columns:
+#
+#   game.<name>   one row per game (seed, board size, first mover, winner, turns ...)
+#   turn.<name>   one row per turn, games back to back (replay code, kind,
+#                 category, questions asked, answered right, think time)
+#
+# A game's turns are the next game.turns rows of the turn columns. The turn
+# code is replay.encode_turn's, so a game can be rebuilt from its seed.
+#
+#   with ArchiveWriter("runs/arch", meta={"policies": ["random", "greedy"]}) as out:
+#       out.append(game_cols, turn_cols)        # dicts of 1-D arrays
+#
+#   reader = ArchiveReader("runs/arch")
+#   for games, turns in reader.scan(game=["turns"], turn=["kind", "ok"]):
+#       ...                                     # one shard at a time
+#   win_rate_by_first_mover(reader, where={"players": 2})
+#
+# Shards are compressed on disk; the reader unpacks each shard once into
+# mmap/ (raw .npy per column) and memory-maps it from then on, so a scan
+# only touches the columns it asks for and never holds more than one shard.
+# Writing to an existing archive appends shards; delete the folder to start over.
+#
+#   python archive.py runs/arch --where board_size=16
+# -----------------------------
+
+MANIFEST_FILE = "manifest.json"
+MMAP_DIR = "mmap"
+SHARD_GAMES = 100_000
+NO_CATEGORY = 255       # turn.category of a pass
+
+GAME_COLUMNS = [
+    ("game", "i8"),
+    ("seed", "i8"),
+    ("board_size", "u2"),
+    ("players", "u1"),
+    ("first_policy", "i1"),   # index into manifest["policies"]
+    ("winner_seat", "i1"),    # -1: turn limit
+    ("winner_policy", "i1"),
+    ("turns", "i4"),
+    ("end", "u1"),
+]
+
+TURN_COLUMNS = [
+    ("code", "u2"),           # replay.encode_turn
+    ("kind", "u1"),           # MOVE / ATTACK / PASS
+    ("category", "u1"),       # index into CATEGORIES, NO_CATEGORY for a pass
+    ("asked", "u1"),          # questions asked this turn
+    ("ok", "u1"),             # answered right (the move or attack happened)
+    ("think_us", "u4"),       # CPU microseconds the mover spent choosing
+]
+
+
+def _columns(spec):
+    return [(name, np.dtype(dtype).newbyteorder("<")) for name, dtype in spec]
+
+
+class ArchiveWriter:
+    def __init__(self, path, meta=None, shard_games=SHARD_GAMES,
+                 game_columns=GAME_COLUMNS, turn_columns=TURN_COLUMNS):
+        self.path = path
+        self.shard_games = shard_games
+        self.game_columns = _columns(game_columns)
+        self.turn_columns = _columns(turn_columns)
+        os.makedirs(path, exist_ok=True)
+        manifest = read_manifest(path) if os.path.exists(os.path.join(path, MANIFEST_FILE)) else None
+        if manifest is None:
+            manifest = {"version": 1, "categories": CATEGORIES, "policies": [], "shards": [],
+                        "game_columns": [[n, d.str] for n, d in self.game_columns],
+                        "turn_columns": [[n, d.str] for n, d in self.turn_columns]}
+        elif (manifest["game_columns"] != [[n, d.str] for n, d in self.game_columns]
+              or manifest["turn_columns"] != [[n, d.str] for n, d in self.turn_columns]):
+            raise ValueError(f"{path} was written with different columns")
+        self.manifest = manifest
+        self.meta = dict(meta or {})
+        self._games = []
+        self._turns = []
+        self._pending = 0
+
+    def policy_ids(self, names):
+        """Archive-wide index of each policy name (archives can mix runs)."""
+        known = self.manifest["policies"]
+        for name in names:
+            if name not in known:
+                known.append(name)
+        return np.array([known.index(name) for name in names], dtype=np.int8)
+
+    def append(self, games, turns):
+        """games / turns: {column: 1-D array-like}; len(turns) == games["turns"].sum()."""
+        g = {name: np.asarray(games[name], dtype=dtype) for name, dtype in self.game_columns}
+        t = {name: np.asarray(turns[name], dtype=dtype) for name, dtype in self.turn_columns}
+        count = int(g["turns"].sum())
+        for name, data in t.items():
+            if len(data) != count:
+                raise ValueError(f"turn column {name} has {len(data)} rows, games say {count}")
+        self._games.append(g)
+        self._turns.append(t)
+        self._pending += len(g["turns"])
+        if self._pending >= self.shard_games:
+            self.flush()
+
+    def flush(self):
+        """Write buffered games as a shard."""
+        if not self._pending:
+            return
+        arrays = {}
+        for prefix, blocks, columns in (("game", self._games, self.game_columns),
+                                        ("turn", self._turns, self.turn_columns)):
+            for name, dtype in columns:
+                arrays[f"{prefix}.{name}"] = np.concatenate([b[name] for b in blocks]).astype(dtype, copy=False)
+        shards = self.manifest["shards"]
+        name = f"shard-{len(shards):05d}.npz"
+        tmp = os.path.join(self.path, name + ".tmp.npz")
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, os.path.join(self.path, name))
+        shards.append({"file": name, "games": self._pending, "turns": len(arrays["turn.code"]),
+                       "meta": self.meta})
+        self._write_manifest()
+        self._games, self._turns, self._pending = [], [], 0
+
+    def _write_manifest(self):
+        tmp = os.path.join(self.path, MANIFEST_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, MANIFEST_FILE))
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+class ArchiveReader:
+    def __init__(self, path, mmap=True):
+        self.path = path
+        self.mmap = mmap
+        self.manifest = read_manifest(path)
+        self.shards = self.manifest["shards"]
+        self.games = sum(s["games"] for s in self.shards)
+        self.turns = sum(s["turns"] for s in self.shards)
+        self.policies = self.manifest["policies"]
+        self.categories = self.manifest["categories"]
+
+    def _unpacked(self, shard):
+        """Folder of raw .npy columns for shard, unpacked on first use."""
+        src = os.path.join(self.path, shard["file"])
+        folder = os.path.join(self.path, MMAP_DIR, shard["file"][:-len(".npz")])
+        stamp = f"{os.path.getsize(src)} {os.path.getmtime(src)}"
+        stamp_path = os.path.join(folder, "stamp")
+        if os.path.exists(stamp_path):
+            with open(stamp_path) as f:
+                if f.read() == stamp:
+                    return folder
+        tmp = folder + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        with np.load(src) as data:
+            for key in data.files:
+                np.save(os.path.join(tmp, key + ".npy"), data[key])
+        with open(os.path.join(tmp, "stamp"), "w") as f:
+            f.write(stamp)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.replace(tmp, folder)
+        return folder
+
+    def shard(self, index, game=(), turn=()):
+        """({game column: array}, {turn column: array}) of one shard."""
+        shard = self.shards[index]
+        keys = [f"game.{n}" for n in game] + [f"turn.{n}" for n in turn]
+        if self.mmap:
+            folder = self._unpacked(shard)
+            arrays = {k: np.load(os.path.join(folder, k + ".npy"), mmap_mode="r") for k in keys}
+        else:
+            with np.load(os.path.join(self.path, shard["file"])) as data:
+                arrays = {k: data[k] for k in keys}
+        return ({n: arrays[f"game.{n}"] for n in game},
+                {n: arrays[f"turn.{n}"] for n in turn})
+
+    def scan(self, game=(), turn=(), where=None):
+        """
+        Yields (games, turns) per shard. where = {game column: value} keeps
+        only matching games (and their turns).
+        """
+        where = where or {}
+        need = list(dict.fromkeys(list(game) + list(where) + (["turns"] if turn and where else [])))
+        for i in range(len(self.shards)):
+            games, turns = self.shard(i, need, turn)
+            if where:
+                keep = np.ones(len(games[need[0]]), dtype=bool)
+                for name, value in where.items():
+                    keep &= games[name] == value
+                if turn:
+                    turn_keep = np.repeat(keep, games["turns"])
+                    turns = {n: a[turn_keep] for n, a in turns.items()}
+                games = {n: a[keep] for n, a in games.items()}
+            yield {n: games[n] for n in game}, turns
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+
+def win_rate_by_first_mover(reader, where=None):
+    """{first mover's policy: (games, first mover wins, win rate)}; key None is all games."""
+    n = len(reader.policies)
+    games = np.zeros(n, np.int64)
+    wins = np.zeros(n, np.int64)
+    for g, _ in reader.scan(game=["first_policy", "winner_seat"], where=where):
+        first = g["first_policy"].astype(np.int64)
+        games += np.bincount(first, minlength=n)[:n]
+        wins += np.bincount(first[g["winner_seat"] == 0], minlength=n)[:n]
+    out = {name: (int(games[i]), int(wins[i]), wins[i] / max(games[i], 1))
+           for i, name in enumerate(reader.policies) if games[i]}
+    out[None] = (int(games.sum()), int(wins.sum()), wins.sum() / max(games.sum(), 1))
+    return out
+
+
+def attack_success_by_category(reader, where=None):
+    """{category: (attacks, successful, success rate)}."""
+    n = len(reader.categories)
+    attacks = np.zeros(n, np.int64)
+    wins = np.zeros(n, np.int64)
+    for _, t in reader.scan(turn=["kind", "category", "ok"], where=where):
+        attack = t["kind"] == ATTACK
+        category = t["category"][attack].astype(np.int64)
+        attacks += np.bincount(category, minlength=n)[:n]
+        wins += np.bincount(category[t["ok"][attack] != 0], minlength=n)[:n]
+    return {name: (int(attacks[i]), int(wins[i]), wins[i] / max(attacks[i], 1))
+            for i, name in enumerate(reader.categories)}
+
+
+def mean_length_by_board_size(reader, where=None):
+    """{board size: (games, mean turns)}."""
+    games = np.zeros(0, np.int64)
+    turns = np.zeros(0, np.int64)
+    for g, _ in reader.scan(game=["board_size", "turns"], where=where):
+        size = g["board_size"].astype(np.int64)
+        count = np.bincount(size)
+        total = np.bincount(size, weights=g["turns"]).astype(np.int64)
+        if len(count) > len(games):
+            games = np.pad(games, (0, len(count) - len(games)))
+            turns = np.pad(turns, (0, len(count) - len(turns)))
+        games[:len(count)] += count
+        turns[:len(total)] += total
+    return {size: (int(games[size]), turns[size] / games[size]) for size in np.flatnonzero(games)}
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def _where(items):
+    out = {}
+    for item in items or []:
+        name, value = item.split("=", 1)
+        out[name] = int(value)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Summaries of a game archive (see simulate.py --archive).")
+    ap.add_argument("path")
+    ap.add_argument("--where", action="append", help="game column=value filter, e.g. players=2 (repeatable)")
+    ap.add_argument("--no-mmap", dest="mmap", action="store_false", help="decompress shards instead of unpacking them")
+    args = ap.parse_args(argv)
+
+    reader = ArchiveReader(args.path, mmap=args.mmap)
+    where = _where(args.where)
+    print(f"{args.path}: {reader.games:,} games, {reader.turns:,} turns in {len(reader.shards)} shard(s)")
+    t0 = time.perf_counter()
+
+    print(f"\n{'first mover':<14} {'games':>10} {'wins':>10} {'win rate':>9}")
+    for name, (games, wins, rate) in win_rate_by_first_mover(reader, where).items():
+        print(f"{name or 'all':<14} {games:10d} {wins:10d} {rate:9.3f}")
+
+    print(f"\n{'category':<14} {'attacks':>10} {'won':>10} {'rate':>9}")
+    for name, (attacks, wins, rate) in attack_success_by_category(reader, where).items():
+        print(f"{name:<14} {attacks:10d} {wins:10d} {rate:9.3f}")
+
+    print(f"\n{'board size':<14} {'games':>10} {'mean turns':>11}")
+    for size, (games, mean) in mean_length_by_board_size(reader, where).items():
+        print(f"{size:<14} {games:10d} {mean:11.1f}")
+    print(f"\nqueries took {time.perf_counter() - t0:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
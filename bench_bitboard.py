@@ -0,0 +1,229 @@
+"""
+Bitboard move generator: perft correctness check + throughput.
+
+perft counts the leaves of the all-answers-correct game tree to a fixed
+depth from seeded start positions (and from a few random plies further on,
+so captures and eliminations are exercised), three ways:
+
+  reference  sraz3 Cell/Pawn board + sraz3.get_valid_moves
+  engine     GameState.legal_actions / apply / undo
+  bitboard   BitBoard.moves / make / unmake
+
+Any mismatch is printed and the script exits non-zero. Then move generation
+throughput of the three is compared. tests/test_game_state.py runs the
+engine / BoardArrays / bitboard perft parity on 6x6 and 8x8 under pytest.
+
+    python bench_bitboard.py --depth 4 --sizes 6,8,16
+    python bench_bitboard.py --skip-perft --throughput-sizes 8,32,64
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import sraz3
+from game_state import GameState, PASS
+from bitboard import BitBoard
+
+
+# -----------------------------
+# Reference perft on the original objects
+# -----------------------------
+
+def reference_position(game):
+    """The same position as sraz3 Player/Pawn/Cell objects."""
+    size = game.board.size
+    players = [sraz3.Player(p.name, p.color_id) for p in game.players]
+    board = [[sraz3.Cell() for _ in range(size)] for _ in range(size)]
+    for i, hole in enumerate(game.board.hole):
+        board[i // size][i % size].is_hole = hole
+    pawns = []
+    for p in game.pawns:
+        if p.alive:
+            pawn = sraz3.Pawn(players[p.player], p.row, p.col, p.is_flag)
+            board[p.row][p.col].pawn = pawn
+            pawns.append(pawn)
+    return players, pawns, board
+
+
+def _alive(players, pawns):
+    has_flag = {p.player for p in pawns if p.is_flag}
+    return [p for p in players if p in has_flag]
+
+
+def _next(players, pawns, current):
+    alive = _alive(players, pawns)
+    i = players.index(current)
+    for k in range(1, len(players) + 1):
+        cand = players[(i + k) % len(players)]
+        if cand in alive:
+            return cand
+    return current
+
+
+def reference_perft(players, pawns, board, current, depth):
+    if depth == 0 or len(_alive(players, pawns)) <= 1:
+        return 1
+    n = len(board)
+    moves = [(p, rc) for p in pawns if p.player == current
+             for rc in sraz3.get_valid_moves(board, p, n, n)]
+    if not moves:
+        return reference_perft(players, pawns, board, _next(players, pawns, current), depth - 1)
+    total = 0
+    for pawn, (r, c) in moves:
+        sr, sc = pawn.row, pawn.col
+        victim = board[r][c].pawn
+        removed = []
+        if victim is not None:
+            army = [q for q in pawns if q.player == victim.player] if victim.is_flag else [victim]
+            for q in army:
+                board[q.row][q.col].pawn = None
+                pawns.remove(q)
+                removed.append(q)
+        board[sr][sc].pawn = None
+        pawn.row, pawn.col = r, c
+        board[r][c].pawn = pawn
+
+        total += reference_perft(players, pawns, board, _next(players, pawns, current), depth - 1)
+
+        board[r][c].pawn = None
+        pawn.row, pawn.col = sr, sc
+        board[sr][sc].pawn = pawn
+        for q in removed:
+            pawns.append(q)
+            board[q.row][q.col].pawn = q
+    return total
+
+
+def engine_perft(game, depth):
+    if depth == 0 or game.winner is not None:
+        return 1
+    total = 0
+    for action in game.legal_actions():
+        game.apply(action, True)
+        total += engine_perft(game, depth - 1)
+        game.undo()
+    return total
+
+
+def run_perft(sizes, players_list, depth, seeds, scatter):
+    failures = 0
+    nodes = 0
+    spent = [0.0, 0.0, 0.0]
+    print(f"{'position':<28} {'reference':>10} {'engine':>10} {'bitboard':>10}")
+    for size in sizes:
+        for num_players in players_list:
+            for seed in seeds:
+                for plies in (0, scatter):
+                    rng = random.Random(seed)
+                    game = GameState.new(num_players, size, rng=rng)
+                    _scatter(game, rng, plies)
+                    if game.winner is not None:
+                        continue
+
+                    players, pawns, board = reference_position(game)
+                    bitboard = BitBoard.from_state(game)
+                    t0 = time.perf_counter()
+                    ref = reference_perft(players, pawns, board, players[game.current], depth)
+                    t1 = time.perf_counter()
+                    eng = engine_perft(game, depth)
+                    t2 = time.perf_counter()
+                    bb = bitboard.perft(game.current, depth)
+                    t3 = time.perf_counter()
+                    nodes += ref
+                    spent[0] += t1 - t0
+                    spent[1] += t2 - t1
+                    spent[2] += t3 - t2
+
+                    ok = ref == eng == bb
+                    failures += not ok
+                    label = f"{size}x{size} p{num_players} s{seed} +{plies}"
+                    print(f"{label:<28} {ref:10d} {eng:10d} {bb:10d}{'' if ok else '  MISMATCH'}")
+    print(f"{'leaves/s':<28} " + " ".join(f"{nodes / max(t, 1e-9):10,.0f}" for t in spent))
+    return failures
+
+
+# -----------------------------
+# Throughput
+# -----------------------------
+
+def _rate(fn, min_time):
+    calls = 0
+    t0 = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            return calls / elapsed
+
+
+def _scatter(game, rng, plies):
+    """Play some random plies so pawns leave the corners."""
+    for _ in range(plies):
+        actions = game.legal_actions()
+        if not actions:
+            break
+        action = rng.choice(actions)
+        game.apply(action, action.kind != PASS)
+    game.history.clear()
+
+
+def run_throughput(sizes, num_players, min_time, seed):
+    print(f"\n{'board':<8} {'moves':>6} {'get_valid_moves/s':>18} {'GameState/s':>13} {'BitBoard/s':>12} {'speedup':>8}")
+    for size in sizes:
+        rng = random.Random(seed)
+        game = GameState.new(num_players, size, rng=rng)
+        _scatter(game, rng, 40)
+        bb = BitBoard.from_state(game)
+        player = game.current
+
+        players, pawns, board = reference_position(game)
+        own = [p for p in pawns if p.player is players[player]]
+
+        def reference():
+            return [m for p in own for m in sraz3.get_valid_moves(board, p, size, size)]
+
+        ref_moves = reference()
+        eng_moves = game.legal_actions()
+        bb_moves = bb.moves(player)
+        assert len(ref_moves) == len(eng_moves) == len(bb_moves)
+
+        ref = _rate(reference, min_time)
+        eng = _rate(game.legal_actions, min_time)
+        bit = _rate(lambda: bb.moves(player), min_time)
+        print(f"{f'{size}x{size}':<8} {len(bb_moves):6d} {ref:18,.0f} {eng:13,.0f} {bit:12,.0f} {bit / ref:7.1f}x")
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=_int_list, default=[6, 8, 16])
+    ap.add_argument("--players", type=_int_list, default=[2, 3, 4])
+    ap.add_argument("--depth", type=int, default=3)
+    ap.add_argument("--seeds", type=_int_list, default=[1, 2])
+    ap.add_argument("--scatter", type=int, default=30, help="random plies before the second perft position")
+    ap.add_argument("--skip-perft", action="store_true")
+    ap.add_argument("--throughput-sizes", type=_int_list, default=[8, 32, 64])
+    ap.add_argument("--min-time", type=float, default=0.3)
+    args = ap.parse_args(argv)
+
+    failures = 0
+    if not args.skip_perft:
+        failures = run_perft(args.sizes, args.players, args.depth, args.seeds, args.scatter)
+    run_throughput(args.throughput_sizes, max(args.players), args.min_time, args.seeds[0])
+    if failures:
+        print(f"\n{failures} perft mismatch(es)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,107 @@
+"""
+MCTS playout throughput vs. worker processes.
+
+For each board size, one root position is searched with MCTSAI at every
+worker count for a fixed time; playouts/s and the speed-up over one worker
+are printed. The pool is started (and its processes imported) before the
+clock runs, so only search and result merging are measured.
+
+    python bench_mcts.py
+    python bench_mcts.py --sizes 8,32 --workers 1,2,4,8 --move-time 2
+    python bench_mcts.py --games 10          # also MCTS vs. random strength check
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+from game_state import GameState, PASS
+from mcts import MCTSAI, shared_pool
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def _position(size, num_players, seed, plies=20):
+    rng = random.Random(seed)
+    game = GameState.new(num_players, size, rng=rng)
+    for _ in range(plies):
+        actions = game.legal_actions()
+        if not actions or game.winner is not None:
+            break
+        action = rng.choice(actions)
+        game.apply(action, action.kind != PASS)
+    game.history.clear()
+    return game
+
+
+def _warm_up(workers):
+    if workers > 1:
+        pool = shared_pool(workers)
+        for f in [pool.submit(time.sleep, 0) for _ in range(workers)]:
+            f.result()
+
+
+def run_scaling(sizes, workers_list, num_players, move_time, seed):
+    print(f"cpu_count={os.cpu_count()}")
+    print(f"{'board':<8} {'workers':>7} {'playouts':>9} {'wall s':>7} {'playouts/s':>11} {'speedup':>8}")
+    for size in sizes:
+        game = _position(size, num_players, seed)
+        base = None
+        for workers in workers_list:
+            _warm_up(workers)
+            ai = MCTSAI(game.current, workers=workers, move_time=move_time, seed=seed)
+            t0 = time.perf_counter()
+            ai.choose(game)
+            wall = time.perf_counter() - t0
+            rate = ai.last_playouts / wall
+            base = base or rate
+            print(f"{f'{size}x{size}':<8} {workers:7d} {ai.last_playouts:9d} {wall:7.2f} {rate:11,.0f} {rate / base:7.2f}x")
+
+
+def run_games(games, size, workers, move_time, seed):
+    """MCTS (player 0) against uniform random moves, same answer odds."""
+    rng = random.Random(seed)
+    wins = 0
+    for g in range(games):
+        game = GameState.new(2, size, rng=rng)
+        ai = MCTSAI(0, workers=workers, move_time=move_time, seed=seed + g)
+        for _ in range(400):
+            if game.winner is not None:
+                break
+            if game.current == 0:
+                action = ai.choose(game)
+            else:
+                action = rng.choice(game.legal_actions())
+            p = ai.accuracy.p(game.current, None)
+            game.apply(action, action.kind == PASS or rng.random() < p)
+        wins += game.winner == 0
+    print(f"\nMCTS vs random on {size}x{size}: {wins}/{games} wins")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=_int_list, default=[8, 32])
+    ap.add_argument("--workers", type=_int_list, default=None,
+                    help="worker counts to compare (default 1,2,4.. up to cpu_count)")
+    ap.add_argument("--players", type=int, default=2)
+    ap.add_argument("--move-time", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--games", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    workers_list = args.workers
+    if workers_list is None:
+        workers_list = [1]
+        while workers_list[-1] * 2 <= (os.cpu_count() or 1):
+            workers_list.append(workers_list[-1] * 2)
+    run_scaling(args.sizes, workers_list, args.players, args.move_time, args.seed)
+    if args.games:
+        run_games(args.games, args.sizes[0], workers_list[-1], args.move_time / 4, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
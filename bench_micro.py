@@ -0,0 +1,345 @@
+"""
+Micro-benchmarks for the hot helpers (sraz3.py board/tile code, test7.py FFT).
+
+Every case is run at a few input sizes; each size gets a warmup, then
+--repeats timed batches of N calls (N is calibrated so one batch takes at
+least --min-time seconds). Per-call min / median / mean / stdev are reported.
+
+    python bench_micro.py
+    python bench_micro.py --cases tilt_surface,colorize --repeats 15
+    python bench_micro.py --save-baseline bench_micro_baseline.json
+    python bench_micro.py --baseline bench_micro_baseline.json
+
+A change that adds, removes or slows a case regenerates the checked-in
+baseline (--save-baseline bench_micro_baseline.json) in the same commit;
+--baseline fails on cases the baseline does not know.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import itertools
+import argparse
+import platform
+import tempfile
+import statistics
+from types import SimpleNamespace
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import sraz3
+from question_store import QuestionStore
+
+DEFAULT_TOLERANCE = 0.10
+
+
+# -----------------------------
+# Cases: setup(size) -> zero-arg callable timed per call
+# -----------------------------
+
+def _board(board_size, num_players=4):
+    players, pawns = sraz3.setup_players_and_pawns(num_players, board_size)
+    board = [[sraz3.Cell() for _ in range(board_size)] for _ in range(board_size)]
+    cats = list(sraz3.category_colors.keys())
+    for r in range(board_size):
+        for c in range(board_size):
+            board[r][c].category = cats[(r + c) % len(cats)]
+    for p in pawns:
+        board[p.row][p.col].pawn = p
+    return board, pawns
+
+
+def setup_tilt_surface(size):
+    tile = sraz3.render_tile_flat(size, sraz3.GRAY, (255, 99, 71), (10, 10, 10))
+    angles = [(random.uniform(-0.4, 0.4), random.uniform(-0.4, 0.4)) for _ in range(64)]
+    it = itertools.count()
+    return lambda: sraz3.tilt_surface(tile, *angles[next(it) & 63])
+
+
+def setup_render_tile_flat(size):
+    return lambda: sraz3.render_tile_flat(size, sraz3.GRAY, (255, 99, 71), (10, 10, 10))
+
+
+def setup_colorize(size):
+    image = pygame.transform.scale(sraz3.create_placeholder_pawn(), (size, size))
+    return lambda: sraz3.colorize(image, (220, 60, 60))
+
+
+def setup_get_valid_moves(board_size):
+    board, pawns = _board(board_size)
+    sraz3.place_random_holes(board, board_size, board_size)
+
+    def run():
+        # one "highlight pass": moves for every pawn on the board
+        for p in pawns:
+            sraz3.get_valid_moves(board, p, board_size, board_size)
+    return run
+
+
+def setup_legal_actions(board_size):
+    from game_state import GameState
+    game = GameState.new(4, board_size)
+    return game.legal_actions
+
+
+def _step(game, legal_actions):
+    # one search step: play the first action, list the replies, take it back
+    first = game.legal_actions()[0]
+
+    def run():
+        game.apply(first, True)
+        legal_actions()
+        game.undo()
+    return run
+
+
+def setup_step_legal_actions(board_size):
+    from game_state import GameState
+    game = GameState.new(4, board_size)
+    return _step(game, game.legal_actions)
+
+
+def setup_step_move_cache(board_size):
+    from game_state import GameState, MoveCache
+    game = GameState.new(4, board_size)
+    return _step(game, MoveCache(game).legal_actions)
+
+
+def setup_array_legal_actions(board_size):
+    from game_state import GameState
+    from board_array import BoardArrays
+    arr = BoardArrays.from_state(GameState.new(4, board_size))
+    return lambda: arr.legal_actions(0)
+
+
+def setup_state_hash(board_size):
+    from game_state import GameState
+    from board_array import BoardArrays
+    arr = BoardArrays.from_state(GameState.new(4, board_size))
+    return arr.state_hash
+
+
+def setup_place_random_holes(board_size):
+    board, _pawns = _board(board_size)
+    return lambda: sraz3.place_random_holes(board, board_size, board_size)
+
+
+def _question_csv(rows):
+    cats = list(sraz3.category_colors.keys())
+    fd, path = tempfile.mkstemp(suffix=".csv", prefix="bench_questions_")
+    with os.fdopen(fd, mode="w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        for i in range(rows):
+            writer.writerow([cats[i % len(cats)], f"Question number {i}?", f"right {i}",
+                             f"wrong a{i}", f"wrong b{i}", f"wrong c{i}"])
+    _TEMP_FILES.append(path)
+    return path
+
+
+def setup_question_store_import(rows):
+    """Full import of a new CSV into an empty store."""
+    path = _question_csv(rows)
+
+    def run():
+        store = QuestionStore(":memory:")
+        store.import_csv(path)
+        store.close()
+    return run
+
+
+def setup_question_store_startup(rows):
+    """Opening an up-to-date store and asking one question (what a game start pays)."""
+    path = _question_csv(rows)
+    fd, db = tempfile.mkstemp(suffix=".db", prefix="bench_questions_")
+    os.close(fd)
+    _TEMP_FILES.append(db)
+    QuestionStore(db).import_csv(path)
+    rng = random.Random(1)
+    cat = list(sraz3.category_colors.keys())[0]
+
+    def run():
+        store = QuestionStore(db)
+        store.import_csv(path)
+        store.random_question(cat, rng)
+        store.close()
+    return run
+
+
+def setup_generate_static(height):
+    width = height * 16 // 9
+    bg = sraz3.BalatroBackground(width, height)
+    return bg.generate_static
+
+
+def setup_build_fft_row(seconds):
+    # _build_fft_row only needs the audio fields, not a GL context
+    import test7
+    rate = 44100
+    mono = np.random.default_rng(1).uniform(-1.0, 1.0, rate * seconds).astype(np.float32)
+    stub = SimpleNamespace(sample_rate=rate, mono=mono, total_samples=mono.shape[0],
+                           FFT_WINDOW=4096, FFT_TEX_W=512)
+    it = itertools.count()
+    return lambda: test7.GalaxyRenderer._build_fft_row(stub, next(it) / 60.0)
+
+
+_TEMP_FILES = []
+
+# name -> (setup, sizes, size label)
+CASES = {
+    "tilt_surface": (setup_tilt_surface, [32, 64, 128], "tile px"),
+    "render_tile_flat": (setup_render_tile_flat, [32, 64, 128], "tile px"),
+    "colorize": (setup_colorize, [40, 100, 256], "image px"),
+    "get_valid_moves": (setup_get_valid_moves, [8, 16, 32], "board"),
+    "place_random_holes": (setup_place_random_holes, [8, 16, 32], "board"),
+    "legal_actions": (setup_legal_actions, [8, 32, 64], "board"),
+    "array_legal_actions": (setup_array_legal_actions, [8, 32, 64], "board"),
+    "step_legal_actions": (setup_step_legal_actions, [8, 32, 64], "board"),
+    "step_move_cache": (setup_step_move_cache, [8, 32, 64], "board"),
+    "state_hash": (setup_state_hash, [8, 32, 64], "board"),
+    "question_store_import": (setup_question_store_import, [100, 1000, 10000], "rows"),
+    "question_store_startup": (setup_question_store_startup, [100, 10000, 100000], "rows"),
+    "generate_static": (setup_generate_static, [360, 720, 1080], "height px"),
+    "build_fft_row": (setup_build_fft_row, [1, 60], "audio s"),
+}
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+
+def calibrate(fn, min_time):
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t0 >= min_time or number >= 1 << 20:
+            return number
+        number *= 2
+
+
+def measure(fn, repeats, warmup, min_time):
+    """Per-call microseconds for each timed batch."""
+    for _ in range(warmup):
+        fn()
+    number = calibrate(fn, min_time)
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) * 1e6 / number)
+    return number, samples
+
+
+def summarize(samples):
+    return {
+        "min_us": min(samples),
+        "median_us": statistics.median(samples),
+        "mean_us": statistics.mean(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def result_key(r):
+    return f"{r['case']}[{r['size']}]"
+
+
+def compare(results, baseline, tolerance):
+    """Median-based comparison; returns (regressed keys, keys missing from the baseline)."""
+    base = {result_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    missing = []
+    print(f"\n{'case':<32} {'base us':>11} {'now us':>11} {'delta':>8}")
+    for r in results:
+        key = result_key(r)
+        b = base.pop(key, None)
+        if b is None:
+            print(f"{key:<32} {'-':>11} {r['median_us']:11.2f}      new")
+            missing.append(key)
+            continue
+        delta = (r["median_us"] - b["median_us"]) / max(b["median_us"], 1e-9)
+        flag = ""
+        if delta > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif delta < -tolerance:
+            flag = "  faster"
+        print(f"{key:<32} {b['median_us']:11.2f} {r['median_us']:11.2f} {delta * 100:+7.1f}%{flag}")
+    run = {r["case"] for r in results}
+    for key, b in base.items():
+        if b["case"] in run or b["case"] not in CASES:
+            print(f"{key:<32} {b['median_us']:11.2f} {'-':>11}      gone")
+    return regressions, missing
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cases", default=",".join(CASES))
+    ap.add_argument("--repeats", type=int, default=7)
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--min-time", type=float, default=0.05, help="seconds per timed batch")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--baseline", help="compare against this results JSON")
+    ap.add_argument("--save-baseline", help="also write results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                    help="relative median increase flagged as regression")
+    args = ap.parse_args(argv)
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    results = []
+    try:
+        for name in args.cases.split(","):
+            setup, sizes, label = CASES[name]
+            for size in sizes:
+                random.seed(args.seed)
+                fn = setup(size)
+                number, samples = measure(fn, args.repeats, args.warmup, args.min_time)
+                r = {"case": name, "size": size, "size_label": label, "calls": number,
+                     "repeats": args.repeats, **summarize(samples)}
+                results.append(r)
+                print(f"{result_key(r):<32} median {r['median_us']:11.2f} us  min {r['min_us']:11.2f} us  "
+                      f"stdev {r['stdev_us']:9.2f}  ({number} calls x {args.repeats})")
+    finally:
+        for path in _TEMP_FILES:
+            os.remove(path)
+        _TEMP_FILES.clear()
+
+    doc = {
+        "meta": {
+            "seed": args.seed, "repeats": args.repeats, "warmup": args.warmup, "min_time": args.min_time,
+            "python": platform.python_version(), "pygame": pygame.version.ver, "numpy": np.__version__,
+            "machine": platform.machine(), "processor": platform.processor(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, mode="w", encoding="utf-8") as f:
+                json.dump(doc, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, mode="r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions, missing = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.tolerance * 100:.0f}%")
+        if missing:
+            print(f"\n{len(missing)} case(s) missing from {args.baseline}; regenerate it with --save-baseline")
+        if regressions or missing:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,292 @@
+"""
+Headless whole-frame benchmark of the board renderers in sraz.py, sraz2.py,
+sraz3.py and test7.py.
+
+Each variant's real main_game_real() loop is driven for N frames under
+SDL_VIDEODRIVER=dummy (test7 renders into a standalone Mesa/EGL context).
+pygame.display.flip, pygame.time.get_ticks and pygame.mouse.get_pos are
+swapped for a frame driver so animation time and mouse movement are scripted
+and every run with the same --seed draws the same frames.
+
+    python bench_render.py --variants sraz3 --board-sizes 8,16 --frames 60
+    python bench_render.py --out results.json --save-baseline bench_render_baseline.json
+    python bench_render.py --baseline bench_render_baseline.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import importlib
+import statistics
+import tempfile
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+VARIANTS = ["sraz", "sraz2", "sraz3", "test7"]
+DEFAULT_BOARD_SIZES = [6, 8, 16, 32]
+DEFAULT_PLAYERS = [2, 4]
+DEFAULT_WINDOWS = [(900, 700), (1920, 1080)]
+DEFAULT_TOLERANCE = 0.10
+
+
+class _BenchDone(Exception):
+    pass
+
+
+class FakeClock:
+    """Stands in for pygame.time.Clock: never sleeps, reports a fixed dt."""
+
+    def __init__(self, fps):
+        self.fps = fps
+
+    def tick(self, framerate=0):
+        return int(1000 / (framerate or self.fps))
+
+    def get_fps(self):
+        return float(self.fps)
+
+
+class FrameDriver:
+    """Counts flips, advances virtual time and scripts the mouse."""
+
+    def __init__(self, frames, warmup, fps, window, seed, sync=None):
+        self.frames = frames
+        self.warmup = warmup
+        self.frame_ms = 1000.0 / fps
+        self.w, self.h = window
+        rng = random.Random(seed)
+        self.phase_x = rng.random() * math.tau
+        self.phase_y = rng.random() * math.tau
+        self.sync = sync
+        self.count = 0
+        self.stamps = []
+        self._saved = None
+
+    def mouse_pos(self):
+        i = self.count
+        x = self.w * 0.5 + self.w * 0.45 * math.sin(i * 0.05 + self.phase_x)
+        y = self.h * 0.5 + self.h * 0.45 * math.sin(i * 0.07 + self.phase_y)
+        return int(x), int(y)
+
+    def ticks(self):
+        return int(self.count * self.frame_ms)
+
+    def flip(self):
+        if self.sync is not None:
+            self.sync()
+        self.stamps.append(time.perf_counter())
+        self.count += 1
+        if self.count > self.warmup + self.frames:
+            raise _BenchDone()
+
+    def __enter__(self):
+        self._saved = (pygame.display.flip, pygame.time.get_ticks, pygame.mouse.get_pos)
+        pygame.display.flip = self.flip
+        pygame.time.get_ticks = self.ticks
+        pygame.mouse.get_pos = self.mouse_pos
+        return self
+
+    def __exit__(self, *exc):
+        pygame.display.flip, pygame.time.get_ticks, pygame.mouse.get_pos = self._saved
+        return exc[0] is _BenchDone
+
+    def frame_times_ms(self):
+        stamps = self.stamps[self.warmup:]
+        return [(b - a) * 1000.0 for a, b in zip(stamps, stamps[1:])]
+
+
+def summarize(times):
+    s = sorted(times)
+    n = len(s)
+
+    def pct(p):
+        return s[min(n - 1, int(round(p / 100.0 * (n - 1))))]
+
+    mean = statistics.mean(s)
+    return {
+        "frames": n,
+        "mean_ms": mean,
+        "median_ms": statistics.median(s),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "min_ms": s[0],
+        "stdev_ms": statistics.pstdev(s),
+        "fps": 1000.0 / mean if mean else 0.0,
+    }
+
+
+# -----------------------------
+# Variant drivers
+# -----------------------------
+
+class PygameVariant:
+    """sraz / sraz2 / sraz3: plain pygame screen surface."""
+
+    def __init__(self, name):
+        self.name = name
+        self.mod = importlib.import_module(name)
+        # autosaves and replays of benchmark games go to the temp dir, not into the repo
+        if hasattr(self.mod, "SAVE_FILE"):
+            self.mod.SAVE_FILE = os.path.join(tempfile.gettempdir(), f"bench_{name}_savegame.json")
+        if hasattr(self.mod, "REPLAY_DIR"):
+            self.mod.REPLAY_DIR = os.path.join(tempfile.gettempdir(), "bench_replays")
+        self.font = pygame.font.SysFont("Arial", 20)
+        self.pawn = pygame.transform.scale(self.mod.create_placeholder_pawn(), (40, 40))
+        self.flag = pygame.transform.scale(self.mod.create_placeholder_flag(), (40, 40))
+
+    def run(self, window, board_size, players, frames, warmup, seed):
+        screen = pygame.display.set_mode(window)
+        random.seed(seed)
+        os.environ["SRAZ_SEED"] = str(seed)
+        driver = FrameDriver(frames, warmup, self.mod.FPS, window, seed)
+        with driver:
+            self.mod.main_game_real(screen, FakeClock(self.mod.FPS), self.font, players, 30,
+                                    board_size, self.pawn, self.flag)
+        return driver.frame_times_ms()
+
+
+class GLVariant:
+    """test7: GalaxyRenderer on a standalone GL context, offscreen framebuffer."""
+
+    def __init__(self, name):
+        import moderngl
+        self.name = name
+        self.mod = importlib.import_module(name)
+        # autosaves and replays of benchmark games go to the temp dir, not into the repo
+        if hasattr(self.mod, "SAVE_FILE"):
+            self.mod.SAVE_FILE = os.path.join(tempfile.gettempdir(), f"bench_{name}_savegame.json")
+        if hasattr(self.mod, "REPLAY_DIR"):
+            self.mod.REPLAY_DIR = os.path.join(tempfile.gettempdir(), "bench_replays")
+        try:
+            self.ctx = moderngl.create_standalone_context(require=330, backend="egl")
+        except Exception:
+            self.ctx = moderngl.create_standalone_context(require=330)
+        self.renderer = None
+        self.font = self.mod.get_font("Arial", 20)
+        self.pawn = pygame.transform.scale(self.mod.create_placeholder_pawn(), (40, 40))
+        self.flag = pygame.transform.scale(self.mod.create_placeholder_flag(), (40, 40))
+
+    def run(self, window, board_size, players, frames, warmup, seed):
+        if self.renderer is None:
+            self.renderer = self.mod.GalaxyRenderer(window[0], window[1], None, ctx=self.ctx)
+        else:
+            self.renderer.resize(*window)
+        random.seed(seed)
+        os.environ["SRAZ_SEED"] = str(seed)
+        driver = FrameDriver(frames, warmup, self.mod.FPS, window, seed, sync=self.ctx.finish)
+        with driver:
+            self.mod.main_game_real(self.renderer, FakeClock(self.mod.FPS), self.font, players, 30,
+                                    board_size, self.pawn, self.flag)
+        return driver.frame_times_ms()
+
+
+def load_variant(name):
+    try:
+        return GLVariant(name) if name == "test7" else PygameVariant(name)
+    except Exception as e:
+        print(f"Skipping {name}: {e}")
+        return None
+
+
+# -----------------------------
+# Baseline comparison
+# -----------------------------
+
+def result_key(r):
+    return f"{r['variant']}|board{r['board_size']}|players{r['players']}|{r['window'][0]}x{r['window'][1]}"
+
+
+def compare(results, baseline, tolerance):
+    base = {result_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    print(f"\n{'config':<40} {'base ms':>9} {'now ms':>9} {'delta':>8}")
+    for r in results:
+        key = result_key(r)
+        b = base.get(key)
+        if b is None:
+            print(f"{key:<40} {'-':>9} {r['mean_ms']:9.2f}      new")
+            continue
+        delta = (r["mean_ms"] - b["mean_ms"]) / max(b["mean_ms"], 1e-9)
+        flag = ""
+        if delta > tolerance:
+            flag = "  REGRESSION"
+            regressions.append((key, b["mean_ms"], r["mean_ms"], delta))
+        elif delta < -tolerance:
+            flag = "  faster"
+        print(f"{key:<40} {b['mean_ms']:9.2f} {r['mean_ms']:9.2f} {delta * 100:+7.1f}%{flag}")
+    return regressions
+
+
+def _int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def _windows(text):
+    return [tuple(int(v) for v in w.split("x")) for w in text.split(",") if w]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--variants", default=",".join(VARIANTS))
+    ap.add_argument("--board-sizes", type=_int_list, default=DEFAULT_BOARD_SIZES)
+    ap.add_argument("--players", type=_int_list, default=DEFAULT_PLAYERS)
+    ap.add_argument("--windows", type=_windows, default=DEFAULT_WINDOWS)
+    ap.add_argument("--frames", type=int, default=60)
+    ap.add_argument("--warmup", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--baseline", help="compare against this results JSON")
+    ap.add_argument("--save-baseline", help="also write results as the new baseline")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                    help="relative mean frame-time increase flagged as regression")
+    args = ap.parse_args(argv)
+
+    pygame.init()
+    results = []
+    for name in args.variants.split(","):
+        variant = load_variant(name)
+        if variant is None:
+            continue
+        for window in args.windows:
+            for board_size in args.board_sizes:
+                for players in args.players:
+                    times = variant.run(window, board_size, players, args.frames, args.warmup, args.seed)
+                    r = {"variant": name, "board_size": board_size, "players": players,
+                         "window": list(window), **summarize(times)}
+                    results.append(r)
+                    print(f"{result_key(r):<40} mean {r['mean_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+                          f"{r['fps']:7.1f} fps")
+
+    doc = {
+        "meta": {
+            "seed": args.seed, "frames": args.frames, "warmup": args.warmup,
+            "python": platform.python_version(), "pygame": pygame.version.ver,
+            "machine": platform.machine(), "processor": platform.processor(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, mode="w", encoding="utf-8") as f:
+                json.dump(doc, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, mode="r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.tolerance * 100:.0f}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,178 @@
+"""
+CPU frame-time comparison of the two UI paths used by test7.py:
+
+  software: pygame.draw into the overlay surface + full RGBA texture upload
+  gl:       GLUI batched quads + glyph-atlas text (one instanced draw call)
+
+Runs headless on a standalone (EGL / Mesa) GL context:
+
+    python bench_ui.py --frames 300 --board-size 8
+"""
+import os
+import sys
+import time
+import math
+import argparse
+import statistics
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import moderngl
+
+from gl_ui import GLUI, SoftwareUI
+from test7 import (
+    FSQ_VERT, OVERLAY_FRAG, GRAY, YELLOW, LIGHT_GREEN, category_colors,
+    Cell, colorize, create_placeholder_pawn, create_placeholder_flag,
+    setup_players_and_pawns, draw_legend, draw_current_player_display,
+)
+
+
+def create_context():
+    try:
+        return moderngl.create_standalone_context(require=330, backend="egl")
+    except Exception:
+        return moderngl.create_standalone_context(require=330)
+
+
+def build_scene(board_size, num_players):
+    players, pawns = setup_players_and_pawns(num_players, board_size)
+    base_pawn, base_flag = create_placeholder_pawn(), create_placeholder_flag()
+    icon_map = {}
+    for p in players:
+        icon_map[(p, False)] = colorize(base_pawn, p.color)
+        icon_map[(p, True)] = colorize(colorize(base_flag, p.color), (50, 50, 50))
+
+    board = [[Cell() for _ in range(board_size)] for _ in range(board_size)]
+    cats = list(category_colors.keys())
+    for r in range(board_size):
+        for c in range(board_size):
+            board[r][c].category = cats[(r + c) % len(cats)]
+    for p in pawns:
+        board[p.row][p.col].pawn = p
+    return players, board, icon_map
+
+
+def draw_scene(ui, font, scene, frame):
+    """Roughly what main_game_real + a menu button draw in one frame."""
+    players, board, icon_map = scene
+    board_size = len(board)
+    w, h = ui.size
+    ui.fill((0, 0, 0, 70))
+
+    cell_size = int(min(max(50, w - 480) / board_size, max(50, h - 230) / board_size))
+    start_x = (w - board_size * cell_size) // 2
+    start_y = (h - board_size * cell_size) // 2
+    pawn_size = int(cell_size * 0.7)
+
+    for r in range(board_size):
+        for c in range(board_size):
+            cell = board[r][c]
+            rect = pygame.Rect(start_x + c * cell_size, start_y + r * cell_size, cell_size, cell_size)
+            color = YELLOW if (r + c + frame) % 17 == 0 else (LIGHT_GREEN if (r * c) % 7 == 1 else GRAY)
+            ui.rect(rect, (*color, 240), radius=6)
+            ui.border(rect, (10, 10, 10, 255), 2, radius=6)
+            cat_color = category_colors[cell.category]
+            ui.rect((rect.x + 4, rect.y + 4, int(cell_size * 0.16), int(cell_size * 0.16)), (*cat_color, 255), radius=4)
+            if cell.pawn:
+                icon = icon_map[(cell.pawn.player, cell.pawn.is_flag)]
+                size = int(pawn_size * (1.0 + 0.1 * math.sin(frame * 0.2)))
+                icon_rect = pygame.Rect(0, 0, size, size)
+                icon_rect.center = rect.center
+                ui.sprite(icon, icon_rect)
+
+    ui.rect((10, 10, 180, 150), (0, 0, 0, 180), radius=10)
+    y = 10
+    for p in players:
+        ui.text(font, f"{p.name} (Score: {p.score})", p.color, topleft=(20, y))
+        y += 30
+    draw_legend(ui, font, x_start=10, y_start=200)
+    draw_current_player_display(ui, font, players[0], icon_map, x_start=w - 210, y_start=50)
+
+
+class SoftwarePath:
+    def __init__(self, ctx, w, h):
+        self.ctx = ctx
+        self.surface = pygame.Surface((w, h), pygame.SRCALPHA)
+        self.ui = SoftwareUI(self.surface)
+        self.tex = ctx.texture((w, h), components=4, dtype="f1")
+        vbo = ctx.buffer(np.array([-1, -1, 0, 0, 1, -1, 1, 0, -1, 1, 0, 1, 1, 1, 1, 1], dtype="f4").tobytes())
+        prog = ctx.program(vertex_shader=FSQ_VERT, fragment_shader=OVERLAY_FRAG)
+        prog["src"].value = 0
+        self.vao = ctx.vertex_array(prog, [(vbo, "2f 2f", "in_pos", "in_uv")])
+
+    def frame(self, font, scene, i):
+        self.ui.begin()
+        draw_scene(self.ui, font, scene, i)
+        self.tex.write(pygame.image.tostring(self.surface, "RGBA", True))
+        self.tex.use(location=0)
+        self.vao.render(mode=moderngl.TRIANGLE_STRIP)
+
+
+class GLPath:
+    def __init__(self, ctx, w, h):
+        self.ui = GLUI(ctx, w, h)
+
+    def frame(self, font, scene, i):
+        self.ui.begin()
+        draw_scene(self.ui, font, scene, i)
+        self.ui.flush()
+
+
+def run(path, ctx, fbo, font, scene, frames, warmup):
+    """Returns (submit_ms, total_ms) per frame; total includes ctx.finish()."""
+    submit, total = [], []
+    for i in range(warmup + frames):
+        t0 = time.perf_counter()
+        fbo.use()
+        fbo.clear(0.0, 0.0, 0.0, 1.0)
+        path.frame(font, scene, i)
+        t1 = time.perf_counter()
+        ctx.finish()
+        t2 = time.perf_counter()
+        if i >= warmup:
+            submit.append((t1 - t0) * 1000.0)
+            total.append((t2 - t0) * 1000.0)
+    return submit, total
+
+
+def summarize(name, result):
+    submit, total = result
+    for label, times in (("submit", submit), ("total", total)):
+        times = sorted(times)
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        print(f"{name:>9} {label:>6}: mean {statistics.mean(times):7.3f} ms  "
+              f"median {statistics.median(times):7.3f} ms  p95 {p95:7.3f} ms")
+    return statistics.mean(submit)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--warmup", type=int, default=30)
+    ap.add_argument("--board-size", type=int, default=8)
+    ap.add_argument("--players", type=int, default=4)
+    ap.add_argument("--width", type=int, default=1920)
+    ap.add_argument("--height", type=int, default=1080)
+    args = ap.parse_args(argv)
+
+    ctx = create_context()
+    ctx.enable(moderngl.BLEND)
+    ctx.blend_func = (moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)
+    fbo = ctx.simple_framebuffer((args.width, args.height))
+    font = pygame.font.SysFont("Arial", 20)
+    scene = build_scene(args.board_size, args.players)
+
+    print(f"{args.width}x{args.height}, board {args.board_size}x{args.board_size}, "
+          f"{args.frames} frames on {ctx.info['GL_RENDERER']}")
+    sw = summarize("software", run(SoftwarePath(ctx, args.width, args.height), ctx, fbo, font, scene, args.frames, args.warmup))
+    gl = summarize("gl", run(GLPath(ctx, args.width, args.height), ctx, fbo, font, scene, args.frames, args.warmup))
+    print(f"  CPU submit speedup: {sw / max(gl, 1e-9):.2f}x")
+    if "llvmpipe" in ctx.info["GL_RENDERER"]:
+        print("  (software rasterizer: 'total' includes GPU work done on the CPU)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,212 @@
+from game_state import Action, EMPTY, MOVE, ATTACK, PASS_ACTION
+
+# -----------------------------
+# Bitboard move generator
+#
+# Square (r, c) is bit r * size + c of a Python int, so one int holds a
+# whole player (or all holes / all flags). Boards up to MAX_SIZE x MAX_SIZE
+# (64x64) are supported; larger sizes raise ValueError. Neighbours of a
+# whole set are four shifts:
+#
+#   east  (bits << 1) & ~first column     west  (bits >> 1) & ~last column
+#   south (bits << size) & board          north (bits >> size)
+#
+# and a step target is a neighbour that is neither a hole nor own piece.
+# Captured flags eliminate their owner exactly like GameState.apply.
+# -----------------------------
+
+MAX_SIZE = 64
+
+# (drow, dcol) order matches game_state.DIRECTIONS: east, west, south, north
+EAST, WEST, SOUTH, NORTH = range(4)
+
+
+class BitBoard:
+    __slots__ = ("size", "full", "not_first_col", "not_last_col",
+                 "holes", "players", "flags", "occupant")
+
+    def __init__(self, size, num_players):
+        if size > MAX_SIZE:
+            raise ValueError(f"board size {size} is larger than {MAX_SIZE}")
+        self.size = size
+        self.full = (1 << (size * size)) - 1
+        first_col = 0
+        for r in range(size):
+            first_col |= 1 << (r * size)
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~(first_col << (size - 1))
+        self.holes = 0
+        self.players = [0] * num_players
+        self.flags = 0
+        # square -> pawn id, only needed to turn squares back into Actions
+        self.occupant = [EMPTY] * (size * size)
+
+    @classmethod
+    def from_state(cls, state):
+        board = state.board
+        bb = cls(board.size, len(state.players))
+        for i, is_hole in enumerate(board.hole):
+            if is_hole:
+                bb.holes |= 1 << i
+        for pawn in state.pawns:
+            if not pawn.alive:
+                continue
+            sq = pawn.row * board.size + pawn.col
+            bb.players[pawn.player] |= 1 << sq
+            if pawn.is_flag:
+                bb.flags |= 1 << sq
+            bb.occupant[sq] = pawn.id
+        return bb
+
+    def copy(self):
+        bb = BitBoard.__new__(BitBoard)
+        bb.size = self.size
+        bb.full = self.full
+        bb.not_first_col = self.not_first_col
+        bb.not_last_col = self.not_last_col
+        bb.holes = self.holes
+        bb.players = self.players[:]
+        bb.flags = self.flags
+        bb.occupant = self.occupant[:]
+        return bb
+
+    # --- queries ---
+
+    def occupied(self):
+        bits = 0
+        for p in self.players:
+            bits |= p
+        return bits
+
+    def owner_of(self, sq):
+        bit = 1 << sq
+        for i, p in enumerate(self.players):
+            if p & bit:
+                return i
+        return EMPTY
+
+    def alive_players(self):
+        return [i for i, p in enumerate(self.players) if p & self.flags]
+
+    def neighbours(self, bits):
+        n = self.size
+        return (((bits << 1) & self.not_first_col) | ((bits >> 1) & self.not_last_col)
+                | ((bits << n) & self.full) | (bits >> n))
+
+    def direction_targets(self, player):
+        """[east, west, south, north] target sets for all of player's pieces."""
+        own = self.players[player]
+        free = self.full & ~self.holes & ~own
+        n = self.size
+        return [
+            (own << 1) & self.not_first_col & free,
+            (own >> 1) & self.not_last_col & free,
+            (own << n) & free,
+            (own >> n) & free,
+        ]
+
+    def moves(self, player):
+        """(src, dst, is_attack) square triples, grouped by direction."""
+        n = self.size
+        enemies = self.occupied() & ~self.players[player]
+        out = []
+        for back, targets in zip((-1, 1, -n, n), self.direction_targets(player)):
+            t = targets
+            while t:
+                low = t & -t
+                dst = low.bit_length() - 1
+                out.append((dst + back, dst, bool(enemies & low)))
+                t ^= low
+        return out
+
+    def count_moves(self, player):
+        return sum(bin(t).count("1") for t in self.direction_targets(player))
+
+    def legal_actions(self, player):
+        n = self.size
+        occ = self.occupant
+        actions = [Action(occ[src], dst // n, dst % n, ATTACK if attack else MOVE)
+                   for src, dst, attack in self.moves(player)]
+        return actions or [PASS_ACTION]
+
+    def valid_moves(self, row, col):
+        """Drop-in for get_valid_moves: (row, col) targets of the piece on (row, col)."""
+        n = self.size
+        sq = row * n + col
+        player = self.owner_of(sq)
+        if player == EMPTY:
+            return []
+        free = self.full & ~self.holes & ~self.players[player]
+        bit = 1 << sq
+        out = []
+        for dst_bits in ((bit << 1) & self.not_first_col, (bit >> 1) & self.not_last_col,
+                         (bit << n) & self.full, bit >> n):
+            if dst_bits & free:
+                dst = dst_bits.bit_length() - 1
+                out.append((dst // n, dst % n))
+        return out
+
+    # --- make / unmake (used by search and perft) ---
+
+    def make(self, player, src, dst):
+        """Step player's piece src -> dst; returns an undo token."""
+        players = self.players
+        flags = self.flags
+        src_bit, dst_bit = 1 << src, 1 << dst
+        victim = EMPTY
+        swept = 0
+        if self.occupied() & dst_bit:
+            victim = self.owner_of(dst)
+            if flags & dst_bit:
+                # flag captured: the whole army leaves the board
+                swept = players[victim]
+                players[victim] = 0
+            else:
+                players[victim] ^= dst_bit
+        players[player] ^= src_bit | dst_bit
+        if flags & src_bit:
+            self.flags = (flags & ~dst_bit) ^ src_bit ^ dst_bit
+        else:
+            self.flags = flags & ~dst_bit
+        moved = self.occupant[src]
+        captured = self.occupant[dst]
+        self.occupant[dst] = moved
+        self.occupant[src] = EMPTY
+        return (player, src, dst, victim, swept, flags, captured)
+
+    def unmake(self, token):
+        player, src, dst, victim, swept, flags, captured = token
+        players = self.players
+        players[player] ^= (1 << src) | (1 << dst)
+        if victim != EMPTY:
+            if swept:
+                players[victim] = swept
+            else:
+                players[victim] ^= 1 << dst
+        self.flags = flags
+        self.occupant[src] = self.occupant[dst]
+        self.occupant[dst] = captured
+
+    def next_player(self, player):
+        n = len(self.players)
+        for k in range(1, n + 1):
+            i = (player + k) % n
+            if self.players[i] & self.flags:
+                return i
+        return player
+
+    def perft(self, player, depth):
+        """Leaf count of the all-answers-correct game tree (PASS when stuck)."""
+        if depth == 0 or len(self.alive_players()) <= 1:
+            return 1
+        moves = self.moves(player)
+        if not moves:
+            return self.perft(self.next_player(player), depth - 1)
+        if depth == 1:
+            return len(moves)
+        total = 0
+        for src, dst, _attack in moves:
+            token = self.make(player, src, dst)
+            total += self.perft(self.next_player(player), depth - 1)
+            self.unmake(token)
+        return total
@@ -0,0 +1,146 @@
+import hashlib
+
+import numpy as np
+
+from game_state import Action, EMPTY, MOVE, ATTACK, PASS_ACTION, DIRECTIONS
+
+# -----------------------------
+# NumPy board store
+#
+# Parallel arrays mirroring a GameState:
+#   category  uint8  [size, size]  index into .categories
+#   hole      bool   [size, size]
+#   occupant  int16  [size, size]  pawn id or -1
+#   owner     int8   [size, size]  player index or -1
+# plus per-pawn row / col / player / alive / is_flag vectors, so move
+# generation works from pawn positions and costs the same on 8x8 or 64x64.
+# -----------------------------
+
+_DR = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+_DC = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+
+
+class BoardArrays:
+    def __init__(self, size, categories):
+        self.size = size
+        self.categories = list(categories)
+        self.category = np.zeros((size, size), dtype=np.uint8)
+        self.hole = np.zeros((size, size), dtype=bool)
+        self.occupant = np.full((size, size), EMPTY, dtype=np.int16)
+        self.owner = np.full((size, size), -1, dtype=np.int8)
+
+        self.pawn_row = np.zeros(0, dtype=np.int32)
+        self.pawn_col = np.zeros(0, dtype=np.int32)
+        self.pawn_player = np.zeros(0, dtype=np.int8)
+        self.pawn_alive = np.zeros(0, dtype=bool)
+        self.pawn_flag = np.zeros(0, dtype=bool)
+
+    @classmethod
+    def from_state(cls, state):
+        board = state.board
+        size = board.size
+        categories = list(dict.fromkeys(board.category))
+        arr = cls(size, categories)
+        code = {name: i for i, name in enumerate(categories)}
+        arr.category[:] = np.array([code[c] for c in board.category], dtype=np.uint8).reshape(size, size)
+        arr.hole[:] = np.array(board.hole, dtype=bool).reshape(size, size)
+        arr.sync_pawns(state)
+        return arr
+
+    def sync_pawns(self, state):
+        """Rebuild occupant/owner and the pawn vectors from state.pawns."""
+        pawns = state.pawns
+        self.pawn_row = np.array([p.row for p in pawns], dtype=np.int32)
+        self.pawn_col = np.array([p.col for p in pawns], dtype=np.int32)
+        self.pawn_player = np.array([p.player for p in pawns], dtype=np.int8)
+        self.pawn_alive = np.array([p.alive for p in pawns], dtype=bool)
+        self.pawn_flag = np.array([p.is_flag for p in pawns], dtype=bool)
+
+        self.occupant.fill(EMPTY)
+        self.owner.fill(-1)
+        alive = np.nonzero(self.pawn_alive)[0]
+        rows, cols = self.pawn_row[alive], self.pawn_col[alive]
+        self.occupant[rows, cols] = alive
+        self.owner[rows, cols] = self.pawn_player[alive]
+
+    def copy(self):
+        arr = BoardArrays.__new__(BoardArrays)
+        arr.size = self.size
+        arr.categories = self.categories
+        arr.category = self.category  # never changes during a game
+        for name in ("hole", "occupant", "owner", "pawn_row", "pawn_col", "pawn_player", "pawn_alive", "pawn_flag"):
+            setattr(arr, name, getattr(self, name).copy())
+        return arr
+
+    # --- incremental updates (mirror GameState.apply) ---
+
+    def move(self, pawn_id, row, col):
+        """Move pawn_id to (row, col), removing whatever stood there."""
+        target = int(self.occupant[row, col])
+        if target != EMPTY:
+            self.remove(target)
+        r0, c0 = self.pawn_row[pawn_id], self.pawn_col[pawn_id]
+        self.occupant[r0, c0] = EMPTY
+        self.owner[r0, c0] = -1
+        self.occupant[row, col] = pawn_id
+        self.owner[row, col] = self.pawn_player[pawn_id]
+        self.pawn_row[pawn_id] = row
+        self.pawn_col[pawn_id] = col
+        return target
+
+    def remove(self, pawn_id):
+        r, c = self.pawn_row[pawn_id], self.pawn_col[pawn_id]
+        self.occupant[r, c] = EMPTY
+        self.owner[r, c] = -1
+        self.pawn_alive[pawn_id] = False
+
+    def remove_player(self, player_index):
+        gone = np.nonzero(self.pawn_alive & (self.pawn_player == player_index))[0]
+        self.occupant[self.pawn_row[gone], self.pawn_col[gone]] = EMPTY
+        self.owner[self.pawn_row[gone], self.pawn_col[gone]] = -1
+        self.pawn_alive[gone] = False
+
+    # --- move generation ---
+
+    def move_targets(self, player_index):
+        """
+        All steps for every live pawn of player_index at once.
+        Returns (pawn_ids, rows, cols, is_attack) arrays ordered by pawn id,
+        then by DIRECTIONS, the same order GameState.legal_actions uses.
+        """
+        pawns = np.nonzero(self.pawn_alive & (self.pawn_player == player_index))[0]
+        n = self.size
+        # [pawns, 4] candidate squares
+        rows = self.pawn_row[pawns, None] + _DR[None, :]
+        cols = self.pawn_col[pawns, None] + _DC[None, :]
+        ok = (rows >= 0) & (rows < n) & (cols >= 0) & (cols < n)
+        rr = np.where(ok, rows, 0)
+        cc = np.where(ok, cols, 0)
+        owner = self.owner[rr, cc]
+        ok &= ~self.hole[rr, cc] & (owner != player_index)
+
+        ids = np.broadcast_to(pawns[:, None], ok.shape)[ok]
+        return ids, rows[ok], cols[ok], owner[ok] >= 0
+
+    def legal_actions(self, player_index):
+        ids, rows, cols, attack = self.move_targets(player_index)
+        if not len(ids):
+            return [PASS_ACTION]
+        return [Action(p, r, c, ATTACK if a else MOVE)
+                for p, r, c, a in zip(ids.tolist(), rows.tolist(), cols.tolist(), attack.tolist())]
+
+    def move_mask(self, player_index):
+        """Boolean [size, size] of every square player_index can step onto."""
+        _ids, rows, cols, _attack = self.move_targets(player_index)
+        mask = np.zeros((self.size, self.size), dtype=bool)
+        mask[rows, cols] = True
+        return mask
+
+    # --- hashing ---
+
+    def state_hash(self, current=0):
+        """64-bit digest of holes + occupants + side to move (stable across runs)."""
+        h = hashlib.blake2b(self.occupant.tobytes(), digest_size=8)
+        h.update(self.hole.tobytes())
+        h.update(bytes((current,)))
+        return int.from_bytes(h.digest(), "little")
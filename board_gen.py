@@ -0,0 +1,289 @@
+import os
+import random
+import multiprocessing
+
+import numpy as np
+
+# -----------------------------
+# Hole layouts with guaranteed reachability
+#
+# Holes are sampled like the original place_random_holes (uniformly from
+# the free tiles, never on a starting square), then checked hole by hole:
+# a hole whose free sides stay joined around it (through its 8 neighbours)
+# cannot split the board, so only a hole next to an earlier one costs a
+# look at its ring (then at the 5x5 tiles around it), and only a hole whose
+# sides do not meet nearby costs a flood fill of the whole board. If the
+# holes cut the board into pockets, holes that border the pockets are
+# opened again (union-find, unioning as they go) until one
+# region is left, and the missing holes are put back one at a time wherever
+# they keep the board connected. Every pawn can therefore always walk to
+# every flag.
+#
+#   hole = generate_holes(size, reserved, hole_count=6, rng=rng)
+#   hole = generate_holes(64, reserved, density=0.15, rng=rng)
+#
+# Tournaments and simulations can pre-generate thousands of layouts per
+# configuration in parallel (BoardCache), stored as packed bits in .npz.
+# -----------------------------
+
+DEFAULT_CACHE_DIR = "board_cache"
+TOP_UP_TRIES = 8    # attempts per hole when putting removed holes back
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _neighbours(size, i):
+    r, c = divmod(i, size)
+    if c + 1 < size:
+        yield i + 1
+    if c > 0:
+        yield i - 1
+    if r + 1 < size:
+        yield i + size
+    if r > 0:
+        yield i - size
+
+
+def free_regions(size, hole):
+    """Union-find parents over the free tiles and the number of separate regions."""
+    n = size * size
+    parent = list(range(n))
+    regions = 0
+    for i in range(n):
+        if hole[i]:
+            continue
+        regions += 1
+        c = i % size
+        for j in ((i + 1) if c + 1 < size else -1, i + size):
+            if 0 <= j < n and not hole[j]:
+                a, b = _find(parent, i), _find(parent, j)
+                if a != b:
+                    parent[a] = b
+                    regions -= 1
+    return parent, regions
+
+
+def is_connected(size, hole):
+    """True when every free tile can reach every other free tile (one flood fill)."""
+    n = size * size
+    free = hole.count(False)
+    if free <= 1:
+        return True
+    start = hole.index(False)
+    seen = bytearray(n)
+    seen[start] = 1
+    stack = [start]
+    reached = 1
+    while stack:
+        i = stack.pop()
+        c = i % size
+        for j in ((i + 1) if c + 1 < size else -1, (i - 1) if c else -1, i + size, i - size):
+            if 0 <= j < n and not seen[j] and not hole[j]:
+                seen[j] = 1
+                reached += 1
+                stack.append(j)
+    return reached == free
+
+
+# the 8 neighbours of a tile in ring order, sides at even positions
+_RING = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+
+
+def _ring_joined(size, hole, i):
+    """True when the free sides of tile i are joined through its ring, so a hole at i splits nothing."""
+    r, c = divmod(i, size)
+    ring = [0 <= r + dr < size and 0 <= c + dc < size and not hole[(r + dr) * size + c + dc] for dr, dc in _RING]
+    # a free side starts a group unless the previous side and the corner between are free too
+    starts = sum(1 for k in (0, 2, 4, 6) if ring[k] and not (ring[k - 1] and ring[k - 2]))
+    return starts <= 1
+
+
+def _joined_nearby(size, hole, i, reach=2):
+    """True when the free sides of tile i meet again within reach tiles of it (a hole at i splits nothing)."""
+    r, c = divmod(i, size)
+    sides = [j for j in _neighbours(size, i) if not hole[j]]
+    if len(sides) < 2:
+        return True
+    seen = {i, sides[0]}
+    stack = [sides[0]]
+    left = len(sides) - 1
+    while stack:
+        for j in _neighbours(size, stack.pop()):
+            if j in seen or hole[j]:
+                continue
+            jr, jc = divmod(j, size)
+            if abs(jr - r) > reach or abs(jc - c) > reach:
+                continue
+            seen.add(j)
+            if j in sides:
+                left -= 1
+                if not left:
+                    return True
+            stack.append(j)
+    return False
+
+
+def _connect(size, hole, rng):
+    """Open holes until the free tiles form one region; returns how many were opened."""
+    parent, regions = free_regions(size, hole)
+    opened = 0
+    while regions > 1:
+        roots = {}
+        for i, h in enumerate(hole):
+            if not h:
+                root = _find(parent, i)
+                roots[root] = roots.get(root, 0) + 1
+        main = max(roots, key=roots.get)
+        bridges = []
+        fringe = []
+        for i, h in enumerate(hole):
+            if not h:
+                continue
+            touching = {_find(parent, j) for j in _neighbours(size, i) if not hole[j]}
+            if len(touching) >= 2 and main in touching:
+                bridges.append(i)
+            elif touching and main not in touching:
+                fringe.append(i)
+        # a hole joining a pocket to the main region is best; otherwise grow a pocket outwards
+        i = rng.choice(bridges or fringe)
+        hole[i] = False
+        opened += 1
+        regions += 1
+        for j in _neighbours(size, i):
+            if not hole[j]:
+                a, b = _find(parent, i), _find(parent, j)
+                if a != b:
+                    parent[a] = b
+                    regions -= 1
+    return opened
+
+
+def generate_holes(size, reserved=(), hole_count=None, density=None, rng=random):
+    """
+    Hole mask (flat, row-major list of bools) with every free tile reachable.
+    reserved tiles (starting squares) never become holes. Give hole_count, or
+    density as a fraction of the board; a request that cannot stay connected
+    ends up with fewer holes.
+    """
+    reserved = set(reserved)
+    n = size * size
+    if hole_count is None:
+        hole_count = int(round((density or 0.0) * n))
+    free = [i for i in range(n) if i not in reserved]
+    hole = [False] * n
+    split = False
+    placed = set()
+    for i in rng.sample(free, min(hole_count, len(free))):
+        # far from earlier holes (the +-1 wrap at the edges only costs a needless ring test)
+        if not split and not placed.isdisjoint((i - size - 1, i - size, i - size + 1, i - 1, i + 1,
+                                                i + size - 1, i + size, i + size + 1)):
+            split = not (_ring_joined(size, hole, i) or _joined_nearby(size, hole, i))
+        placed.add(i)
+        hole[i] = True
+    if not split or is_connected(size, hole):
+        return hole
+
+    missing = _connect(size, hole, rng)
+    tries = missing * TOP_UP_TRIES
+    while missing and tries:
+        tries -= 1
+        i = rng.choice(free)
+        if hole[i]:
+            continue
+        hole[i] = True
+        if is_connected(size, hole):
+            missing -= 1
+        else:
+            hole[i] = False
+    return hole
+
+
+# -----------------------------
+# Batch pre-generation
+# -----------------------------
+
+def board_seed(seed, index):
+    return seed * 1000003 + index
+
+
+def _generate_chunk(args):
+    size, reserved, hole_count, seed, start, count = args
+    rows = np.zeros((count, size * size), dtype=bool)
+    for k in range(count):
+        rng = random.Random(board_seed(seed, start + k))
+        rows[k] = generate_holes(size, reserved, hole_count, rng=rng)
+    return start, np.packbits(rows, axis=1)
+
+
+class BoardCache:
+    """
+    Connected hole layouts per (board size, players, hole count, seed),
+    generated once in parallel and kept as packed bits on disk:
+
+        cache = BoardCache()
+        boards = cache.get(size=32, num_players=4, hole_count=150, count=5000, seed=1)
+        game = GameState.new(4, 32, hole_mask=boards[i])
+
+    Layout i only depends on (seed, i), so the worker count never changes it.
+    """
+
+    def __init__(self, folder=DEFAULT_CACHE_DIR):
+        self.folder = folder
+        self._loaded = {}      # path -> packed rows
+        self._unpacked = {}    # (path, count) -> bool rows
+
+    def path(self, size, num_players, hole_count, seed):
+        return os.path.join(self.folder, f"holes_{size}x{size}_p{num_players}_h{hole_count}_s{seed}.npz")
+
+    def get(self, size, num_players, hole_count, count, seed=0, workers=None):
+        # game_state imports this module, so the starting squares are looked up late
+        from game_state import start_squares
+        path = self.path(size, num_players, hole_count, seed)
+        boards = self._unpacked.get((path, count))
+        if boards is not None:
+            return boards
+        packed = self._loaded.get(path)
+        if packed is None and os.path.exists(path):
+            with np.load(path) as data:
+                packed = data["packed"]
+        if packed is None or len(packed) < count:
+            packed = self._generate(size, start_squares(num_players, size), hole_count, count, seed, workers)
+            os.makedirs(self.folder, exist_ok=True)
+            tmp = path + ".tmp.npz"
+            np.savez_compressed(tmp, packed=packed)
+            os.replace(tmp, path)
+        self._loaded[path] = packed
+        boards = self._unpacked[(path, count)] = np.unpackbits(packed[:count], axis=1, count=size * size).astype(bool)
+        return boards
+
+    def _generate(self, size, reserved, hole_count, count, seed, workers):
+        workers = workers or os.cpu_count() or 1
+        chunk = max(1, min(500, -(-count // workers)))
+        tasks = [(size, reserved, hole_count, seed, start, min(chunk, count - start))
+                 for start in range(0, count, chunk)]
+        packed = np.zeros((count, (size * size + 7) // 8), dtype=np.uint8)
+        if workers > 1 and len(tasks) > 1:
+            with multiprocessing.Pool(workers) as pool:
+                for start, rows in pool.imap_unordered(_generate_chunk, tasks):
+                    packed[start:start + len(rows)] = rows
+        else:
+            for task in tasks:
+                start, rows = _generate_chunk(task)
+                packed[start:start + len(rows)] = rows
+        return packed
+
+
+_shared = {}
+
+
+def shared_cache(folder=DEFAULT_CACHE_DIR):
+    """One BoardCache per folder and process, so workers load each file once."""
+    cache = _shared.get(folder)
+    if cache is None:
+        cache = _shared[folder] = BoardCache(folder)
+    return cache
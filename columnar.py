@@ -0,0 +1,91 @@
+import os
+import json
+
+import numpy as np
+
+# -----------------------------
+# Append-only columnar files
+#
+# A "table" is a directory with one raw little-endian file per column plus
+# schema.json (column dtypes and the row count). Writers append whole
+# chunks, so memory stays at one chunk no matter how many rows are written;
+# readers memory-map the columns:
+#
+#   with ColumnWriter("runs/sim", [("winner", "i1"), ("turns", "i4")]) as out:
+#       out.append({"winner": winners, "turns": turns})
+#   cols = read_columns("runs/sim")     # {"winner": memmap, "turns": memmap}
+# -----------------------------
+
+SCHEMA_FILE = "schema.json"
+
+
+class ColumnWriter:
+    def __init__(self, path, columns, meta=None):
+        self.path = path
+        self.columns = [(name, np.dtype(dtype).newbyteorder("<")) for name, dtype in columns]
+        self.meta = dict(meta or {})
+        self.rows = 0
+        os.makedirs(path, exist_ok=True)
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name, _ in self.columns}
+        self._write_schema()
+
+    def append(self, chunk):
+        """chunk: {column: 1-D array-like}, all the same length."""
+        n = None
+        for name, dtype in self.columns:
+            data = np.asarray(chunk[name], dtype=dtype)
+            if n is None:
+                n = len(data)
+            elif len(data) != n:
+                raise ValueError(f"column {name} has {len(data)} rows, expected {n}")
+            self._files[name].write(data.tobytes())
+        self.rows += n or 0
+
+    def _write_schema(self):
+        schema = {
+            "rows": self.rows,
+            "columns": [[name, dtype.str] for name, dtype in self.columns],
+            "meta": self.meta,
+        }
+        tmp = os.path.join(self.path, SCHEMA_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(schema, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, SCHEMA_FILE))
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+        self._write_schema()
+
+    def close(self):
+        if self._files:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+            self._write_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        return json.load(f)
+
+
+def read_columns(path, names=None):
+    """{column: read-only memmap}; only rows recorded in schema.json are exposed."""
+    schema = read_schema(path)
+    rows = schema["rows"]
+    out = {}
+    for name, dtype in schema["columns"]:
+        if names is not None and name not in names:
+            continue
+        if rows == 0:
+            out[name] = np.zeros(0, dtype=dtype)
+        else:
+            out[name] = np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+    return out
@@ -0,0 +1,252 @@
+import math
+import random
+
+# -----------------------------
+# Adaptive question difficulty
+#
+# Players and questions are rated on one logit scale (Rasch / Elo style):
+# a player with skill s in a category answers a question of difficulty d
+# right with probability 1 / (1 + exp(d - s)). After every answer both move
+# toward the result, by less as they collect answers:
+#
+#   skill      += k_player   * (correct - p)
+#   difficulty -= k_question * (correct - p)
+#
+# Questions are drawn near the difficulty a player answers right
+# TARGET_ACCURACY of the time. Each category keeps its questions in
+# difficulty buckets (BUCKET_WIDTH logits); a draw picks a bucket offset
+# from an alias table (a Gaussian around the target) and an entry of that
+# bucket, so it is O(1) however many questions there are. A rating change
+# moves one question between buckets (swap-remove + append).
+#
+# Ratings live next to the questions in questions.db (question_ratings,
+# player_ratings); a question nobody has answered starts at its CSV
+# difficulty. A trigger drops a question's rating when the import deletes
+# the question, so an id SQLite hands out again starts fresh.
+#
+# Player skill is keyed by the name the front end passes. sraz3 and test7
+# only know seats ("Player 1".."Player 4"), so a rating follows whoever
+# sits in that seat, not a person.
+#
+#   engine = DifficultyEngine(store)
+#   q = engine.draw("Player 1", "Science", rng, avoid=sampler.is_recent)
+#   engine.record("Player 1", q, correct)
+#   engine.accuracy("Player 1", "Science")     # (right, answered)
+# -----------------------------
+
+TARGET_ACCURACY = 0.7
+RATING_LIMIT = 4.0          # ratings are clamped to +-RATING_LIMIT
+BUCKET_WIDTH = 0.25
+SPREAD = 0.5                # stddev (logits) of the draw around the target
+K_PLAYER = 0.4
+K_QUESTION = 0.3
+K_MIN = 0.05
+K_HALF = 20                 # answers after which k has halved
+DRAW_TRIES = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS question_ratings (
+    id INTEGER PRIMARY KEY,
+    rating REAL NOT NULL,
+    answers INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_ratings (
+    player TEXT NOT NULL,
+    category TEXT NOT NULL,
+    rating REAL NOT NULL,
+    answers INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (player, category)
+);
+CREATE TRIGGER IF NOT EXISTS question_ratings_prune AFTER DELETE ON questions
+BEGIN
+    DELETE FROM question_ratings WHERE id = OLD.id;
+END;
+"""
+
+
+def expected(skill, difficulty):
+    """Chance of a right answer."""
+    return 1.0 / (1.0 + math.exp(difficulty - skill))
+
+
+def _k(base, answers):
+    return max(K_MIN, base / (1.0 + answers / K_HALF))
+
+
+def _clamp(x):
+    return max(-RATING_LIMIT, min(RATING_LIMIT, x))
+
+
+class AliasTable:
+    """Vose's alias method: O(1) draws from fixed weights."""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+NUM_BUCKETS = int(round(2 * RATING_LIMIT / BUCKET_WIDTH)) + 1
+_REACH = int(math.ceil(3 * SPREAD / BUCKET_WIDTH))
+# bucket offsets -_REACH.._REACH weighted by a Gaussian of SPREAD logits
+_OFFSETS = AliasTable([math.exp(-0.5 * (o * BUCKET_WIDTH / SPREAD) ** 2) for o in range(-_REACH, _REACH + 1)])
+
+
+def bucket_of(rating):
+    return int(round((_clamp(rating) + RATING_LIMIT) / BUCKET_WIDTH))
+
+
+class DifficultyBuckets:
+    """Question ids of one category by difficulty bucket, with O(1) moves."""
+
+    def __init__(self, ratings):
+        self.buckets = [[] for _ in range(NUM_BUCKETS)]
+        self.where = {}         # id -> (bucket, index)
+        for qid, rating in ratings:
+            self.add(qid, rating)
+
+    def __len__(self):
+        return len(self.where)
+
+    def add(self, qid, rating):
+        b = bucket_of(rating)
+        self.where[qid] = (b, len(self.buckets[b]))
+        self.buckets[b].append(qid)
+
+    def move(self, qid, rating):
+        b, i = self.where[qid]
+        if b == bucket_of(rating):
+            return
+        bucket = self.buckets[b]
+        last = bucket.pop()
+        if last != qid:
+            bucket[i] = last
+            self.where[last] = (b, i)
+        self.add(qid, rating)
+
+    def pick(self, b, rng):
+        if 0 <= b < NUM_BUCKETS and self.buckets[b]:
+            bucket = self.buckets[b]
+            return bucket[rng.randrange(len(bucket))]
+        return None
+
+    def nearest(self, b, rng, avoid):
+        """Entry of the closest bucket that avoid() accepts; else the first one it rejected."""
+        fallback = None
+        for step in range(2 * NUM_BUCKETS):
+            near = b + (step + 1) // 2 * (1 if step % 2 else -1)
+            for _ in range(DRAW_TRIES):
+                qid = self.pick(near, rng)
+                if qid is None:
+                    break
+                if not avoid(qid):
+                    return qid
+                fallback = fallback if fallback is not None else qid
+        return fallback
+
+
+class DifficultyEngine:
+    def __init__(self, store, language=None):
+        self.store = store
+        self.db = store.db
+        self.language = language
+        self.db.executescript(SCHEMA)
+        with self.db:
+            # ratings of questions deleted before the trigger existed
+            self.db.execute("DELETE FROM question_ratings WHERE id NOT IN (SELECT id FROM questions)")
+        self._buckets = {}          # category -> DifficultyBuckets
+        self._questions = {}        # id -> [rating, answers]
+        self._players = {}          # (player, category) -> [rating, answers, correct]
+
+    def _category(self, category):
+        buckets = self._buckets.get(category)
+        if buckets is None:
+            language = self.store.resolve_language(self.language)
+            rows = self.db.execute(
+                "SELECT q.id, COALESCE(r.rating, q.difficulty), COALESCE(r.answers, 0) FROM questions q"
+                " LEFT JOIN question_ratings r ON r.id = q.id WHERE q.language = ? AND q.category = ?",
+                (language, category)).fetchall()
+            for qid, rating, answers in rows:
+                self._questions[qid] = [rating, answers]
+            buckets = self._buckets[category] = DifficultyBuckets((qid, rating) for qid, rating, _ in rows)
+        return buckets
+
+    def _player(self, player, category):
+        key = (player, category)
+        entry = self._players.get(key)
+        if entry is None:
+            row = self.db.execute("SELECT rating, answers, correct FROM player_ratings WHERE player = ? AND category = ?",
+                                  key).fetchone()
+            entry = self._players[key] = list(row) if row else [0.0, 0, 0]
+        return entry
+
+    def skill(self, player, category):
+        return self._player(player, category)[0]
+
+    def accuracy(self, player, category):
+        """(right answers, answers) of player in category."""
+        _, answers, correct = self._player(player, category)
+        return correct, answers
+
+    def difficulty(self, qid):
+        entry = self._questions.get(qid)
+        if entry is None:
+            q = self.store.get(qid)
+            if q is None:
+                return 0.0
+            self._category(q["category"])
+            entry = self._questions[qid]
+        return entry[0]
+
+    def target(self, player, category):
+        """Difficulty player answers right TARGET_ACCURACY of the time."""
+        return self.skill(player, category) - math.log(TARGET_ACCURACY / (1.0 - TARGET_ACCURACY))
+
+    def draw(self, player, category, rng=random, avoid=None):
+        """Question dict near player's target difficulty; None if category has no questions."""
+        buckets = self._category(category)
+        if not len(buckets):
+            return None
+        avoid = avoid or (lambda qid: False)
+        center = bucket_of(self.target(player, category))
+        for _ in range(DRAW_TRIES):
+            qid = buckets.pick(center + _OFFSETS.draw(rng) - _REACH, rng)
+            if qid is not None and not avoid(qid):
+                return self.store.get(qid)
+        return self.store.get(buckets.nearest(center, rng, avoid))
+
+    def record(self, player, question, correct):
+        """Update player's skill and the question's difficulty after an answer."""
+        qid, category = question["id"], question["category"]
+        buckets = self._category(category)
+        q = self._questions[qid]
+        p = self._player(player, category)
+        surprise = (1.0 if correct else 0.0) - expected(p[0], q[0])
+        p[0] = _clamp(p[0] + _k(K_PLAYER, p[1]) * surprise)
+        q[0] = _clamp(q[0] - _k(K_QUESTION, q[1]) * surprise)
+        p[1] += 1
+        p[2] += 1 if correct else 0
+        q[1] += 1
+        buckets.move(qid, q[0])
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO question_ratings (id, rating, answers) VALUES (?, ?, ?)",
+                            (qid, q[0], q[1]))
+            self.db.execute("INSERT OR REPLACE INTO player_ratings (player, category, rating, answers, correct)"
+                            " VALUES (?, ?, ?, ?, ?)", (player, category, p[0], p[1], p[2]))
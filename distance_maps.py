@@ -0,0 +1,173 @@
+from collections import deque
+
+# -----------------------------
+# Shared BFS distance fields
+#
+# Step counts over the hole mask from any square (pawns are ignored: they
+# move every turn, holes do not). Fields are kept per source square, so a
+# pawn stepping back and forth, or a search doing apply/undo, finds its
+# field already built; a flag or pawn field is just the field of the
+# square it stands on. Capturing a pawn only drops it from the lookups.
+#
+#   dist = DistanceMaps.of(game)          # one per state, shared by every user
+#   dist.flag_field(player)[sq]           # steps from that player's flag
+#   dist.nearest_enemy_flag(player, sq)   # steps to the closest enemy flag
+#   dist.threats(player, within=3)        # enemy pawns that close to the flag
+#
+# Opening a hole (GameState.set_hole) lowers the cached fields without a
+# new BFS; filling one drops the fields it could lengthen (rebuilt on use).
+# -----------------------------
+
+FAR = 1 << 30          # unreachable (or a hole)
+MAX_FIELDS = 512       # cached source squares before the oldest are dropped
+
+
+class DistanceMaps:
+    def __init__(self, state, base=None, max_fields=MAX_FIELDS, watch=True):
+        self.state = state
+        self.size = state.board.size
+        self.hole = state.board.hole[:]
+        self.max_fields = max_fields
+        # fields only depend on the holes, so a copy of the same game can reuse them
+        if base is not None and base.hole == self.hole:
+            self.fields = base.fields
+        else:
+            self.fields = {}
+        if watch:
+            state.watchers.append(self.update)
+
+    @classmethod
+    def of(cls, state):
+        """The DistanceMaps watching state, created on first use."""
+        for watcher in state.watchers:
+            owner = getattr(watcher, "__self__", None)
+            if isinstance(owner, cls):
+                return owner
+        return cls(state)
+
+    def detach(self):
+        if self.update in self.state.watchers:
+            self.state.watchers.remove(self.update)
+
+    # --- fields ---
+
+    def _bfs(self, source):
+        size = self.size
+        n = size * size
+        hole = self.hole
+        dist = [FAR] * n
+        dist[source] = 0
+        queue = deque((source,))
+        pop, push = queue.popleft, queue.append
+        while queue:
+            i = pop()
+            d = dist[i] + 1
+            c = i % size
+            if c + 1 < size and dist[i + 1] > d and not hole[i + 1]:
+                dist[i + 1] = d
+                push(i + 1)
+            if c > 0 and dist[i - 1] > d and not hole[i - 1]:
+                dist[i - 1] = d
+                push(i - 1)
+            if i + size < n and dist[i + size] > d and not hole[i + size]:
+                dist[i + size] = d
+                push(i + size)
+            if i >= size and dist[i - size] > d and not hole[i - size]:
+                dist[i - size] = d
+                push(i - size)
+        return dist
+
+    def field(self, square):
+        """Steps from square to every square (flat list, FAR where unreachable)."""
+        dist = self.fields.get(square)
+        if dist is None:
+            fields = self.fields
+            if len(fields) >= self.max_fields:
+                # dicts keep insertion order: drop the older half
+                for key in list(fields)[:len(fields) // 2]:
+                    del fields[key]
+            dist = fields[square] = self._bfs(square)
+        return dist
+
+    def pawn_field(self, pawn_id):
+        pawn = self.state.pawns[pawn_id]
+        if not pawn.alive:
+            return None
+        return self.field(pawn.row * self.size + pawn.col)
+
+    def flag_field(self, player):
+        for pawn in self.state.pawns:
+            if pawn.is_flag and pawn.player == player:
+                return self.pawn_field(pawn.id)
+        return None
+
+    def steps(self, src, dst):
+        """Steps between two flat squares."""
+        return self.field(src)[dst]
+
+    # --- queries shared by the AI and the front ends ---
+
+    def enemy_flags(self, player):
+        size = self.size
+        return [p.row * size + p.col for p in self.state.pawns
+                if p.alive and p.is_flag and p.player != player]
+
+    def nearest_enemy_flag(self, player, square):
+        return min((self.field(f)[square] for f in self.enemy_flags(player)), default=FAR)
+
+    def threats(self, player, within):
+        """(steps, pawn id) of enemy pawns at most `within` steps from player's flag, closest first."""
+        own = self.flag_field(player)
+        if own is None:
+            return []
+        size = self.size
+        found = []
+        for pawn in self.state.pawns:
+            if pawn.alive and pawn.player != player:
+                d = own[pawn.row * size + pawn.col]
+                if d <= within:
+                    found.append((d, pawn.id))
+        found.sort()
+        return found
+
+    # --- updates ---
+
+    def update(self, squares):
+        """GameState watcher: only hole changes touch the fields."""
+        hole = self.state.board.hole
+        for sq in squares:
+            if hole[sq] != self.hole[sq]:
+                if hole[sq]:
+                    self._fill(sq)
+                else:
+                    self._open(sq)
+
+    def _fill(self, sq):
+        # a new wall can only lengthen paths through it
+        self.fields = {src: dist for src, dist in self.fields.items() if dist[sq] >= FAR}
+        self.hole[sq] = True
+
+    def _open(self, sq):
+        # distances only shrink: relax outwards from the new tile (on copies,
+        # the fields may be shared with the state this one was copied from)
+        self.hole[sq] = False
+        self.fields = {src: dist[:] for src, dist in self.fields.items()}
+        size = self.size
+        n = size * size
+        hole = self.hole
+        neighbours = [j for j in (sq + 1 if sq % size + 1 < size else -1, sq - 1 if sq % size else -1,
+                                  sq + size, sq - size) if 0 <= j < n]
+        for dist in self.fields.values():
+            best = min((dist[j] for j in neighbours if not hole[j]), default=FAR)
+            if best >= FAR or best + 1 >= dist[sq]:
+                continue
+            dist[sq] = best + 1
+            queue = deque((sq,))
+            while queue:
+                i = queue.popleft()
+                d = dist[i] + 1
+                c = i % size
+                for j in (i + 1 if c + 1 < size else -1, i - 1 if c else -1, i + size, i - size):
+                    if 0 <= j < n and not hole[j] and dist[j] > d:
+                        dist[j] = d
+                        queue.append(j)
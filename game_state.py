@@ -0,0 +1,445 @@
+import random
+from collections import namedtuple
+
+from zobrist import keys_for, compute_hash
+from board_gen import generate_holes
+
+# -----------------------------
+# Headless game rules
+#
+# Pure-Python model of the trivia strategy game with no pygame imports, so
+# it can drive AI search, simulations and servers as well as the windowed
+# front ends (sraz3.py / test7.py only draw it and ask the questions).
+#
+#   game = GameState.new(num_players=2, board_size=8)
+#   for action in game.legal_actions(): ...
+#   game.apply(action, answers_correct=True)
+#   game.undo()
+#
+# game.hash is the Zobrist key of the position, kept current by apply/undo.
+# Callables in game.watchers get the squares each apply/undo/set_hole
+# touched (see MoveCache).
+# -----------------------------
+
+HOLE_COUNT = 6
+CATEGORIES = ["Sport", "History", "Music", "Science", "Art", "Random"]
+
+# flag first, then the five guards, relative to the player's corner
+BASE_OFFSETS = [(0, 0), (1, 0), (0, 1), (1, 1), (2, 0), (0, 2)]
+DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+EMPTY = -1
+
+# action kinds
+MOVE = 0     # step onto an empty tile: one question
+ATTACK = 1   # step onto an enemy pawn: two questions
+PASS = 2     # only offered when the player has no legal step
+
+QUESTIONS_NEEDED = (1, 2, 0)
+SCORE_GAIN = (1, 5, 0)
+
+Action = namedtuple("Action", "pawn row col kind")
+PASS_ACTION = Action(EMPTY, EMPTY, EMPTY, PASS)
+
+
+def start_layout(num_players, board_size):
+    """(player, row, col, is_flag) of every starting pawn, flag first per player."""
+    corners = [(0, 0), (board_size - 1, board_size - 1), (0, board_size - 1), (board_size - 1, 0)]
+    signs = [(1, 1), (-1, -1), (1, -1), (-1, 1)]
+    layout = []
+    for i in range(num_players):
+        corner_r, corner_c = corners[i]
+        sr, sc = signs[i]
+        for j, (dr, dc) in enumerate(BASE_OFFSETS):
+            r, c = corner_r + sr * dr, corner_c + sc * dc
+            if 0 <= r < board_size and 0 <= c < board_size:
+                layout.append((i, r, c, j == 0))
+    return layout
+
+
+def start_squares(num_players, board_size):
+    """Flat indices of the starting squares (never holes)."""
+    return sorted({r * board_size + c for _, r, c, _ in start_layout(num_players, board_size)})
+
+
+class PlayerState:
+    __slots__ = ("index", "name", "color_id", "score", "alive")
+
+    def __init__(self, index, name, color_id, score=0, alive=True):
+        self.index = index
+        self.name = name
+        self.color_id = color_id
+        self.score = score
+        self.alive = alive
+
+    def copy(self):
+        return PlayerState(self.index, self.name, self.color_id, self.score, self.alive)
+
+
+class PawnState:
+    __slots__ = ("id", "player", "row", "col", "is_flag", "alive")
+
+    def __init__(self, id, player, row, col, is_flag=False, alive=True):
+        self.id = id
+        self.player = player
+        self.row = row
+        self.col = col
+        self.is_flag = is_flag
+        self.alive = alive
+
+    def copy(self):
+        return PawnState(self.id, self.player, self.row, self.col, self.is_flag, self.alive)
+
+
+class Board:
+    """Square board stored as flat row-major lists (index = row * size + col)."""
+    __slots__ = ("size", "category", "hole", "occupant")
+
+    def __init__(self, size, category=None, hole=None, occupant=None):
+        n = size * size
+        self.size = size
+        self.category = category if category is not None else [""] * n
+        self.hole = hole if hole is not None else [False] * n
+        self.occupant = occupant if occupant is not None else [EMPTY] * n
+
+    def index(self, row, col):
+        return row * self.size + col
+
+    def in_bounds(self, row, col):
+        return 0 <= row < self.size and 0 <= col < self.size
+
+    def category_at(self, row, col):
+        return self.category[row * self.size + col]
+
+    def is_hole(self, row, col):
+        return self.hole[row * self.size + col]
+
+    def pawn_at(self, row, col):
+        return self.occupant[row * self.size + col]
+
+    def copy(self):
+        # categories never change during a game, so they are shared
+        return Board(self.size, self.category, self.hole[:], self.occupant[:])
+
+
+class GameState:
+    __slots__ = ("board", "players", "pawns", "current", "winner", "history", "hash", "watchers")
+
+    def __init__(self, board, players, pawns, current=0, winner=None, hash=None):
+        self.board = board
+        self.players = players
+        self.pawns = pawns
+        self.current = current
+        self.winner = winner
+        self.history = []
+        self.hash = hash if hash is not None else compute_hash(self)
+        self.watchers = []
+
+    # --- setup ---
+
+    @classmethod
+    def new(cls, num_players, board_size, categories=CATEGORIES, hole_count=HOLE_COUNT, rng=random,
+            hole_density=None, hole_mask=None):
+        """
+        Same layout as setup_players_and_pawns + place_random_holes in the
+        front ends, except that holes never cut the board apart (board_gen).
+        hole_density overrides hole_count; hole_mask (e.g. from BoardCache)
+        skips generation.
+        """
+        board = Board(board_size)
+        for r in range(board_size):
+            for c in range(board_size):
+                board.category[r * board_size + c] = categories[(r + c) % len(categories)]
+
+        players = [PlayerState(i, f"Player {i+1}", i) for i in range(num_players)]
+        pawns = []
+        for player, r, c, is_flag in start_layout(num_players, board_size):
+            pawn = PawnState(len(pawns), player, r, c, is_flag=is_flag)
+            pawns.append(pawn)
+            board.occupant[r * board_size + c] = pawn.id
+
+        if hole_mask is None:
+            reserved = [i for i, occ in enumerate(board.occupant) if occ != EMPTY]
+            if hole_density is not None:
+                hole_count = None
+            hole_mask = generate_holes(board_size, reserved, hole_count, hole_density, rng)
+        board.hole = [bool(h) for h in hole_mask]
+
+        return cls(board, players, pawns)
+
+    def copy(self):
+        """Independent state without undo history (for search / rollouts)."""
+        return GameState(self.board.copy(), [p.copy() for p in self.players],
+                         [p.copy() for p in self.pawns], self.current, self.winner, self.hash)
+
+    def assign(self, other):
+        """
+        Become a copy of other in place, so views and watchers holding this
+        state keep working (replay seeking). The undo history is dropped.
+        """
+        board = self.board
+        board.category = other.board.category
+        board.hole[:] = other.board.hole
+        board.occupant[:] = other.board.occupant
+        self.players[:] = [p.copy() for p in other.players]
+        self.pawns[:] = [p.copy() for p in other.pawns]
+        self.current = other.current
+        self.winner = other.winner
+        self.hash = other.hash
+        self.history = []
+        if self.watchers:
+            self._notify(range(board.size * board.size))
+
+    # --- queries ---
+
+    @property
+    def current_player(self):
+        return self.players[self.current]
+
+    @property
+    def is_over(self):
+        return self.winner is not None
+
+    def alive_players(self):
+        return [p for p in self.players if p.alive]
+
+    def pawns_of(self, player_index):
+        return [p for p in self.pawns if p.alive and p.player == player_index]
+
+    def valid_moves(self, pawn_id):
+        """(row, col) targets for one pawn, in the order get_valid_moves used."""
+        board = self.board
+        size = board.size
+        pawn = self.pawns[pawn_id]
+        moves = []
+        for dr, dc in DIRECTIONS:
+            nr, nc = pawn.row + dr, pawn.col + dc
+            if 0 <= nr < size and 0 <= nc < size:
+                i = nr * size + nc
+                if board.hole[i]:
+                    continue
+                occ = board.occupant[i]
+                if occ != EMPTY and self.pawns[occ].player == pawn.player:
+                    continue
+                moves.append((nr, nc))
+        return moves
+
+    def action_for(self, pawn_id, row, col):
+        """The Action for stepping pawn_id onto (row, col), or None if illegal."""
+        pawn = self.pawns[pawn_id]
+        if self.winner is not None or not pawn.alive or pawn.player != self.current:
+            return None
+        if (row, col) not in self.valid_moves(pawn_id):
+            return None
+        occ = self.board.occupant[row * self.board.size + col]
+        return Action(pawn_id, row, col, MOVE if occ == EMPTY else ATTACK)
+
+    def legal_actions(self):
+        if self.winner is not None:
+            return []
+        board = self.board
+        actions = []
+        for pawn in self.pawns:
+            if not pawn.alive or pawn.player != self.current:
+                continue
+            for r, c in self.valid_moves(pawn.id):
+                kind = MOVE if board.occupant[r * board.size + c] == EMPTY else ATTACK
+                actions.append(Action(pawn.id, r, c, kind))
+        return actions or [PASS_ACTION]
+
+    # --- transitions ---
+
+    def _next_player(self):
+        n = len(self.players)
+        i = self.current
+        for _ in range(n):
+            i = (i + 1) % n
+            if self.players[i].alive:
+                return i
+        return self.current
+
+    def apply(self, action, answers_correct=True):
+        """
+        Play one turn. answers_correct says whether every question the action
+        needed was answered; a wrong answer forfeits the turn. Returns the list
+        of player indices eliminated by this turn (flag captured).
+        """
+        board = self.board
+        size = board.size
+        keys = keys_for(size)
+        record = [action, answers_correct, self.current, self.winner, EMPTY, EMPTY, [], self.hash]
+        self.history.append(record)
+
+        if action.kind == PASS or not answers_correct:
+            self._pass_turn(keys)
+            return []
+
+        pawn = self.pawns[action.pawn]
+        src = pawn.row * size + pawn.col
+        dst = action.row * size + action.col
+        record[4] = src
+
+        pieces = keys.pieces
+        h = self.hash
+        eliminated = []
+        captured = board.occupant[dst]
+        if captured != EMPTY:
+            victim = self.pawns[captured]
+            victim.alive = False
+            h ^= pieces[victim.player][victim.is_flag][dst]
+            record[5] = captured
+            if victim.is_flag:
+                eliminated.append(victim.player)
+                for other in self.pawns:
+                    if other.alive and other.player == victim.player:
+                        other.alive = False
+                        sq = other.row * size + other.col
+                        board.occupant[sq] = EMPTY
+                        h ^= pieces[other.player][other.is_flag][sq]
+                        record[6].append(other.id)
+                self.players[victim.player].alive = False
+
+        board.occupant[src] = EMPTY
+        board.occupant[dst] = pawn.id
+        pawn.row, pawn.col = action.row, action.col
+        piece = pieces[pawn.player][pawn.is_flag]
+        self.hash = h ^ piece[src] ^ piece[dst]
+        self.players[pawn.player].score += SCORE_GAIN[action.kind]
+
+        alive = [p.index for p in self.players if p.alive]
+        if len(alive) == 1:
+            self.winner = alive[0]
+        self._pass_turn(keys)
+        if self.watchers:
+            self._notify([src, dst] + [self.pawns[pid].row * size + self.pawns[pid].col for pid in record[6]])
+        return eliminated
+
+    def _notify(self, squares):
+        for watcher in self.watchers:
+            watcher(squares)
+
+    def set_hole(self, row, col, is_hole=True):
+        """Open (or fill) a hole on an empty tile mid-game."""
+        board = self.board
+        i = row * board.size + col
+        if board.occupant[i] != EMPTY:
+            raise ValueError(f"tile {(row, col)} is occupied")
+        if board.hole[i] != is_hole:
+            board.hole[i] = is_hole
+            self.hash ^= keys_for(board.size).holes[i]
+            if self.watchers:
+                self._notify([i])
+
+    def _pass_turn(self, keys):
+        nxt = self._next_player()
+        self.hash ^= keys.side[self.current] ^ keys.side[nxt]
+        self.current = nxt
+
+    def undo(self):
+        action, answers_correct, current, winner, src, captured, swept, h = self.history.pop()
+        self.current = current
+        self.winner = winner
+        self.hash = h
+        if action.kind == PASS or not answers_correct:
+            return action
+
+        board = self.board
+        size = board.size
+        pawn = self.pawns[action.pawn]
+        self.players[pawn.player].score -= SCORE_GAIN[action.kind]
+        board.occupant[action.row * size + action.col] = EMPTY
+        board.occupant[src] = pawn.id
+        pawn.row, pawn.col = divmod(src, size)
+
+        for pid in swept:
+            other = self.pawns[pid]
+            other.alive = True
+            board.occupant[other.row * size + other.col] = pid
+        if captured != EMPTY:
+            victim = self.pawns[captured]
+            victim.alive = True
+            board.occupant[victim.row * size + victim.col] = captured
+            self.players[victim.player].alive = True
+        if self.watchers:
+            self._notify([src, action.row * size + action.col]
+                         + [self.pawns[pid].row * size + self.pawns[pid].col for pid in swept])
+        return action
+
+
+class MoveCache:
+    """
+    Legal steps per pawn, kept as both a set of (row, col) targets and the
+    ready-made Actions:
+
+      cache = MoveCache(game)             # registers itself in game.watchers
+      cache.is_target(pawn_id, r, c)      # O(1) highlight test
+      cache.legal_actions()               # same result/order as game.legal_actions()
+
+    A change only marks the pawns on or next to the touched squares dirty
+    (a step's MOVE/ATTACK kind depends on the neighbour too); they are
+    recomputed the next time they are asked for.
+    """
+
+    def __init__(self, state):
+        self.state = state
+        self.actions = {}
+        self.sets = {}
+        self.dirty = {p.id for p in state.pawns}
+        self.by_player = {}
+        for pawn in state.pawns:
+            self.by_player.setdefault(pawn.player, []).append(pawn.id)
+        state.watchers.append(self.invalidate)
+
+    def detach(self):
+        if self.invalidate in self.state.watchers:
+            self.state.watchers.remove(self.invalidate)
+
+    def invalidate(self, squares):
+        board = self.state.board
+        size = board.size
+        occupant = board.occupant
+        dirty = self.dirty
+        for sq in squares:
+            r, c = divmod(sq, size)
+            occ = occupant[sq]
+            if occ != EMPTY:
+                dirty.add(occ)
+            for dr, dc in DIRECTIONS:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < size and 0 <= nc < size:
+                    occ = occupant[nr * size + nc]
+                    if occ != EMPTY:
+                        dirty.add(occ)
+
+    def _refresh(self, pawn_id):
+        occupant = self.state.board.occupant
+        size = self.state.board.size
+        moves = self.state.valid_moves(pawn_id)
+        self.actions[pawn_id] = [Action(pawn_id, r, c, MOVE if occupant[r * size + c] == EMPTY else ATTACK)
+                                 for r, c in moves]
+        self.sets[pawn_id] = set(moves)
+        self.dirty.discard(pawn_id)
+
+    def moves(self, pawn_id):
+        """(row, col) targets of a pawn, as a set."""
+        if pawn_id in self.dirty:
+            self._refresh(pawn_id)
+        return self.sets[pawn_id]
+
+    def is_target(self, pawn_id, row, col):
+        return (row, col) in self.moves(pawn_id)
+
+    def legal_actions(self):
+        state = self.state
+        if state.winner is not None:
+            return []
+        pawns = state.pawns
+        dirty = self.dirty
+        actions = []
+        for pid in self.by_player.get(state.current, ()):
+            if not pawns[pid].alive:
+                continue
+            if pid in dirty:
+                self._refresh(pid)
+            actions += self.actions[pid]
+        return actions or [PASS_ACTION]
@@ -0,0 +1,189 @@
+import csv
+
+import numpy as np
+import pygame
+import moderngl
+
+# -----------------------------
+# Glyph atlas text for GL scenes
+#
+# Glyphs are rasterized by pygame.font once per (font, char) into a single
+# R8 atlas texture. Whole strings are laid out once into an array of
+# instance rows (same layout as the GLUI quad buffer) and cached, so a
+# static label only costs a copy + offset when it is drawn again.
+#
+# A full atlas is not cleared while a frame is being batched (quads queued
+# earlier still point at its UVs): the glyphs that did not fit are left
+# out of that frame and the atlas starts over at the next begin_frame().
+# -----------------------------
+
+# Croatian letters used by lua/localization.csv and lua/questions.csv
+CROATIAN_CHARS = "čćžšđČĆŽŠĐ"
+BASE_CHARSET = "".join(chr(c) for c in range(32, 127)) + CROATIAN_CHARS
+
+MODE_GLYPH = 2.0
+RUN_CACHE_LIMIT = 4096
+
+
+def localization_charset(filename="lua/localization.csv"):
+    """Every character used by the translation strings (for atlas pre-warming)."""
+    chars = set(BASE_CHARSET)
+    try:
+        with open(filename, mode="r", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                for text in row[1:]:
+                    chars.update(text)
+    except FileNotFoundError:
+        print(f"Warning: File '{filename}' not found.")
+    return "".join(sorted(chars))
+
+
+class ShelfPacker:
+    """Simple row (shelf) allocator for square atlases."""
+
+    def __init__(self, size, pad=1):
+        self.size = size
+        self.pad = pad
+        self.reset()
+
+    def reset(self):
+        self.x = 0
+        self.y = 0
+        self.shelf_h = 0
+
+    def empty(self):
+        return self.x == 0 and self.y == 0
+
+    def alloc(self, w, h):
+        if self.x + w + self.pad > self.size:
+            self.x = 0
+            self.y += self.shelf_h + self.pad
+            self.shelf_h = 0
+        if self.y + h + self.pad > self.size:
+            return None
+        x, y = self.x, self.y
+        self.x += w + self.pad
+        self.shelf_h = max(self.shelf_h, h)
+        return x, y
+
+
+class GlyphAtlas:
+    """R8 coverage atlas; glyphs are added on demand per (font, char)."""
+
+    def __init__(self, ctx, size=1024):
+        self.size = size
+        self.texture = ctx.texture((size, size), components=1, dtype="f1")
+        self.texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
+        self.texture.repeat_x = False
+        self.texture.repeat_y = False
+        self.packer = ShelfPacker(size)
+        self.glyphs = {}
+        self.generation = 0
+        self.full = False
+
+    def begin_frame(self):
+        """Start over if a glyph did not fit during the last frame."""
+        if self.full:
+            self.clear()
+
+    def clear(self):
+        self.packer.reset()
+        self.glyphs = {}
+        self.full = False
+        # bumping the generation tells TextRenderer its cached runs are stale
+        self.generation += 1
+
+    def glyph(self, font, ch):
+        """Returns (advance, w, h, u0, v0, u1, v1) for ch in font; None while the atlas is full."""
+        key = (font, ch)
+        g = self.glyphs.get(key)
+        if g is not None:
+            return g
+
+        advance = font.size(ch)[0]
+        surf = font.render(ch, True, (255, 255, 255))
+        w, h = surf.get_size()
+        if w == 0 or h == 0:
+            g = (advance, 0, 0, 0.0, 0.0, 0.0, 0.0)
+            self.glyphs[key] = g
+            return g
+
+        empty = self.packer.empty()
+        spot = self.packer.alloc(w, h)
+        if spot is None:
+            if empty:
+                raise ValueError(f"glyph {ch!r} ({w}x{h}) does not fit a {self.size}px atlas")
+            self.full = True    # cleared at the next begin_frame()
+            return None
+        x, y = spot
+
+        alpha = pygame.image.tostring(surf, "RGBA", False)[3::4]
+        self.texture.write(alpha, viewport=(x, y, w, h))
+        s = float(self.size)
+        g = (advance, w, h, x / s, y / s, (x + w) / s, (y + h) / s)
+        self.glyphs[key] = g
+        return g
+
+    def preload(self, font, chars=BASE_CHARSET):
+        for ch in chars:
+            if self.glyph(font, ch) is None:
+                return
+
+    def release(self):
+        self.texture.release()
+
+
+class TextRenderer:
+    """Lays out strings into cached instance runs for the GLUI quad batch."""
+
+    def __init__(self, ctx, atlas_size=1024):
+        self.atlas = GlyphAtlas(ctx, atlas_size)
+        self.runs = {}
+        self.generation = self.atlas.generation
+
+    def begin_frame(self):
+        self.atlas.begin_frame()
+
+    def run(self, font, text, color):
+        """Returns (rows, (w, h)) with rows positioned at origin (0, 0)."""
+        if self.generation != self.atlas.generation:
+            self.runs.clear()
+            self.generation = self.atlas.generation
+
+        key = (font, text, color)
+        cached = self.runs.get(key)
+        if cached is not None:
+            return cached
+
+        if len(self.runs) >= RUN_CACHE_LIMIT:
+            self.runs.clear()
+
+        if len(color) == 3:
+            r, g, b, a = color[0] / 255.0, color[1] / 255.0, color[2] / 255.0, 1.0
+        else:
+            r, g, b, a = (c / 255.0 for c in color)
+
+        rows = []
+        x = 0
+        height = font.get_height()
+        complete = True
+        for ch in text:
+            glyph = self.atlas.glyph(font, ch)
+            if glyph is None:
+                # atlas full: left out this frame, laid out again after the next begin_frame()
+                complete = False
+                x += font.size(ch)[0]
+                continue
+            advance, w, h, u0, v0, u1, v1 = glyph
+            if w:
+                rows.append((x, 0, w, h, r, g, b, a, 0.0, 0.0, MODE_GLYPH, 0.0, u0, v0, u1, v1))
+            x += advance
+
+        arr = np.array(rows, dtype="f4").reshape(-1, 16)
+        result = (arr, (x, height))
+        if complete:
+            self.runs[key] = result
+        return result
+
+    def release(self):
+        self.atlas.release()
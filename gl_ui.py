@@ -0,0 +1,318 @@
+import numpy as np
+import pygame
+import moderngl
+
+from gl_text import ShelfPacker, TextRenderer
+
+# -----------------------------
+# UI painters
+#
+# Both painters expose the same small drawing API (rect / border / sprite /
+# text / fill) so the game screens don't care whether UI ends up in a
+# software overlay surface or in a batched GL vertex buffer.
+# Text on the GL path comes from the glyph atlas in gl_text.py.
+# -----------------------------
+
+UI_VERT = r"""
+#version 330
+uniform vec2 u_screen;
+
+in vec2 in_corner;     // unit quad corner 0..1
+in vec4 in_rect;       // x, y, w, h in pixels (top-left origin)
+in vec4 in_color;      // rgba 0..1
+in vec4 in_params;     // radius, border width (0 = filled), mode, unused
+in vec4 in_uv;         // u0, v0, u1, v1 into the sprite atlas
+
+out vec2 v_local;
+out vec2 v_half;
+out vec4 v_color;
+out vec4 v_params;
+out vec2 v_uv;
+
+void main() {
+    vec2 px = in_rect.xy + in_corner * in_rect.zw;
+    v_half = in_rect.zw * 0.5;
+    v_local = (in_corner - 0.5) * in_rect.zw;
+    v_color = in_color;
+    v_params = in_params;
+    v_uv = mix(in_uv.xy, in_uv.zw, in_corner);
+
+    vec2 ndc = vec2(px.x / u_screen.x * 2.0 - 1.0, 1.0 - px.y / u_screen.y * 2.0);
+    gl_Position = vec4(ndc, 0.0, 1.0);
+}
+"""
+
+UI_FRAG = r"""
+#version 330
+uniform sampler2D u_sprites;
+uniform sampler2D u_glyphs;
+
+in vec2 v_local;
+in vec2 v_half;
+in vec4 v_color;
+in vec4 v_params;
+in vec2 v_uv;
+out vec4 fragColor;
+
+float sd_round_box(vec2 p, vec2 b, float r) {
+    vec2 q = abs(p) - b + r;
+    return length(max(q, 0.0)) + min(max(q.x, q.y), 0.0) - r;
+}
+
+void main() {
+    float r = min(v_params.x, min(v_half.x, v_half.y));
+    float d = sd_round_box(v_local, v_half, r);
+    float cover = clamp(0.5 - d, 0.0, 1.0);
+    if (v_params.y > 0.0) {
+        // border ring: keep only the band [-width, 0] of the distance field
+        cover *= clamp(d + v_params.y + 0.5, 0.0, 1.0);
+    }
+
+    vec4 col = v_color;
+    if (v_params.z > 1.5) {
+        col.a *= texture(u_glyphs, v_uv).r;
+    } else if (v_params.z > 0.5) {
+        col *= texture(u_sprites, v_uv);
+    }
+    fragColor = vec4(col.rgb, col.a * cover);
+}
+"""
+
+MODE_SHAPE = 0.0
+MODE_SPRITE = 1.0
+# MODE_GLYPH = 2.0 lives in gl_text
+
+FLOATS_PER_QUAD = 16
+
+
+def _rgba(color):
+    if len(color) == 3:
+        return color[0] / 255.0, color[1] / 255.0, color[2] / 255.0, 1.0
+    return color[0] / 255.0, color[1] / 255.0, color[2] / 255.0, color[3] / 255.0
+
+
+class SoftwareUI:
+    """Fallback painter: draws straight into a pygame SRCALPHA surface."""
+
+    def __init__(self, surface):
+        self.surface = surface
+
+    @property
+    def size(self):
+        return self.surface.get_size()
+
+    def resize(self, surface):
+        self.surface = surface
+
+    def begin(self):
+        self.surface.fill((0, 0, 0, 0))
+
+    def fill(self, color):
+        # translucent full-screen wash (keeps the old draw_dim_panel look)
+        w, h = self.surface.get_size()
+        dim = pygame.Surface((w, h), pygame.SRCALPHA)
+        dim.fill(color)
+        self.surface.blit(dim, (0, 0))
+
+    def rect(self, rect, color, radius=0):
+        pygame.draw.rect(self.surface, color, rect, border_radius=radius)
+
+    def border(self, rect, color, width=1, radius=0):
+        pygame.draw.rect(self.surface, color, rect, width, border_radius=radius)
+
+    def sprite(self, image, rect):
+        r = pygame.Rect(rect)
+        if image.get_size() != r.size:
+            image = pygame.transform.scale(image, r.size)
+        self.surface.blit(image, r)
+
+    def text(self, font, text, color, **anchor):
+        surf = font.render(text, True, color)
+        rect = surf.get_rect(**anchor)
+        self.surface.blit(surf, rect)
+        return rect
+
+    def flush(self):
+        pass
+
+
+class SpriteAtlas:
+    """
+    Shelf-packed RGBA atlas holding every sprite the GL painter has seen.
+    Like the glyph atlas it is only cleared at frame start: a sprite that
+    does not fit is skipped for the frame in which the atlas filled up.
+    """
+
+    def __init__(self, ctx, size=1024):
+        self.ctx = ctx
+        self.size = size
+        self.texture = ctx.texture((size, size), components=4, dtype="f1")
+        self.texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
+        self.texture.repeat_x = False
+        self.texture.repeat_y = False
+        self.packer = ShelfPacker(size)
+        self.entries = {}
+        self.full = False
+
+    def begin_frame(self):
+        """Start over if a sprite did not fit during the last frame."""
+        if self.full:
+            self.clear()
+
+    def clear(self):
+        self.entries = {}
+        self.packer.reset()
+        self.full = False
+
+    def lookup(self, image):
+        """UV rect of image, or None while the atlas is full (until the next begin_frame())."""
+        uv = self.entries.get(image)
+        if uv is not None:
+            return uv
+
+        key = image
+        w, h = image.get_size()
+        limit = self.size - self.packer.pad
+        if w > limit or h > limit:
+            image = pygame.transform.smoothscale(image, (min(w, limit), min(h, limit)))
+            w, h = image.get_size()
+        empty = self.packer.empty()
+        spot = self.packer.alloc(w, h)
+        if spot is None:
+            if empty:
+                raise ValueError(f"sprite {w}x{h} does not fit a {self.size}px atlas")
+            self.full = True
+            return None
+        x, y = spot
+
+        data = pygame.image.tostring(image, "RGBA", False)
+        self.texture.write(data, viewport=(x, y, w, h))
+        uv = (x / self.size, y / self.size, (x + w) / self.size, (y + h) / self.size)
+        self.entries[key] = uv
+        return uv
+
+    def release(self):
+        self.texture.release()
+
+
+class GLUI:
+    """
+    Batched GL painter. Every call appends one instance (rect, color, params, uv)
+    to a CPU-side list; text appends its cached glyph run as a ready-made
+    array chunk. flush() uploads everything into a single dynamic buffer and
+    draws the whole UI with one instanced draw call.
+    """
+
+    def __init__(self, ctx, win_w, win_h):
+        self.ctx = ctx
+        self.prog = ctx.program(vertex_shader=UI_VERT, fragment_shader=UI_FRAG)
+        self.prog["u_sprites"].value = 2  # texture unit 2
+        self.prog["u_glyphs"].value = 3   # texture unit 3
+
+        corners = np.array([0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 1.0], dtype="f4")
+        self.corner_vbo = ctx.buffer(corners.tobytes())
+
+        self.capacity = 0
+        self.instance_vbo = None
+        self.vao = None
+        self._ensure_capacity(1024)
+
+        self.atlas = SpriteAtlas(ctx)
+        self.text_renderer = TextRenderer(ctx)
+        self.chunks = []
+        self.data = []
+        self.count = 0
+
+        self.win_w, self.win_h = int(win_w), int(win_h)
+
+    @property
+    def size(self):
+        return self.win_w, self.win_h
+
+    def _ensure_capacity(self, quads):
+        if quads <= self.capacity:
+            return
+        cap = max(quads, self.capacity * 2)
+        if self.instance_vbo is not None:
+            self.vao.release()
+            self.instance_vbo.release()
+        self.instance_vbo = self.ctx.buffer(reserve=cap * FLOATS_PER_QUAD * 4, dynamic=True)
+        self.vao = self.ctx.vertex_array(self.prog, [
+            (self.corner_vbo, "2f", "in_corner"),
+            (self.instance_vbo, "4f 4f 4f 4f/i", "in_rect", "in_color", "in_params", "in_uv"),
+        ])
+        self.capacity = cap
+
+    def resize(self, win_w, win_h):
+        self.win_w, self.win_h = int(win_w), int(win_h)
+
+    def begin(self):
+        self.chunks.clear()
+        self.data.clear()
+        self.count = 0
+        # atlases that filled up last frame start over now, before anything points into them
+        self.atlas.begin_frame()
+        self.text_renderer.begin_frame()
+
+    def _seal(self):
+        if self.data:
+            self.chunks.append(np.array(self.data, dtype="f4").reshape(-1, FLOATS_PER_QUAD))
+            self.data.clear()
+
+    def _push(self, x, y, w, h, color, radius, border, mode, uv=(0.0, 0.0, 0.0, 0.0)):
+        r, g, b, a = _rgba(color)
+        self.data.extend((x, y, w, h, r, g, b, a, radius, border, mode, 0.0, uv[0], uv[1], uv[2], uv[3]))
+        self.count += 1
+
+    def fill(self, color):
+        self._push(0.0, 0.0, self.win_w, self.win_h, color, 0.0, 0.0, MODE_SHAPE)
+
+    def rect(self, rect, color, radius=0):
+        x, y, w, h = rect
+        self._push(x, y, w, h, color, radius, 0.0, MODE_SHAPE)
+
+    def border(self, rect, color, width=1, radius=0):
+        x, y, w, h = rect
+        self._push(x, y, w, h, color, radius, max(1.0, width), MODE_SHAPE)
+
+    def sprite(self, image, rect):
+        x, y, w, h = rect
+        uv = self.atlas.lookup(image)
+        if uv is None:
+            return
+        self._push(x, y, w, h, (255, 255, 255, 255), 0.0, 0.0, MODE_SPRITE, uv)
+
+    def text(self, font, text, color, **anchor):
+        rows, size = self.text_renderer.run(font, text, color)
+        rect = pygame.Rect((0, 0), size)
+        for k, v in anchor.items():
+            setattr(rect, k, v)
+        if len(rows):
+            self._seal()
+            placed = rows.copy()
+            placed[:, 0] += rect.x
+            placed[:, 1] += rect.y
+            self.chunks.append(placed)
+            self.count += len(rows)
+        return rect
+
+    def flush(self):
+        if not self.count:
+            return
+        self._seal()
+        self._ensure_capacity(self.count)
+        arr = self.chunks[0] if len(self.chunks) == 1 else np.concatenate(self.chunks)
+        self.instance_vbo.orphan()
+        self.instance_vbo.write(arr.tobytes())
+        self.prog["u_screen"].value = (float(self.win_w), float(self.win_h))
+        self.atlas.texture.use(location=2)
+        self.text_renderer.atlas.texture.use(location=3)
+        self.vao.render(mode=moderngl.TRIANGLE_STRIP, instances=self.count)
+
+    def release(self):
+        self.vao.release()
+        self.instance_vbo.release()
+        self.corner_vbo.release()
+        self.atlas.release()
+        self.text_renderer.release()
+        self.prog.release()
@@ -0,0 +1,292 @@
+import os
+import math
+import time
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from game_state import Action, MOVE, ATTACK, PASS_ACTION
+from bitboard import BitBoard
+from ai import AccuracyModel, roll_answers
+
+# -----------------------------
+# Root-parallel Monte Carlo Tree Search
+#
+# Every worker process grows its own tree from the same root on a BitBoard
+# (make / unmake, no allocation per step) with its own seed; the root edges
+# of all trees are then merged by summing visits and the most visited move
+# is played. Answers are sampled inside the tree and the playouts, with the
+# same per-category accuracy the expectimax player uses.
+#
+#   ai = MCTSAI(player, workers=4, move_time=1.0)
+#   action = ai.choose(game)            # blocking
+#   ai.begin_turn(game); ai.think(dt)   # per frame, like ExpectimaxAI
+#
+# workers=1 searches in-process (no pool, no pickling).
+# -----------------------------
+
+EXPLORATION = 1.4
+ROLLOUT_PLIES = 60    # playouts stop here and score material instead
+
+
+def success_table(state, accuracy):
+    """probs[player][square]: chance of answering one question on that tile."""
+    board = state.board
+    return [[accuracy.p(player.index, category) for category in board.category]
+            for player in state.players]
+
+
+class _Node:
+    __slots__ = ("player", "untried", "edges", "fail", "visits")
+
+    def __init__(self, player, moves):
+        self.player = player
+        self.untried = moves      # (src, dst, is_attack) or None for a forced pass
+        self.edges = {}           # move -> [visits, value, success child]
+        self.fail = None          # shared child for "answered wrong"
+        self.visits = 0
+
+
+class MCTSTree:
+    """One search tree; run() can be called repeatedly to keep growing it."""
+
+    def __init__(self, bitboard, player, probs, seed=None,
+                 rollout_plies=ROLLOUT_PLIES, exploration=EXPLORATION):
+        self.bb = bitboard
+        self.probs = probs
+        self.rng = random.Random(seed)
+        self.rollout_plies = rollout_plies
+        self.exploration = exploration
+        self.playouts = 0
+        self.root = self._new_node(player)
+
+    def _new_node(self, player):
+        moves = self.bb.moves(player) or [None]
+        self.rng.shuffle(moves)
+        return _Node(player, moves)
+
+    def _p(self, player, move):
+        if move is None:
+            return 1.0
+        p = self.probs[player][move[1]]
+        return p * p if move[2] else p
+
+    def run(self, time_budget=None, playouts=None):
+        """Playouts until time_budget seconds pass or playouts are done."""
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        done = 0
+        while playouts is None or done < playouts:
+            self.playout()
+            done += 1
+            if deadline is not None and (done & 7) == 0 and time.perf_counter() >= deadline:
+                break
+        return done
+
+    def playout(self):
+        bb = self.bb
+        rng = self.rng
+        c = self.exploration
+        path = []
+        tokens = []
+        node = self.root
+        while len(bb.alive_players()) > 1:
+            player = node.player
+            if node.untried:
+                move = node.untried.pop()
+                edge = node.edges[move] = [0, 0.0, None]
+            else:
+                log_n = math.log(node.visits)
+                move, edge = max(node.edges.items(),
+                                 key=lambda kv: kv[1][1] / kv[1][0] + c * math.sqrt(log_n / kv[1][0]))
+            path.append((node, edge))
+
+            if rng.random() < self._p(player, move):
+                if move is not None:
+                    tokens.append(bb.make(player, move[0], move[1]))
+                child = edge[2]
+                if child is None:
+                    child = edge[2] = self._new_node(bb.next_player(player))
+                    node = child
+                    break
+            else:
+                child = node.fail
+                if child is None:
+                    child = node.fail = self._new_node(bb.next_player(player))
+                    node = child
+                    break
+            node = child
+
+        reward = self._rollout(node.player)
+        for node, edge in path:
+            node.visits += 1
+            edge[0] += 1
+            edge[1] += reward[node.player]
+        for token in reversed(tokens):
+            bb.unmake(token)
+        self.playouts += 1
+
+    def _rollout(self, player):
+        bb = self.bb
+        rng = self.rng
+        probs = self.probs
+        tokens = []
+        for _ in range(self.rollout_plies):
+            if len(bb.alive_players()) <= 1:
+                break
+            moves = bb.moves(player)
+            if moves:
+                src, dst, attack = moves[rng.randrange(len(moves))]
+                p = probs[player][dst]
+                if rng.random() < (p * p if attack else p):
+                    tokens.append(bb.make(player, src, dst))
+            player = bb.next_player(player)
+        reward = self._reward()
+        for token in reversed(tokens):
+            bb.unmake(token)
+        return reward
+
+    def _reward(self):
+        """1 for the winner, else each player's share of the pawns left."""
+        counts = [bin(bits).count("1") for bits in self.bb.players]
+        total = sum(counts)
+        return [n / total for n in counts]
+
+    def root_stats(self):
+        return {move: (edge[0], edge[1]) for move, edge in self.root.edges.items()}
+
+
+def _search_worker(bitboard, player, probs, time_budget, playouts, seed, rollout_plies, exploration):
+    """Process pool entry point: one independent tree, root edges back."""
+    tree = MCTSTree(bitboard, player, probs, seed, rollout_plies, exploration)
+    tree.run(time_budget, playouts)
+    return tree.root_stats(), tree.playouts
+
+
+_pools = {}
+
+
+def shared_pool(workers):
+    """One process pool per worker count, reused by every MCTSAI (and game)."""
+    pool = _pools.get(workers)
+    if pool is None:
+        # spawn: the front ends hold SDL / GL state that must not be forked
+        pool = _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    return pool
+
+
+def merge_stats(results):
+    """Sum root visits / values of several trees."""
+    merged = {}
+    for stats in results:
+        for move, (visits, value) in stats.items():
+            m = merged.setdefault(move, [0, 0.0])
+            m[0] += visits
+            m[1] += value
+    return merged
+
+
+class MCTSAI:
+    # searches in its own process pool; ai_scheduler runs it in a thread
+    parallel = True
+
+    def __init__(self, player, accuracy=None, workers=None, move_time=1.0, playouts=None,
+                 rollout_plies=ROLLOUT_PLIES, exploration=EXPLORATION, seed=None):
+        self.player = player
+        self.accuracy = accuracy if accuracy is not None else AccuracyModel()
+        self.workers = workers or os.cpu_count() or 1
+        self.move_time = move_time
+        self.playouts = playouts
+        self.rollout_plies = rollout_plies
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.state = None
+        self.stop = None
+        self._bb = None
+        self._tree = None
+        self._futures = None
+        self._spent = 0.0
+        self.last_playouts = 0
+        self.last_stats = {}
+
+    def __getstate__(self):
+        # settings only: the running tree, futures and stop hook stay behind
+        state = self.__dict__.copy()
+        state.update(stop=None, state=None, _bb=None, _tree=None, _futures=None)
+        return state
+
+    # --- per-frame driver (same shape as ExpectimaxAI) ---
+
+    def begin_turn(self, state):
+        self.state = state
+        self._bb = BitBoard.from_state(state)
+        probs = success_table(state, self.accuracy)
+        self._spent = 0.0
+        if self.workers == 1:
+            self._tree = MCTSTree(self._bb, self.player, probs, self.rng.getrandbits(32),
+                                  self.rollout_plies, self.exploration)
+            return
+        per_worker = None if self.playouts is None else -(-self.playouts // self.workers)
+        budget = self.move_time if self.playouts is None else None
+        pool = shared_pool(self.workers)
+        self._futures = [pool.submit(_search_worker, self._bb, self.player, probs, budget, per_worker,
+                                     self.rng.getrandbits(32), self.rollout_plies, self.exploration)
+                         for _ in range(self.workers)]
+
+    def think(self, slice_time):
+        """Returns the chosen Action once the search budget is used up, else None."""
+        if self.state is None:
+            return None
+        if self.stop is not None and self.stop.is_set():
+            # results of a cancelled search are simply dropped
+            self._futures = self._tree = self.state = None
+            return PASS_ACTION
+        if self._futures is not None:
+            if not all(f.done() for f in self._futures):
+                return None
+            results = [f.result() for f in self._futures]
+            self._futures = None
+            stats = merge_stats(r[0] for r in results)
+            self.last_playouts = sum(r[1] for r in results)
+        else:
+            tree = self._tree
+            if self.playouts is None:
+                t0 = time.perf_counter()
+                tree.run(time_budget=min(slice_time, self.move_time - self._spent))
+                self._spent += time.perf_counter() - t0
+                if self._spent < self.move_time:
+                    return None
+            else:
+                tree.run(time_budget=slice_time, playouts=self.playouts - tree.playouts)
+                if tree.playouts < self.playouts:
+                    return None
+            stats = merge_stats([tree.root_stats()])
+            self.last_playouts = tree.playouts
+            self._tree = None
+        self.last_stats = stats
+        action = self._best_action(stats)
+        self.state = None
+        return action
+
+    def choose(self, state):
+        """Blocking search for the whole budget."""
+        self.begin_turn(state)
+        action = None
+        while action is None:
+            if self._futures is not None:
+                # short waits so a stop request is noticed
+                wait(self._futures, timeout=0.05)
+            action = self.think(self.move_time)
+        return action
+
+    def roll_answers(self, category, kind):
+        return roll_answers(self.accuracy, self.player, category, kind, self.rng)
+
+    def _best_action(self, stats):
+        if not stats:
+            return PASS_ACTION
+        move = max(stats, key=lambda m: (stats[m][0], stats[m][1]))
+        if move is None:
+            return PASS_ACTION
+        src, dst, attack = move
+        n = self._bb.size
+        return Action(self._bb.occupant[src], dst // n, dst % n, ATTACK if attack else MOVE)
@@ -0,0 +1,233 @@
+import os
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+# -----------------------------
+# Per-frame stage profiler
+#
+#   with profiler.scope("tiles"):
+#       ...draw tiles...
+#   profiler.end_frame()
+#
+# When disabled, scope() hands back one shared no-op context manager, so the
+# instrumented loops pay a method call and nothing else.
+# F3 toggles profiling + overlay, F4 dumps the rolling window to CSV/JSON.
+# -----------------------------
+
+HISTORY_FRAMES = 600
+GRAPH_FRAMES = 120
+TOGGLE_KEY = pygame.K_F3
+DUMP_KEY = pygame.K_F4
+
+
+class _NullScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    __slots__ = ("profiler", "name", "t0")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        acc = self.profiler._current
+        acc[self.name] = acc.get(self.name, 0.0) + (time.perf_counter() - self.t0)
+        return False
+
+
+def _percentile(sorted_vals, pct):
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, int(round(pct / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+class Profiler:
+    def __init__(self, enabled=False, history=HISTORY_FRAMES):
+        self.enabled = enabled
+        self.show_overlay = enabled
+        self.history = history
+        self._scopes = {}
+        self._current = {}
+        self._last_frame = None
+        self.frames = deque(maxlen=history)   # (frame_ms, {stage: ms})
+        self.stage_order = []
+
+    # --- recording ---
+
+    def scope(self, name):
+        if not self.enabled:
+            return _NULL_SCOPE
+        s = self._scopes.get(name)
+        if s is None:
+            s = self._scopes[name] = _Scope(self, name)
+            self.stage_order.append(name)
+        return s
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            stages = {k: v * 1000.0 for k, v in self._current.items()}
+            self.frames.append(((now - self._last_frame) * 1000.0, stages))
+        self._current = {}
+        self._last_frame = now
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.show_overlay = enabled
+        self._current = {}
+        self._last_frame = None
+
+    def reset(self):
+        self.frames.clear()
+        self._current = {}
+        self._last_frame = None
+
+    # --- stats ---
+
+    def stats(self):
+        frame_ms = sorted(f[0] for f in self.frames)
+        n = len(self.frames)
+        stages = {}
+        for name in self.stage_order:
+            total = sum(f[1].get(name, 0.0) for f in self.frames)
+            stages[name] = total / n if n else 0.0
+        return {
+            "frames": n,
+            "frame_avg_ms": sum(frame_ms) / n if n else 0.0,
+            "frame_p50_ms": _percentile(frame_ms, 50),
+            "frame_p95_ms": _percentile(frame_ms, 95),
+            "frame_p99_ms": _percentile(frame_ms, 99),
+            "frame_max_ms": frame_ms[-1] if frame_ms else 0.0,
+            "stages_avg_ms": stages,
+        }
+
+    # --- dumps ---
+
+    def dump_csv(self, filename):
+        with open(filename, mode="w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "frame_ms"] + self.stage_order)
+            for i, (frame_ms, stages) in enumerate(self.frames):
+                writer.writerow([i, f"{frame_ms:.4f}"] + [f"{stages.get(n, 0.0):.4f}" for n in self.stage_order])
+
+    def dump_json(self, filename):
+        data = {
+            "summary": self.stats(),
+            "stages": self.stage_order,
+            "frames": [{"frame_ms": ms, "stages": stages} for ms, stages in self.frames],
+        }
+        with open(filename, mode="w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+
+    def dump(self, basename=None):
+        if basename is None:
+            basename = time.strftime("profile_%Y%m%d_%H%M%S")
+        self.dump_csv(basename + ".csv")
+        self.dump_json(basename + ".json")
+        print(f"Profile written to {basename}.csv / {basename}.json")
+
+    # --- input ---
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == TOGGLE_KEY:
+            self.set_enabled(not self.enabled)
+        elif event.key == DUMP_KEY and self.frames:
+            self.dump()
+
+    # --- overlay ---
+
+    def draw_overlay(self, ui, font, x=None, y=10):
+        """Draw the stats panel + frame-time graph with a gl_ui style painter."""
+        if not (self.enabled and self.show_overlay):
+            return
+        st = self.stats()
+        w, _h = ui.size
+        line_h = font.get_linesize()
+        lines = [
+            f"frame {st['frame_avg_ms']:.2f} ms  ({1000.0 / max(st['frame_avg_ms'], 1e-6):.0f} fps)",
+            f"p95 {st['frame_p95_ms']:.2f}  p99 {st['frame_p99_ms']:.2f}  max {st['frame_max_ms']:.2f}",
+        ]
+        lines += [f"{name:<14}{ms:7.2f} ms" for name, ms in st["stages_avg_ms"].items()]
+
+        panel_w = 300
+        graph_h = 60
+        panel_h = len(lines) * line_h + graph_h + 24
+        if x is None:
+            x = w - panel_w - 10
+        ui.rect((x, y, panel_w, panel_h), (0, 0, 0, 190), radius=6)
+
+        ty = y + 6
+        for line in lines:
+            ui.text(font, line, (220, 255, 220), topleft=(x + 8, ty))
+            ty += line_h
+
+        # frame-time graph: one bar per frame, 33 ms (30 FPS) = full height
+        gx, gy = x + 8, ty + 8
+        gw = panel_w - 16
+        ui.rect((gx, gy, gw, graph_h), (40, 40, 40, 200))
+        recent = list(self.frames)[-GRAPH_FRAMES:]
+        if recent:
+            bar_w = max(1, gw // GRAPH_FRAMES)
+            for i, (ms, _stages) in enumerate(recent):
+                bh = min(graph_h, int(graph_h * ms / 33.3))
+                color = (80, 220, 80, 255) if ms < 16.7 else ((240, 200, 60, 255) if ms < 33.3 else (230, 60, 60, 255))
+                ui.rect((gx + i * bar_w, gy + graph_h - bh, bar_w, bh), color)
+
+    def draw_overlay_surface(self, screen, font):
+        """Same overlay for the plain pygame builds (draws straight into screen)."""
+        if self.enabled and self.show_overlay:
+            self.draw_overlay(_SurfacePainter(screen), font)
+
+
+class _SurfacePainter:
+    """Minimal painter over a pygame Surface (alpha-blended rects + text)."""
+
+    def __init__(self, surface):
+        self.surface = surface
+
+    @property
+    def size(self):
+        return self.surface.get_size()
+
+    def rect(self, rect, color, radius=0):
+        r = pygame.Rect(rect)
+        if r.w <= 0 or r.h <= 0:
+            return
+        panel = pygame.Surface(r.size, pygame.SRCALPHA)
+        pygame.draw.rect(panel, color, panel.get_rect(), border_radius=radius)
+        self.surface.blit(panel, r.topleft)
+
+    def text(self, font, text, color, **anchor):
+        surf = font.render(text, True, color)
+        rect = surf.get_rect(**anchor)
+        self.surface.blit(surf, rect)
+        return rect
+
+
+# shared instance; SRAZ_PROFILE=1 starts with profiling on
+profiler = Profiler(enabled=os.environ.get("SRAZ_PROFILE", "") not in ("", "0"))
@@ -0,0 +1,249 @@
+import os
+import sys
+import csv
+import mmap
+import struct
+import hashlib
+import argparse
+
+import numpy as np
+
+from question_store import parse_row, DEFAULT_LANGUAGE
+
+# -----------------------------
+# Compiled question packs
+#
+# questions.csv compiled into one flat little-endian file that is
+# memory-mapped as is, no parsing at start-up:
+#
+#   header      magic, version, source size / mtime_ns / blake2b digest,
+#               section counts and offsets
+#   strings     u32 end offsets + one UTF-8 blob; every distinct text
+#               (question, answer, category, language) is stored once
+#   questions   one record per question: string ids of language, category,
+#               question, correct, 3 wrong answers, and a f32 difficulty
+#   groups      (language, category, start, count) sorted by language, category
+#   order       question indices grouped by (language, category)
+#
+# Rows are read like the Lua loader (see question_store.parse_row), so
+# lua/questions.csv with its language column compiles as well.
+#
+#   pack = load_pack("questions.csv")        # rebuilds questions.pack only if the CSV changed
+#   q = pack.random_question("Science", rng) # same dicts and calls as QuestionStore
+#
+#   python question_pack.py questions.csv lua/questions.csv     # build step
+# -----------------------------
+
+MAGIC = b"SRZQ"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHQq16sIIIQQQQQ")
+_RECORD = np.dtype([("language", "<u4"), ("category", "<u4"), ("question", "<u4"), ("correct", "<u4"),
+                    ("wrong", "<u4", 3), ("difficulty", "<f4")])
+_GROUP = np.dtype([("language", "<u4"), ("category", "<u4"), ("start", "<u4"), ("count", "<u4")])
+
+
+def pack_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".pack"
+
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    with open(csv_path, "rb") as f:
+        data = f.read()
+    return st.st_size, st.st_mtime_ns, hashlib.blake2b(data, digest_size=16).digest(), data
+
+
+def compile_rows(rows, size=0, mtime_ns=0, digest=b"\0" * 16):
+    """Pack bytes for parse_row tuples (a repeated question: the last row wins)."""
+    unique = {}
+    for parsed in rows:
+        unique[parsed[:3]] = parsed
+    strings = {}
+
+    def intern(text):
+        i = strings.get(text)
+        if i is None:
+            i = strings[text] = len(strings)
+        return i
+
+    records = np.zeros(len(unique), dtype=_RECORD)
+    for i, (language, category, question, correct, w1, w2, w3, difficulty) in enumerate(unique.values()):
+        records[i] = (intern(language), intern(category), intern(question), intern(correct),
+                      (intern(w1), intern(w2), intern(w3)), difficulty)
+
+    names = list(strings)
+    blobs = [s.encode() for s in names]
+    ends = np.cumsum([len(b) for b in blobs], dtype=np.uint64).astype("<u4") if blobs else np.zeros(0, "<u4")
+    blob = b"".join(blobs)
+
+    # questions grouped by (language name, category name), file order kept inside a group
+    key = [(names[r["language"]], names[r["category"]]) for r in records]
+    order = np.array(sorted(range(len(records)), key=lambda i: key[i]), dtype="<u4")
+    groups = []
+    for i, q in enumerate(order):
+        if not groups or key[q] != (names[groups[-1][0]], names[groups[-1][1]]):
+            groups.append([records[q]["language"], records[q]["category"], i, 0])
+        groups[-1][3] += 1
+    groups = np.array([tuple(g) for g in groups], dtype=_GROUP)
+
+    offsets = []
+    pos = _HEADER.size
+    sections = [ends.tobytes(), blob, records.tobytes(), groups.tobytes(), order.tobytes()]
+    body = []
+    for data in sections:
+        pad = -pos % 8          # keep every array aligned for the mmap views
+        body.append(b"\0" * pad)
+        pos += pad
+        offsets.append(pos)
+        body.append(data)
+        pos += len(data)
+    header = _HEADER.pack(MAGIC, VERSION, 0, size, mtime_ns, digest,
+                          len(names), len(records), len(groups), *offsets)
+    return header + b"".join(body)
+
+
+def compile_csv(csv_path, pack_path=None):
+    """Build the pack for csv_path; returns its path."""
+    pack_path = pack_path or pack_path_for(csv_path)
+    size, mtime_ns, digest, data = _source_stamp(csv_path)
+    rows = [p for p in (parse_row(r) for r in csv.reader(data.decode("utf-8-sig").splitlines())) if p]
+    tmp = pack_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(compile_rows(rows, size, mtime_ns, digest))
+    os.replace(tmp, pack_path)
+    return pack_path
+
+
+class QuestionPack:
+    """Read-only view of a pack in any buffer (an mmap, or bytes)."""
+
+    def __init__(self, buffer, language=DEFAULT_LANGUAGE):
+        self.buffer = buffer
+        self.language = language
+        (magic, version, _flags, self.source_size, self.source_mtime_ns, self.source_digest,
+         n_strings, n_questions, n_groups, *offsets) = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a question pack of this version")
+        o_ends, o_blob, o_records, o_groups, o_order = offsets
+        self.num_strings = n_strings
+        self._ends = np.frombuffer(buffer, "<u4", n_strings, o_ends)
+        self._blob = o_blob
+        self.records = np.frombuffer(buffer, _RECORD, n_questions, o_records)
+        self._order = np.frombuffer(buffer, "<u4", n_questions, o_order)
+        self._groups = {}      # language -> {category: (start, count)}
+        for g in np.frombuffer(buffer, _GROUP, n_groups, o_groups):
+            by_category = self._groups.setdefault(self.string(g["language"]), {})
+            by_category[self.string(g["category"])] = (int(g["start"]), int(g["count"]))
+        self._rows = {}
+
+    @classmethod
+    def open(cls, path, language=DEFAULT_LANGUAGE):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), language)
+
+    def close(self):
+        """Unmap the file (needed before it is replaced: Windows keeps mapped files locked)."""
+        self._ends = self.records = self._order = None
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def string(self, i):
+        start = int(self._ends[i - 1]) if i else 0
+        return bytes(self.buffer[self._blob + start:self._blob + int(self._ends[i])]).decode()
+
+    def __len__(self):
+        return len(self.records)
+
+    # --- QuestionStore's read calls ---
+
+    def languages(self):
+        return sorted(self._groups)
+
+    def resolve_language(self, language):
+        language = (language or self.language).lower()
+        return language if language in self._groups else DEFAULT_LANGUAGE
+
+    def categories(self, language=None):
+        return sorted(self._groups.get(self.resolve_language(language), {}))
+
+    def count(self, category=None, language=None):
+        by_category = self._groups.get(self.resolve_language(language), {})
+        if category is None:
+            return sum(n for _, n in by_category.values())
+        return by_category.get(category, (0, 0))[1]
+
+    def ids(self, category, language=None):
+        start, n = self._groups.get(self.resolve_language(language), {}).get(category, (0, 0))
+        return self._order[start:start + n]
+
+    def get(self, qid):
+        q = self._rows.get(qid)
+        if q is None:
+            if not 0 <= qid < len(self.records):
+                return None
+            r = self.records[qid]
+            q = self._rows[qid] = {
+                "id": int(qid), "language": self.string(r["language"]), "category": self.string(r["category"]),
+                "difficulty": float(r["difficulty"]), "question": self.string(r["question"]),
+                "correct": self.string(r["correct"]), "wrong": [self.string(w) for w in r["wrong"]],
+            }
+        return q
+
+    def random_question(self, category, rng, language=None):
+        """Random question of category; any category if it has none; None for an empty pack."""
+        ids = self.ids(category, language)
+        if not len(ids):
+            categories = self.categories(language)
+            if not categories:
+                return None
+            ids = self.ids(rng.choice(categories), language)
+        return self.get(int(ids[rng.randrange(len(ids))]))
+
+
+def load_pack(csv_path, pack_path=None, language=DEFAULT_LANGUAGE):
+    """
+    Pack for csv_path, rebuilt first if the CSV changed (size and mtime
+    match: used as is; otherwise the digest decides). Without the CSV an
+    existing pack is used, or an empty one.
+    """
+    pack_path = pack_path or pack_path_for(csv_path)
+    pack = None
+    if os.path.exists(pack_path):
+        try:
+            pack = QuestionPack.open(pack_path, language)
+        except (ValueError, struct.error) as e:
+            print(f"Warning: rebuilding {pack_path}: {e}")
+    if not os.path.exists(csv_path):
+        print(f"Warning: File '{csv_path}' not found.")
+        return pack or QuestionPack(compile_rows([]), language)
+    st = os.stat(csv_path)
+    if pack is not None and (pack.source_size, pack.source_mtime_ns) == (st.st_size, st.st_mtime_ns):
+        return pack
+    if pack is not None:
+        same = _source_stamp(csv_path)[2] == pack.source_digest
+        pack.close()
+        if same:
+            # touched but not changed: take the new size / mtime so the next start skips the hash
+            with open(pack_path, "r+b") as f:
+                f.seek(8)
+                f.write(struct.pack("<Qq", st.st_size, st.st_mtime_ns))
+            return QuestionPack.open(pack_path, language)
+    return QuestionPack.open(compile_csv(csv_path, pack_path), language)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compile question CSVs into .pack files.")
+    ap.add_argument("csv", nargs="+")
+    ap.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    args = ap.parse_args(argv)
+    for path in args.csv:
+        pack_path = compile_csv(path) if args.force else None
+        pack = load_pack(path) if pack_path is None else QuestionPack.open(pack_path)
+        print(f"{pack_path_for(path)}: {len(pack)} questions, {pack.num_strings} strings, "
+              f"languages {', '.join(pack.languages())}, {os.path.getsize(pack_path_for(path))} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import atexit
+from collections import deque, Counter
+
+# -----------------------------
+# Shuffle-bag question sampling
+#
+# Every category gets a bag of its question ids; a question comes up again
+# only after the whole bag has been drawn. Bags are shuffled lazily (one
+# Fisher-Yates swap per draw), so a draw is O(1) and a refill only resets
+# the cursor. After a pass the bag is in draw order, so the questions drawn
+# last sit at the tail and are held back until the rest of the next pass
+# is used up: no repeat across the refill either.
+#
+# The last RECENT_LIMIT question ids are kept in seen_questions.json, so
+# a new session starts with what was asked last time at the back of the
+# bags. The file is written at most every SAVE_EVERY seconds and at exit,
+# not per draw. Categories for "any category" come from a bag as well.
+#
+# A question picked elsewhere (the difficulty engine) is passed to note(),
+# which takes it out of its bag too, so it is not drawn again this pass.
+#
+#   sampler = QuestionSampler(store, seen_path="seen_questions.json")
+#   q = sampler.draw("Science", rng)      # question dict (see QuestionStore.get)
+#   q = sampler.draw_any(rng)
+#   sampler.stats()["Science"]            # size, draws, distinct, coverage, passes
+# -----------------------------
+
+SEEN_FILE = "seen_questions.json"
+RECENT_LIMIT = 500
+SAVE_EVERY = 30.0           # seconds between writes of seen_questions.json
+
+
+class ShuffleBag:
+    def __init__(self, items, held=()):
+        """items are drawn in random order; held ones (oldest first) only after the others."""
+        known = set(items)
+        order = {}
+        for i in held:
+            if i in known:
+                order.pop(i, None)      # seen twice: its latest place counts
+                order[i] = True
+        self.items = [i for i in items if i not in order] + list(order)
+        self.index = {item: k for k, item in enumerate(self.items)}
+        self.hold = len(self.items) - len(order)   # draw from [pos, hold) before [hold, n)
+        self.pos = 0
+        self.passes = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def _refill(self):
+        # the tail holds the last draws of the pass that just ended
+        n = len(self.items)
+        self.pos = 0
+        self.hold = n - min(RECENT_LIMIT, n // 2)
+        self.passes += 1
+
+    def _swap(self, a, b):
+        items = self.items
+        items[a], items[b] = items[b], items[a]
+        self.index[items[a]] = a
+        self.index[items[b]] = b
+
+    def draw(self, rng):
+        n = len(self.items)
+        if not n:
+            return None
+        if self.pos >= n:
+            self._refill()
+        end = self.hold if self.pos < self.hold else n
+        self._swap(self.pos, rng.randrange(self.pos, end))
+        self.pos += 1
+        return self.items[self.pos - 1]
+
+    def take(self, item):
+        """Count item as drawn (picked outside the bag); no-op if this pass already had it."""
+        j = self.index.get(item)
+        if j is None:
+            return
+        if self.pos >= len(self.items):
+            self._refill()
+        if j < self.pos:
+            return
+        if j >= self.hold > self.pos:
+            # a held item: move it to the front of the held part, which then moves up by one
+            self._swap(j, self.hold)
+            j = self.hold
+            self.hold += 1
+        self._swap(self.pos, j)
+        self.pos += 1
+
+
+class CategoryStats:
+    __slots__ = ("size", "draws", "distinct", "passes")
+
+    def __init__(self, size):
+        self.size = size
+        self.draws = 0
+        self.distinct = set()
+        self.passes = 0
+
+    def as_dict(self):
+        return {"size": self.size, "draws": self.draws, "distinct": len(self.distinct),
+                "coverage": len(self.distinct) / self.size if self.size else 0.0, "passes": self.passes}
+
+
+class QuestionSampler:
+    def __init__(self, source, seen_path=None, language=None):
+        """source: QuestionStore or QuestionPack."""
+        self.source = source
+        self.seen_path = seen_path
+        self.language = language
+        self.recent = deque(maxlen=RECENT_LIMIT)
+        self._recent_count = Counter()
+        self.asked = {}             # category -> draws over all sessions
+        if seen_path and os.path.exists(seen_path):
+            try:
+                with open(seen_path) as f:
+                    doc = json.load(f)
+                self.recent.extend(doc.get("recent", []))
+                self._recent_count.update(self.recent)
+                self.asked = dict(doc.get("asked", {}))
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not load {seen_path}: {e}")
+        self._bags = {}
+        self._stats = {}
+        self._categories = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if seen_path:
+            atexit.register(self.flush)
+
+    def _bag(self, category):
+        bag = self._bags.get(category)
+        if bag is None:
+            ids = [int(i) for i in self.source.ids(category, self.language)]
+            bag = self._bags[category] = ShuffleBag(ids, held=self.recent)
+            self._stats[category] = CategoryStats(len(ids))
+        return bag
+
+    def draw(self, category, rng):
+        """Next question of category; any category if it has none; None when there are no questions."""
+        bag = self._bag(category)
+        if not len(bag):
+            return self.draw_any(rng)
+        qid = bag.draw(rng)
+        self._count(category, qid)
+        return self.source.get(qid)
+
+    def note(self, category, qid):
+        """Count a question picked elsewhere as asked and take it out of its bag."""
+        self._bag(category).take(qid)
+        self._count(category, qid)
+
+    def _count(self, category, qid):
+        bag = self._bags[category]
+        stats = self._stats[category]
+        stats.draws += 1
+        stats.distinct.add(qid)
+        stats.passes = bag.passes
+        if len(self.recent) == self.recent.maxlen:
+            old = self.recent[0]
+            self._recent_count[old] -= 1
+            if not self._recent_count[old]:
+                del self._recent_count[old]
+        self.recent.append(qid)
+        self._recent_count[qid] += 1
+        self.asked[category] = self.asked.get(category, 0) + 1
+        self._dirty = True
+        if self.seen_path and time.monotonic() - self._saved_at >= SAVE_EVERY:
+            self.save()
+
+    def is_recent(self, qid):
+        """Asked among the last RECENT_LIMIT questions (this session or a saved one)."""
+        return qid in self._recent_count
+
+    def draw_any(self, rng):
+        if self._categories is None:
+            self._categories = ShuffleBag(self.source.categories(self.language))
+        category = self._categories.draw(rng)
+        if category is None:
+            return None
+        return self.draw(category, rng)
+
+    def stats(self):
+        """{category: {size, draws, distinct, coverage, passes, asked}} for this session (asked: all sessions)."""
+        out = {}
+        for category in self.source.categories(self.language):
+            stats = self._stats.get(category)
+            row = stats.as_dict() if stats else CategoryStats(self.source.count(category, self.language)).as_dict()
+            row["asked"] = self.asked.get(category, 0)
+            out[category] = row
+        return out
+
+    def flush(self):
+        """Write seen_questions.json if anything was asked since the last write."""
+        if self.seen_path and self._dirty:
+            self.save()
+
+    def save(self):
+        tmp = self.seen_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"recent": list(self.recent), "asked": self.asked}, f, separators=(",", ":"))
+        os.replace(tmp, self.seen_path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
@@ -0,0 +1,245 @@
+import os
+import csv
+import sqlite3
+import hashlib
+
+# -----------------------------
+# Question bank in SQLite
+#
+# questions.csv is imported into questions.db once; later starts only stat
+# the CSV (and hash it if the size or mtime moved), so opening the store
+# does not depend on how many questions there are. An import that finds a
+# changed file applies the difference row by row: a question keeps its id
+# as long as its (language, category, question text) stays the same.
+#
+# Rows are read like the Lua loader (lua/src/questions.lua):
+#
+#   language,category,question,correct,wrong1,wrong2,wrong3[,difficulty]
+#   category,question,correct,wrong1,wrong2,wrong3                (language "en")
+#
+# Question counts per (language, category) are kept up to date by the
+# import, so opening the store reads no questions. A category's ids are
+# read from the (language, category, difficulty) index on first use and
+# cached; after that a random question is one list pick and one row fetch:
+#
+#   store = QuestionStore("questions.db")
+#   store.import_csv("questions.csv")          # no-op when nothing changed
+#   q = store.random_question("Science", rng)  # {"id", "question", "correct", "wrong": [...], ...}
+#   store.get(q["id"])
+# -----------------------------
+
+DEFAULT_DB = "questions.db"
+DEFAULT_CSV = "questions.csv"
+DEFAULT_LANGUAGE = "en"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    language TEXT NOT NULL,
+    category TEXT NOT NULL,
+    difficulty REAL NOT NULL DEFAULT 0,
+    question TEXT NOT NULL,
+    correct TEXT NOT NULL,
+    wrong1 TEXT NOT NULL,
+    wrong2 TEXT NOT NULL,
+    wrong3 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_lookup ON questions (language, category, difficulty);
+CREATE UNIQUE INDEX IF NOT EXISTS questions_key ON questions (source, language, category, question);
+CREATE TABLE IF NOT EXISTS category_counts (
+    language TEXT NOT NULL,
+    category TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (language, category)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+"""
+
+
+def parse_row(row):
+    """(language, category, question, correct, w1, w2, w3, difficulty) or None for a short row."""
+    if len(row) >= 7:
+        language, category, question, correct, w1, w2, w3 = row[:7]
+        extra = row[7:8]
+    elif len(row) == 6:
+        language = DEFAULT_LANGUAGE
+        category, question, correct, w1, w2, w3 = row
+        extra = []
+    else:
+        return None
+    language = language.strip().lower()
+    category = category.strip()
+    if not language or not category:
+        return None
+    try:
+        difficulty = float(extra[0]) if extra and extra[0].strip() else 0.0
+    except ValueError:
+        difficulty = 0.0
+    return language, category, question, correct, w1, w2, w3, difficulty
+
+
+class QuestionStore:
+    def __init__(self, path=DEFAULT_DB, language=DEFAULT_LANGUAGE):
+        self.path = path
+        self.language = language
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        self._ids = {}      # (language, category) -> [id, ...]
+        self._rows = {}     # id -> question dict
+        self._counts = None
+
+    def close(self):
+        self.db.close()
+
+    # --- import ---
+
+    def import_csv(self, csv_path=DEFAULT_CSV, force=False):
+        """
+        Bring csv_path into the store. Returns (added, updated, removed), or
+        None when the file is unchanged (or missing, with a warning).
+        """
+        try:
+            st = os.stat(csv_path)
+        except FileNotFoundError:
+            print(f"Warning: File '{csv_path}' not found.")
+            return None
+        source = os.path.abspath(csv_path)
+        known = self.db.execute("SELECT size, mtime_ns, digest FROM sources WHERE path = ?", (source,)).fetchone()
+        if known and not force and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return None
+        with open(csv_path, "rb") as f:
+            data = f.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if known and not force and known[2] == digest:
+            with self.db:
+                self.db.execute("UPDATE sources SET size = ?, mtime_ns = ? WHERE path = ?",
+                                (st.st_size, st.st_mtime_ns, source))
+            return None
+
+        rows = {}
+        for row in csv.reader(data.decode("utf-8-sig").splitlines()):
+            parsed = parse_row(row)
+            if parsed is not None:
+                rows[parsed[:3]] = parsed      # a repeated question: the last row wins
+
+        existing = {}
+        for qid, language, category, question, correct, w1, w2, w3, difficulty in self.db.execute(
+                "SELECT id, language, category, question, correct, wrong1, wrong2, wrong3, difficulty "
+                "FROM questions WHERE source = ?", (source,)):
+            existing[(language, category, question)] = (qid, (correct, w1, w2, w3, difficulty))
+
+        added = []
+        updated = []
+        for key, parsed in rows.items():
+            old = existing.pop(key, None)
+            if old is None:
+                added.append((source,) + parsed)
+            elif old[1] != parsed[3:]:
+                updated.append(parsed[3:] + (old[0],))
+        removed = [(qid,) for qid, _ in existing.values()]
+
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO questions (source, language, category, question, correct, wrong1, wrong2, wrong3,"
+                " difficulty) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", added)
+            self.db.executemany(
+                "UPDATE questions SET correct = ?, wrong1 = ?, wrong2 = ?, wrong3 = ?, difficulty = ?"
+                " WHERE id = ?", updated)
+            self.db.executemany("DELETE FROM questions WHERE id = ?", removed)
+            self.db.execute("INSERT OR REPLACE INTO sources (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                            (source, st.st_size, st.st_mtime_ns, digest))
+            self.db.execute("DELETE FROM category_counts")
+            self.db.execute("INSERT INTO category_counts SELECT language, category, COUNT(*) FROM questions"
+                            " GROUP BY language, category")
+        self._ids.clear()
+        self._rows.clear()
+        self._counts = None
+        return len(added), len(updated), len(removed)
+
+    # --- lookups ---
+
+    def counts(self):
+        """{language: {category: questions}}"""
+        if self._counts is None:
+            self._counts = {}
+            for language, category, n in self.db.execute(
+                    "SELECT language, category, n FROM category_counts ORDER BY language, category"):
+                self._counts.setdefault(language, {})[category] = n
+        return self._counts
+
+    def languages(self):
+        return list(self.counts())
+
+    def categories(self, language=None):
+        return list(self.counts().get(self.resolve_language(language), {}))
+
+    def resolve_language(self, language):
+        """language (or the store's), falling back to DEFAULT_LANGUAGE when it has no questions."""
+        language = (language or self.language).lower()
+        return language if language in self.counts() else DEFAULT_LANGUAGE
+
+    def ids(self, category, language=None, min_difficulty=None, max_difficulty=None):
+        """Question ids of category (index only, no question text is read)."""
+        language = self.resolve_language(language)
+        if min_difficulty is None and max_difficulty is None:
+            key = (language, category)
+            ids = self._ids.get(key)
+            if ids is None:
+                ids = self._ids[key] = [r[0] for r in self.db.execute(
+                    "SELECT id FROM questions WHERE language = ? AND category = ? ORDER BY id", key)]
+            return ids
+        lo = float("-inf") if min_difficulty is None else min_difficulty
+        hi = float("inf") if max_difficulty is None else max_difficulty
+        return [r[0] for r in self.db.execute(
+            "SELECT id FROM questions WHERE language = ? AND category = ? AND difficulty BETWEEN ? AND ?"
+            " ORDER BY id", (language, category, lo, hi))]
+
+    def count(self, category=None, language=None):
+        by_category = self.counts().get(self.resolve_language(language), {})
+        if category is None:
+            return sum(by_category.values())
+        return by_category.get(category, 0)
+
+    def get(self, qid):
+        """Question dict by id (fetched on first use), None if there is no such id."""
+        q = self._rows.get(qid)
+        if q is None:
+            row = self.db.execute(
+                "SELECT id, language, category, difficulty, question, correct, wrong1, wrong2, wrong3"
+                " FROM questions WHERE id = ?", (qid,)).fetchone()
+            if row is None:
+                return None
+            q = self._rows[qid] = {
+                "id": row[0], "language": row[1], "category": row[2], "difficulty": row[3],
+                "question": row[4], "correct": row[5], "wrong": [row[6], row[7], row[8]],
+            }
+        return q
+
+    def random_question(self, category, rng, language=None):
+        """Random question of category; any category if it has none; None for an empty store."""
+        language = self.resolve_language(language)
+        if not self.count(category, language):
+            categories = self.categories(language)
+            if not categories:
+                return None
+            category = rng.choice(categories)
+        ids = self.ids(category, language)
+        return self.get(ids[rng.randrange(len(ids))])
+
+
+_shared = {}
+
+
+def shared_questions(db_path=DEFAULT_DB, csv_path=DEFAULT_CSV):
+    """One store per database and process, brought up to date with csv_path on first use."""
+    store = _shared.get(db_path)
+    if store is None:
+        store = _shared[db_path] = QuestionStore(db_path)
+        store.import_csv(csv_path)
+    return store
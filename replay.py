@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import zlib
+import struct
+import argparse
+import importlib
+
+import numpy as np
+
+from game_state import GameState, Board, PlayerState, PawnState, PASS, PASS_ACTION, DIRECTIONS
+
+# -----------------------------
+# Game replays
+#
+# A Replay is the starting position plus every turn. Turns are the same
+# facts the move journal keeps (savegame.py), packed into 16 bits:
+#
+#   bits 0-1  direction (index into DIRECTIONS)    bit 2  answered correctly
+#   bit 3     pass                                 bits 4-15  pawn id
+#
+# The .srzr file is a small header and a zlib body holding the start
+# position (hole bits, category indices, pawns) and the turn array, so a
+# 2000-turn game takes a few KB instead of a JSON move list's ~40 KB.
+#
+#   start = game.copy()                    # before the first move
+#   ...play...
+#   Replay.capture(start, game).save("replays/game.srzr")
+#
+#   player = ReplayPlayer(Replay.load("replays/game.srzr"), keyframe_every=50)
+#   player.seek(812)            # one keyframe copy + at most 49 applies
+#   player.tick(dt)             # plays turns at player.speed turns per second
+#
+#   python replay.py replays/game.srzr --view sraz3 --speed 4 --no-anim
+# -----------------------------
+
+MAGIC = b"SRZR"
+VERSION = 1
+KEYFRAME_EVERY = 50
+TURNS_PER_SECOND = 1.5      # playback rate at speed 1.0
+MAX_SPEED = 64.0
+
+_OK = 4
+_PASS = 8
+
+
+def encode_turn(state, action, answers_correct):
+    """16-bit code of action taken in state (before it is applied)."""
+    if action.kind == PASS:
+        return _PASS
+    pawn = state.pawns[action.pawn]
+    direction = DIRECTIONS.index((action.row - pawn.row, action.col - pawn.col))
+    return (action.pawn << 4) | (_OK if answers_correct else 0) | direction
+
+
+def decode_turn(state, code):
+    """(Action, answers_correct) for code in state."""
+    if code & _PASS:
+        return PASS_ACTION, True
+    pawn = state.pawns[code >> 4]
+    dr, dc = DIRECTIONS[code & 3]
+    action = state.action_for(pawn.id, pawn.row + dr, pawn.col + dc)
+    if action is None:
+        raise ValueError(f"replay turn {code:#06x} is not legal here")
+    return action, bool(code & _OK)
+
+
+class Replay:
+    def __init__(self, start, turns, meta=None):
+        self.start = start                      # GameState at move 0 (not modified)
+        self.turns = np.asarray(turns, dtype="<u2")
+        self.meta = dict(meta or {})
+
+    def __len__(self):
+        return len(self.turns)
+
+    @classmethod
+    def capture(cls, start, game, meta=None, first=0):
+        """Replay of game.history[first:]; start is a copy of game taken at that point."""
+        state = start.copy()
+        turns = []
+        for record in game.history[first:]:
+            action, answers_correct = record[0], record[1]
+            turns.append(encode_turn(state, action, answers_correct))
+            state.apply(action, answers_correct)
+        return cls(start.copy(), turns, meta)
+
+    # --- binary format ---
+
+    def to_bytes(self):
+        start = self.start
+        board = start.board
+        size = board.size
+        names = sorted(set(board.category))
+        index = {name: i for i, name in enumerate(names)}
+
+        body = [struct.pack("<HBBB", size, len(start.players), start.current, len(names))]
+        for name in names:
+            raw = name.encode()
+            body.append(struct.pack("<B", len(raw)) + raw)
+        body.append(bytes(index[c] for c in board.category))
+        body.append(np.packbits(np.asarray(board.hole, dtype=bool)).tobytes())
+        for p in start.players:
+            raw = p.name.encode()
+            body.append(struct.pack("<iBBB", p.score, p.alive, p.color_id, len(raw)) + raw)
+        body.append(struct.pack("<H", len(start.pawns)))
+        for p in start.pawns:
+            body.append(struct.pack("<BHHB", p.player, p.row, p.col, p.is_flag | (p.alive << 1)))
+        meta = json.dumps(self.meta, separators=(",", ":")).encode()
+        body.append(struct.pack("<I", len(meta)) + meta)
+        body.append(struct.pack("<I", len(self.turns)) + self.turns.tobytes())
+        return MAGIC + struct.pack("<B", VERSION) + zlib.compress(b"".join(body), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a replay file")
+        if data[4] != VERSION:
+            raise ValueError(f"unsupported replay version {data[4]}")
+        body = zlib.decompress(data[5:])
+        pos = 0
+
+        def take(fmt):
+            nonlocal pos
+            values = struct.unpack_from(fmt, body, pos)
+            pos += struct.calcsize(fmt)
+            return values
+
+        def take_bytes(n):
+            nonlocal pos
+            pos += n
+            return body[pos - n:pos]
+
+        size, num_players, current, num_names = take("<HBBB")
+        names = [take_bytes(take("<B")[0]).decode() for _ in range(num_names)]
+        n = size * size
+        board = Board(size)
+        board.category = [names[i] for i in take_bytes(n)]
+        board.hole = [bool(h) for h in np.unpackbits(np.frombuffer(take_bytes((n + 7) // 8), dtype=np.uint8))[:n]]
+        players = []
+        for i in range(num_players):
+            score, alive, color_id, name_len = take("<iBBB")
+            players.append(PlayerState(i, take_bytes(name_len).decode(), color_id, score, bool(alive)))
+        pawns = []
+        for pid in range(take("<H")[0]):
+            player, row, col, flags = take("<BHHB")
+            pawn = PawnState(pid, player, row, col, bool(flags & 1), bool(flags & 2))
+            pawns.append(pawn)
+            if pawn.alive:
+                board.occupant[row * size + col] = pid
+        meta = json.loads(take_bytes(take("<I")[0]))
+        count = take("<I")[0]
+        turns = np.frombuffer(take_bytes(2 * count), dtype="<u2").copy()
+        alive = [p.index for p in players if p.alive]
+        start = GameState(board, players, pawns, current, alive[0] if len(alive) == 1 else None)
+        return cls(start, turns, meta)
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayPlayer:
+    """
+    Plays a Replay on its own GameState (self.state, which a board view can
+    draw). Keyframe copies are taken every keyframe_every turns on a first
+    pass, so seek() costs one in-place assign plus fewer than
+    keyframe_every applies, in either direction.
+    """
+
+    def __init__(self, replay, keyframe_every=KEYFRAME_EVERY, speed=1.0, animate=True):
+        self.replay = replay
+        self.keyframe_every = max(1, keyframe_every)
+        self.speed = speed
+        self.animate = animate
+        self.paused = False
+        self._due = 0.0
+
+        walker = replay.start.copy()
+        self.keyframes = [walker.copy()]
+        for i, code in enumerate(replay.turns):
+            walker.apply(*decode_turn(walker, int(code)))
+            if (i + 1) % self.keyframe_every == 0:
+                self.keyframes.append(walker.copy())
+
+        self.state = replay.start.copy()
+        self.position = 0
+
+    def __len__(self):
+        return len(self.replay)
+
+    @property
+    def done(self):
+        return self.position >= len(self.replay)
+
+    def step(self):
+        """Apply the next turn; returns (action, answers_correct, source square) or None at the end."""
+        if self.done:
+            return None
+        state = self.state
+        action, answers_correct = decode_turn(state, int(self.replay.turns[self.position]))
+        src = None
+        if action.kind != PASS:
+            pawn = state.pawns[action.pawn]
+            src = (pawn.row, pawn.col)
+        state.apply(action, answers_correct)
+        self.position += 1
+        return action, answers_correct, src
+
+    def seek(self, index):
+        index = max(0, min(index, len(self.replay)))
+        k = index // self.keyframe_every
+        # forward within reach of the current position: just keep applying
+        if not (k * self.keyframe_every <= self.position <= index):
+            self.state.assign(self.keyframes[k])
+            self.position = k * self.keyframe_every
+        while self.position < index:
+            self.step()
+        self._due = 0.0
+
+    def command(self, name):
+        """Viewer controls: pause, next, prev, forward, back, faster, slower, anim."""
+        if name == "pause":
+            self.paused = not self.paused
+        elif name in ("next", "prev", "forward", "back"):
+            step = 1 if name in ("next", "prev") else self.keyframe_every
+            self.seek(self.position + (step if name in ("next", "forward") else -step))
+        elif name == "faster":
+            self.speed = min(self.speed * 2.0, MAX_SPEED)
+        elif name == "slower":
+            self.speed = max(self.speed / 2.0, 1.0 / MAX_SPEED)
+        elif name == "anim":
+            self.animate = not self.animate
+
+    def status(self):
+        text = f"Replay {self.position}/{len(self.replay)}  x{self.speed:g}"
+        return text + ("  paused" if self.paused else "")
+
+    def tick(self, dt):
+        """Advance playback by dt seconds; returns the turns applied this call."""
+        if self.paused or self.done:
+            return []
+        self._due += dt * self.speed * TURNS_PER_SECOND
+        played = []
+        while self._due >= 1.0 and not self.done:
+            self._due -= 1.0
+            played.append(self.step())
+            if self.animate:
+                # one turn per call, the view animates it before the next
+                self._due = min(self._due, 0.0)
+                break
+        return played
+
+
+# -----------------------------
+# Viewer entry point
+# -----------------------------
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Play back a .srzr replay in one of the board views.")
+    ap.add_argument("path")
+    ap.add_argument("--view", default="sraz3", choices=["sraz3", "test7"])
+    ap.add_argument("--speed", type=float, default=1.0, help="turns per second multiplier")
+    ap.add_argument("--no-anim", action="store_true", help="skip move animations")
+    ap.add_argument("--keyframe-every", type=int, default=KEYFRAME_EVERY)
+    ap.add_argument("--start", type=int, default=0, help="seek to this turn first")
+    ap.add_argument("--info", action="store_true", help="print the replay summary and exit")
+    args = ap.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    if args.info:
+        start = replay.start
+        print(f"{args.path}: {start.board.size}x{start.board.size}, {len(start.players)} players, "
+              f"{len(replay)} turns, {os.path.getsize(args.path)} bytes, meta {replay.meta}")
+        return
+
+    player = ReplayPlayer(replay, keyframe_every=args.keyframe_every, speed=args.speed,
+                          animate=not args.no_anim)
+    player.seek(args.start)
+    importlib.import_module(args.view).run_replay(player)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+import os
+import random
+import hashlib
+
+# -----------------------------
+# Seeded random streams
+#
+# Each consumer draws from its own named stream, all derived from one game
+# seed, so the board, the questions asked and the answer order come out the
+# same on every run with that seed, whatever else drew numbers in between:
+#
+#   rng = shared_rng()
+#   rng.reseed(seed_from_env())     # SRAZ_SEED=1234 replays a game, else a fresh seed
+#   rng.board                       # hole layout
+#   rng.questions                   # which question gets asked
+#   rng.answers                     # answer order
+#   rng.cosmetic                    # static, glitches, tile wobble phases
+#   rng.stream("ai1")               # any other name gets its own stream
+#
+# Only the cosmetic stream is drawn from every frame, so the frame rate
+# never shifts the gameplay streams. Streams are plain random.Random
+# objects; reseed() reseeds them in place, so held references stay valid.
+# -----------------------------
+
+SEED_ENV = "SRAZ_SEED"
+
+BOARD = "board"
+QUESTIONS = "questions"
+ANSWERS = "answers"
+COSMETIC = "cosmetic"
+
+
+def derive_seed(seed, name):
+    """64-bit seed of stream `name` under game seed `seed`."""
+    digest = hashlib.blake2b(f"{seed}/{name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def seed_from_env():
+    value = os.environ.get(SEED_ENV, "")
+    return int(value) if value else None
+
+
+class RNGService:
+    def __init__(self, seed=None):
+        self._streams = {}
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """Start over from seed (a fresh random one if None)."""
+        if seed is None:
+            seed = random.SystemRandom().randrange(1 << 32)
+        self.seed = seed
+        for name, stream in self._streams.items():
+            stream.seed(derive_seed(seed, name))
+        return seed
+
+    def stream(self, name):
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = self._streams[name] = random.Random(derive_seed(self.seed, name))
+        return stream
+
+    def seed_for(self, name):
+        """Integer seed for consumers that build their own generator (e.g. MCTSAI)."""
+        return derive_seed(self.seed, name)
+
+    @property
+    def board(self):
+        return self.stream(BOARD)
+
+    @property
+    def questions(self):
+        return self.stream(QUESTIONS)
+
+    @property
+    def answers(self):
+        return self.stream(ANSWERS)
+
+    @property
+    def cosmetic(self):
+        return self.stream(COSMETIC)
+
+    # --- snapshots (savegames / replays) ---
+
+    def get_state(self):
+        return {"seed": self.seed, "streams": {name: s.getstate() for name, s in self._streams.items()}}
+
+    def set_state(self, state):
+        self.reseed(state["seed"])
+        for name, (version, internal, gauss) in state["streams"].items():
+            # JSON round trips turn the tuples into lists
+            self.stream(name).setstate((version, tuple(internal), gauss))
+
+
+_shared = None
+
+
+def shared_rng():
+    """The session's RNGService, seeded from SRAZ_SEED when it is set."""
+    global _shared
+    if _shared is None:
+        _shared = RNGService(seed_from_env())
+    return _shared
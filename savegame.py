@@ -0,0 +1,285 @@
+import os
+import json
+import atexit
+
+from game_state import GameState, Board, PlayerState, PawnState, PASS, EMPTY
+
+# -----------------------------
+# Savegames (same savegame.json as the Lua build) with a move journal
+#
+# The snapshot is the Lua schema: cfg, players, pawns (alive only, rows and
+# columns from 1), board (rows of cells), currentPlayerIndex. Extra keys
+# the Lua loader ignores: players[].alive and journalSeq.
+#
+# Between snapshots every turn is appended to savegame.json.journal as one
+# line, so autosaving costs O(1) per move instead of a rewrite:
+#
+#   [seq, from_row, from_col, to_row, to_col, ok]    a move or attack (0-based)
+#   [seq]                                            a pass
+#
+# Turns are stored by square, not pawn id, because a snapshot only lists
+# the pawns still on the board. Every COMPACT_EVERY lines the snapshot is
+# rewritten (atomically) and the journal emptied; lines at or below the
+# snapshot's journalSeq are skipped, so a crash in between loses nothing.
+# A torn last line from a crash is dropped on load. An open save is
+# closed (journal folded into the snapshot) at interpreter exit, so the
+# Lua build, which reads only the snapshot, sees the last turn.
+#
+#   save = Autosave(game, cfg={"timeLimit": 30})    # writes the first snapshot
+#   save.record(action, success)                    # after every game.apply
+#   save = Autosave.resume()                        # None without a save
+#   save.game, save.cfg
+# -----------------------------
+
+SAVE_FILE = "savegame.json"
+JOURNAL_SUFFIX = ".journal"
+COMPACT_EVERY = 200
+
+# Config.PLAYER_COLORS of the Lua build, by color_id
+PLAYER_COLORS = [(220, 20, 60), (30, 144, 255), (34, 139, 34), (255, 215, 0)]
+
+
+# -----------------------------
+# Lua schema
+# -----------------------------
+
+def to_doc(game, cfg=None, base=None):
+    """savegame.json dict for game. Keys and cell extras (rocks, trees) of base are kept."""
+    board = game.board
+    size = board.size
+    doc = dict(base or {})
+    doc["cfg"] = dict(doc.get("cfg") or {})
+    doc["cfg"].update(cfg or {})
+    doc["cfg"].update(numPlayers=len(game.players), boardSize=size)
+    doc["currentPlayerIndex"] = game.current + 1
+
+    doc["players"] = [{
+        "name": p.name,
+        "index": p.index + 1,
+        "color": list(PLAYER_COLORS[p.color_id % len(PLAYER_COLORS)]),
+        "score": p.score,
+        "scaleBoost": 1.3 if p.index in (0, 3) else 1.0,
+        "alive": p.alive,
+    } for p in game.players]
+
+    doc["pawns"] = [{
+        "playerIndex": p.player + 1,
+        "row": p.row + 1,
+        "col": p.col + 1,
+        "isFlag": p.is_flag,
+        "homeSide": "left" if p.col + 1 <= size / 2 else "right",
+        "idleOffset": p.id % 4,
+    } for p in game.pawns if p.alive]
+
+    old_rows = (base or {}).get("board") or []
+    rows = []
+    for r in range(size):
+        old = old_rows[r] if r < len(old_rows) else []
+        row = []
+        for c in range(size):
+            cell = dict(old[c]) if c < len(old) else {}
+            i = r * size + c
+            cell["category"] = board.category[i]
+            cell["isHole"] = board.hole[i]
+            row.append(cell)
+        rows.append(row)
+    doc["board"] = rows
+    return doc
+
+
+def from_doc(doc):
+    """GameState from a savegame.json dict (Lua or Python written)."""
+    cells = doc.get("board") or []
+    size = len(cells) or int(doc.get("cfg", {}).get("boardSize", 0))
+    board = Board(size)
+    for r, row in enumerate(cells):
+        for c, cell in enumerate(row):
+            i = r * size + c
+            board.category[i] = cell.get("category") or ""
+            board.hole[i] = bool(cell.get("isHole"))
+
+    players = []
+    for i, data in enumerate(doc.get("players") or []):
+        players.append(PlayerState(i, data.get("name", f"Player {i+1}"), (data.get("index") or i + 1) - 1,
+                                   data.get("score", 0)))
+    pawns = []
+    for data in doc.get("pawns") or []:
+        player = (data.get("playerIndex") or 1) - 1
+        pawn = PawnState(len(pawns), player, data["row"] - 1, data["col"] - 1, bool(data.get("isFlag")))
+        pawns.append(pawn)
+        board.occupant[pawn.row * size + pawn.col] = pawn.id
+
+    # the Lua build never eliminates anyone; here a player without a flag is out
+    flags = {p.player for p in pawns if p.is_flag}
+    for p in players:
+        p.alive = bool(doc["players"][p.index].get("alive", True)) and p.index in flags
+    alive = [p.index for p in players if p.alive]
+    current = (doc.get("currentPlayerIndex") or 1) - 1
+    winner = alive[0] if len(alive) == 1 else None
+    return GameState(board, players, pawns, current, winner)
+
+
+def write_json_atomic(path, doc):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(doc, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Journal
+# -----------------------------
+
+def read_journal(path):
+    """(entries, good_bytes): parsed lines up to the first torn or corrupt one."""
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        data = f.read()
+    entries = []
+    good = 0
+    while good < len(data):
+        end = data.find(b"\n", good)
+        if end < 0:
+            break       # last line was cut off mid-write
+        try:
+            entries.append(json.loads(data[good:end]))
+        except ValueError:
+            break
+        good = end + 1
+    return entries, good
+
+
+def replay_turn(game, entry):
+    """Apply one journal entry; False if it does not fit the position."""
+    if len(entry) == 1:
+        actions = game.legal_actions()
+        if actions and actions[0].kind == PASS:
+            game.apply(actions[0], True)
+            return True
+        return False
+    _seq, fr, fc, tr, tc, ok = entry
+    size = game.board.size
+    if not (0 <= fr < size and 0 <= fc < size):
+        return False
+    occ = game.board.occupant[fr * size + fc]
+    action = game.action_for(occ, tr, tc) if occ != EMPTY else None
+    if action is None:
+        return False
+    game.apply(action, bool(ok))
+    return True
+
+
+class Autosave:
+    def __init__(self, game, path=SAVE_FILE, cfg=None, base=None, seq=0,
+                 compact_every=COMPACT_EVERY, sync=True):
+        self.game = game
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.cfg = dict(cfg or {})
+        self.doc = base
+        self.seq = seq
+        self.compact_every = compact_every
+        self.sync = sync
+        self.pending = 0
+        self._journal = None
+        if base is None:
+            self.snapshot()
+        atexit.register(self.close)
+
+    @classmethod
+    def resume(cls, path=SAVE_FILE, **kwargs):
+        """Snapshot plus journal replayed on top; None if there is no usable save."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                doc = json.load(f)
+            game = from_doc(doc)
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+            print(f"Warning: could not load {path}: {e}")
+            return None
+
+        seq = doc.get("journalSeq", 0)
+        journal_path = path + JOURNAL_SUFFIX
+        entries, good = read_journal(journal_path)
+        replayed = 0
+        for entry in entries:
+            if entry[0] <= seq:
+                continue    # already in the snapshot (crash during compaction)
+            if entry[0] != seq + 1 or not replay_turn(game, entry):
+                print(f"Warning: {journal_path} stops matching the game at turn {entry[0]}")
+                break
+            seq += 1
+            replayed += 1
+        save = cls(game, path, doc.get("cfg"), base=doc, seq=seq, **kwargs)
+        save.pending = replayed
+        # cut a torn or unusable tail so new lines start on a clean boundary
+        if os.path.exists(journal_path) and (good != os.path.getsize(journal_path) or replayed != len(entries)):
+            save.snapshot()
+        return save
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a")
+        return self._journal
+
+    def record(self, action, answers_correct):
+        """Journal a turn; call right after game.apply(action, answers_correct)."""
+        game = self.game
+        self.seq += 1
+        if action.kind == PASS:
+            entry = [self.seq]
+        else:
+            # a pawn that moved already stands on the target; its source is on the undo stack
+            src = game.history[-1][4]
+            if src == EMPTY:
+                pawn = game.pawns[action.pawn]
+                src = pawn.row * game.board.size + pawn.col
+            fr, fc = divmod(src, game.board.size)
+            entry = [self.seq, fr, fc, action.row, action.col, 1 if answers_correct else 0]
+        f = self._open_journal()
+        f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        f.flush()
+        if self.sync:
+            os.fsync(f.fileno())
+        self.pending += 1
+        if self.pending >= self.compact_every:
+            self.snapshot()
+
+    def snapshot(self):
+        """Rewrite savegame.json from the current state and empty the journal."""
+        self.doc = to_doc(self.game, self.cfg, self.doc)
+        self.doc["journalSeq"] = self.seq
+        write_json_atomic(self.path, self.doc)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        open(self.journal_path, "w").close()
+        self.pending = 0
+
+    def close(self):
+        """Fold the journal into savegame.json (what the Lua build reads)."""
+        atexit.unregister(self.close)
+        if self.pending:
+            self.snapshot()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def clear(self):
+        """Remove the save (the game is over)."""
+        atexit.unregister(self.close)
+        self.pending = 0
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        for path in (self.path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def has_save(path=SAVE_FILE):
+    return os.path.exists(path)
@@ -0,0 +1,376 @@
+"""
+Headless self-play for rule and balance testing.
+
+Plays many games between policies (random, greedy, expectimax, mcts) on
+every core and streams one row per game to a columnar table (see
+columnar.py), so a million-game run needs one chunk of memory, not one
+row per game. A summary is printed at the end: win rate per policy and per
+seat (first-player advantage), game length, and how games ended.
+
+    python simulate.py --games 10000 --policies random,greedy
+    python simulate.py --games 1000000 --board-size 8 --players 4 --holes 10 \\
+        --accuracy 0.6,Science=0.4,Sport=0.8 --out runs/4p
+    python simulate.py --games 200 --policies expectimax,mcts --ai-depth 2 --playouts 200
+    python simulate.py --games 100000 --board-size 32 --hole-density 0.15 --pregen 5000
+    python simulate.py --games 100000 --board-size 16 --archive runs/arch && python archive.py runs/arch
+
+Policies are assigned to seats in order and rotated every game (--no-rotate
+to keep them fixed). The table can be read back with columnar.read_columns.
+With --archive every turn is kept as well, in a sharded game archive
+(archive.py) that several runs can append to.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from game_state import GameState, HOLE_COUNT, CATEGORIES, ATTACK, PASS, QUESTIONS_NEEDED
+from ai import AccuracyModel, ExpectimaxAI, DEFAULT_ACCURACY, MAX_DEPTH
+from mcts import MCTSAI, EXPLORATION
+from distance_maps import DistanceMaps
+from columnar import ColumnWriter
+from archive import ArchiveWriter, TURN_COLUMNS, NO_CATEGORY
+from replay import encode_turn
+from board_gen import shared_cache
+
+POLICIES = ("random", "greedy", "expectimax", "mcts")
+CATEGORY_INDEX = {name: i for i, name in enumerate(CATEGORIES)}
+
+# how a game ended
+END_FLAG = 0      # last enemy flag captured
+END_LIMIT = 1     # --max-turns reached
+
+COLUMNS = [
+    ("game", "i8"),
+    ("seed", "i8"),
+    ("first_policy", "i1"),   # policy index on seat 0 (moves first)
+    ("winner_seat", "i1"),    # -1 when the turn limit ended the game
+    ("winner_policy", "i1"),
+    ("turns", "i4"),
+    ("end", "u1"),
+    ("pawn_captures", "i2"),
+    ("flag_captures", "i1"),
+    ("questions", "i4"),
+    ("correct", "i4"),
+]
+
+
+# -----------------------------
+# Policies
+# -----------------------------
+
+def greedy_action(game, rng):
+    """Take a flag if possible, else any attack, else step towards the nearest enemy flag."""
+    dist = DistanceMaps.of(game)
+    board = game.board
+    best = None
+    best_score = None
+    for action in game.legal_actions():
+        if action.kind == PASS:
+            return action
+        if action.kind == ATTACK:
+            score = 1000 if game.pawns[board.pawn_at(action.row, action.col)].is_flag else 100
+        else:
+            score = -dist.nearest_enemy_flag(game.current, action.row * board.size + action.col)
+        score += rng.random()
+        if best_score is None or score > best_score:
+            best, best_score = action, score
+    return best
+
+
+def build_agent(spec, seat, accuracy, seed):
+    """
+    Agent (game -> Action) from a spec dict:
+      {"policy": "random" | "greedy"}
+      {"policy": "expectimax", "depth": 2, "move_time": None}
+      {"policy": "mcts", "playouts": 200, "move_time": None, "exploration": 1.4}
+    Without move_time the search is fixed-size, so results do not depend on
+    machine speed.
+    """
+    name = spec["policy"]
+    rng = random.Random(seed)
+    if name == "random":
+        return lambda game: rng.choice(game.legal_actions())
+    if name == "greedy":
+        return lambda game: greedy_action(game, rng)
+    move_time = spec.get("move_time")
+    if name == "expectimax":
+        bot = ExpectimaxAI(seat, accuracy, move_time=move_time or float("inf"),
+                           max_depth=spec.get("depth", MAX_DEPTH if move_time else 2),
+                           tt_bytes=1 << 20, rng=rng)
+        return bot.choose
+    if name == "mcts":
+        playouts = spec.get("playouts", None if move_time else 200)
+        bot = MCTSAI(seat, accuracy, workers=1, move_time=move_time or 1.0, playouts=playouts,
+                     exploration=spec.get("exploration", EXPLORATION), seed=seed)
+        return bot.choose
+    raise ValueError(f"unknown policy {name!r}")
+
+
+def make_agent(name, seat, accuracy, cfg, seed):
+    return build_agent({"policy": name, "depth": cfg.ai_depth, "playouts": cfg.playouts}, seat, accuracy, seed)
+
+
+# -----------------------------
+# Games
+# -----------------------------
+
+class GameResult:
+    __slots__ = ("winner", "turns", "questions", "correct", "pawn_captures", "flag_captures", "cpu", "moves")
+
+    def __init__(self, winner, turns, questions, correct, pawn_captures, flag_captures, cpu, moves):
+        self.winner = winner          # seat, or -1 when max_turns ended the game
+        self.turns = turns
+        self.questions = questions
+        self.correct = correct
+        self.pawn_captures = pawn_captures
+        self.flag_captures = flag_captures
+        self.cpu = cpu                # process CPU seconds spent choosing moves, per seat
+        self.moves = moves            # turns played, per seat
+
+
+def run_game(game, agents, accuracy, rng, max_turns, log=None):
+    """
+    Play game to the end with agents[seat]; answers are drawn from accuracy
+    with rng. With a log list, one archive.TURN_COLUMNS tuple is appended per turn.
+    """
+    turns = questions = correct = pawn_captures = flag_captures = 0
+    cpu = [0.0] * len(agents)
+    moves = [0] * len(agents)
+    board = game.board
+    while game.winner is None and turns < max_turns:
+        seat = game.current
+        t0 = time.process_time()
+        action = agents[seat](game)
+        think = time.process_time() - t0
+        cpu[seat] += think
+        moves[seat] += 1
+        ok = True
+        asked = questions
+        if action.kind != PASS:
+            p = accuracy.p(game.current, board.category_at(action.row, action.col))
+            for _ in range(QUESTIONS_NEEDED[action.kind]):
+                questions += 1
+                if rng.random() >= p:
+                    ok = False
+                    break
+                correct += 1
+            if ok and action.kind == ATTACK:
+                if game.pawns[board.pawn_at(action.row, action.col)].is_flag:
+                    flag_captures += 1
+                else:
+                    pawn_captures += 1
+        if log is not None:
+            category = NO_CATEGORY if action.kind == PASS else CATEGORY_INDEX[board.category_at(action.row, action.col)]
+            log.append((encode_turn(game, action, ok), action.kind, category, questions - asked, ok, int(think * 1e6)))
+        game.apply(action, ok)
+        turns += 1
+
+    winner = game.winner if game.winner is not None else -1
+    return GameResult(winner, turns, questions, correct, pawn_captures, flag_captures, cpu, moves)
+
+
+def play_game(index, cfg):
+    seed = cfg.seed * 1000003 + index
+    rng = random.Random(seed)
+    hole_mask = None
+    if cfg.pregen:
+        # layouts were generated (in parallel) before the run; workers only load them
+        boards = shared_cache().get(cfg.board_size, cfg.players, cfg.holes, cfg.pregen, seed=cfg.seed)
+        hole_mask = boards[index % cfg.pregen]
+    game = GameState.new(cfg.players, cfg.board_size, hole_count=cfg.holes, rng=rng, hole_mask=hole_mask)
+    accuracy = AccuracyModel(default=cfg.default_accuracy, known=cfg.accuracy)
+
+    n = len(cfg.policies)
+    shift = index if cfg.rotate else 0
+    seat_policy = [(seat + shift) % n for seat in range(cfg.players)]
+    agents = [make_agent(cfg.policies[p], seat, accuracy, cfg, seed + seat + 1)
+              for seat, p in enumerate(seat_policy)]
+
+    log = [] if cfg.archive else None
+    r = run_game(game, agents, accuracy, rng, cfg.max_turns, log)
+    row = (index, seed, seat_policy[0], r.winner, seat_policy[r.winner] if r.winner >= 0 else -1, r.turns,
+           END_FLAG if r.winner >= 0 else END_LIMIT, r.pawn_captures, r.flag_captures, r.questions, r.correct)
+    return row, log
+
+
+def run_chunk(args):
+    """Worker entry point: games [start, start + count) as column arrays."""
+    start, count, cfg = args
+    games = [play_game(i, cfg) for i in range(start, start + count)]
+    chunk = {name: np.array([row[k] for row, _ in games], dtype=dtype)
+             for k, (name, dtype) in enumerate(COLUMNS)}
+    if cfg.archive:
+        turns = [t for _, log in games for t in log]
+        chunk["turn_log"] = {name: np.array([t[k] for t in turns], dtype=dtype)
+                             for k, (name, dtype) in enumerate(TURN_COLUMNS)}
+    return chunk
+
+
+def archive_games(chunk, cfg, policy_ids):
+    """archive.GAME_COLUMNS of a run_chunk result (policies as archive ids)."""
+    games = {name: chunk[name] for name in ("game", "seed", "winner_seat", "turns", "end")}
+    games["board_size"] = np.full(len(chunk["game"]), cfg.board_size)
+    games["players"] = np.full(len(chunk["game"]), cfg.players)
+    games["first_policy"] = policy_ids[chunk["first_policy"]]
+    winner = chunk["winner_policy"]
+    games["winner_policy"] = np.where(winner >= 0, policy_ids[np.maximum(winner, 0)], -1)
+    return games
+
+
+# -----------------------------
+# Streaming summary
+# -----------------------------
+
+class Summary:
+    def __init__(self, cfg):
+        self.cfg = cfg
+        n = len(cfg.policies)
+        self.games = 0
+        self.policy_wins = np.zeros(n, np.int64)
+        self.policy_seats = np.zeros(n, np.int64)    # seat-games played per policy
+        self.seat_wins = np.zeros(cfg.players, np.int64)
+        self.turns_hist = np.zeros(cfg.max_turns + 1, np.int64)
+        self.ends = np.zeros(2, np.int64)
+        self.pawn_captures = 0
+        self.flag_captures = 0
+        self.questions = 0
+        self.correct = 0
+
+    def add(self, chunk):
+        cfg = self.cfg
+        n = len(cfg.policies)
+        self.games += len(chunk["game"])
+        won = chunk["winner_seat"] >= 0
+        self.seat_wins += np.bincount(chunk["winner_seat"][won], minlength=cfg.players)[:cfg.players]
+        self.policy_wins += np.bincount(chunk["winner_policy"][won], minlength=n)[:n]
+        shift = chunk["game"] if cfg.rotate else np.zeros_like(chunk["game"])
+        for seat in range(cfg.players):
+            self.policy_seats += np.bincount((seat + shift) % n, minlength=n)[:n]
+        self.turns_hist += np.bincount(chunk["turns"], minlength=cfg.max_turns + 1)[:cfg.max_turns + 1]
+        self.ends += np.bincount(chunk["end"], minlength=2)[:2]
+        self.pawn_captures += int(chunk["pawn_captures"].sum())
+        self.flag_captures += int(chunk["flag_captures"].sum())
+        self.questions += int(chunk["questions"].sum())
+        self.correct += int(chunk["correct"].sum())
+
+    def _turn_percentile(self, q):
+        cum = np.cumsum(self.turns_hist)
+        return int(np.searchsorted(cum, q * cum[-1]))
+
+    def report(self):
+        cfg = self.cfg
+        games = max(self.games, 1)
+        print(f"\n{self.games} games, {cfg.board_size}x{cfg.board_size}, {cfg.players} players, {cfg.holes} holes")
+        print(f"{'policy':<12} {'seats':>9} {'wins':>9} {'win rate':>9}")
+        for i, name in enumerate(cfg.policies):
+            seats = max(int(self.policy_seats[i]), 1)
+            print(f"{name:<12} {int(self.policy_seats[i]):9d} {int(self.policy_wins[i]):9d} {self.policy_wins[i] / seats:9.3f}")
+        fair = 1.0 / cfg.players
+        print("seat win rate: " + "  ".join(f"#{s + 1} {w / games:.3f}" for s, w in enumerate(self.seat_wins))
+              + f"   (even: {fair:.3f}, first-player edge {self.seat_wins[0] / games - fair:+.3f})")
+        mean = (self.turns_hist * np.arange(len(self.turns_hist))).sum() / games
+        print(f"turns: mean {mean:.1f}  p10 {self._turn_percentile(0.1)}  median {self._turn_percentile(0.5)}"
+              f"  p90 {self._turn_percentile(0.9)}")
+        captures = max(self.pawn_captures + self.flag_captures, 1)
+        print(f"ended by flag capture {self.ends[END_FLAG] / games:.3f}, by turn limit {self.ends[END_LIMIT] / games:.3f}")
+        print(f"captures: flags {self.flag_captures} / pawns {self.pawn_captures}"
+              f"  (flag share {self.flag_captures / captures:.3f})")
+        print(f"answers right {self.correct / max(self.questions, 1):.3f} of {self.questions} questions")
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def parse_accuracy(text):
+    """'0.6,Science=0.4' -> (default, {category: p})."""
+    default = DEFAULT_ACCURACY
+    known = {}
+    for part in text.split(","):
+        if not part:
+            continue
+        if "=" in part:
+            category, value = part.split("=", 1)
+            if category not in CATEGORIES:
+                raise argparse.ArgumentTypeError(f"unknown category {category!r}")
+            known[category] = float(value)
+        else:
+            default = float(part)
+    return default, known
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--games", type=int, default=1000)
+    ap.add_argument("--policies", default="random,greedy", help=f"comma list of {', '.join(POLICIES)}")
+    ap.add_argument("--board-size", type=int, default=8)
+    ap.add_argument("--players", type=int, default=2, choices=[2, 3, 4])
+    ap.add_argument("--holes", type=int, default=HOLE_COUNT)
+    ap.add_argument("--hole-density", type=float, help="holes as a fraction of the board (overrides --holes)")
+    ap.add_argument("--pregen", type=int, default=0, help="pre-generate this many connected layouts and cycle them")
+    ap.add_argument("--accuracy", type=parse_accuracy, default=(DEFAULT_ACCURACY, {}),
+                    help="default and/or per category, e.g. 0.6,Science=0.4")
+    ap.add_argument("--max-turns", type=int, default=2000)
+    ap.add_argument("--ai-depth", type=int, default=2, help="expectimax search depth")
+    ap.add_argument("--playouts", type=int, default=200, help="mcts playouts per move")
+    ap.add_argument("--no-rotate", dest="rotate", action="store_false")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk", type=int, default=250, help="games per worker task / written block")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", default="sim_out", help="output table directory")
+    ap.add_argument("--archive", help="also append every turn to this game archive (see archive.py)")
+    args = ap.parse_args(argv)
+
+    args.policies = [p for p in args.policies.split(",") if p]
+    for name in args.policies:
+        if name not in POLICIES:
+            ap.error(f"unknown policy {name!r}")
+    args.default_accuracy, args.accuracy = args.accuracy
+    if args.hole_density is not None:
+        args.holes = int(round(args.hole_density * args.board_size ** 2))
+
+    meta = {k: v for k, v in vars(args).items() if k not in ("workers", "chunk", "out", "archive")}
+    tasks = ((start, min(args.chunk, args.games - start), args) for start in range(0, args.games, args.chunk))
+    if args.pregen:
+        shared_cache().get(args.board_size, args.players, args.holes, args.pregen, seed=args.seed, workers=args.workers)
+    summary = Summary(args)
+    t0 = time.perf_counter()
+    last_report = t0
+    archive = ArchiveWriter(args.archive, meta=meta) if args.archive else None
+    policy_ids = archive.policy_ids(args.policies) if archive else None
+    with ColumnWriter(args.out, COLUMNS, meta=meta) as out:
+        if args.workers > 1:
+            pool = multiprocessing.Pool(args.workers)
+            results = pool.imap_unordered(run_chunk, tasks)
+        else:
+            pool = None
+            results = map(run_chunk, tasks)
+        try:
+            for chunk in results:
+                out.append(chunk)
+                summary.add(chunk)
+                if archive is not None:
+                    archive.append(archive_games(chunk, args, policy_ids), chunk["turn_log"])
+                now = time.perf_counter()
+                if now - last_report > 5.0:
+                    out.flush()
+                    last_report = now
+                    print(f"{summary.games}/{args.games} games, {summary.games / (now - t0):,.1f} games/s")
+        finally:
+            if pool is not None:
+                pool.terminate()
+            if archive is not None:
+                archive.close()
+    elapsed = time.perf_counter() - t0
+    summary.report()
+    print(f"\n{summary.games / elapsed:,.1f} games/s on {args.workers} worker(s); table written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
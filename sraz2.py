@@ -1,10 +1,12 @@
 import pygame
 import sys
-import csv
 import random
 import math
 import colorsys
 
+from question_pack import load_pack
+from question_sampler import QuestionSampler
+
 pygame.init()
 
 # --- Constants ---
@@ -212,38 +214,15 @@ def load_assets():
 
 # --- Data ---
 
-def load_questions_from_csv(filename):
-    questions_by_category = {}
-    try:
-        with open(filename, mode="r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) < 5: continue
-                category, question, correct, w1, w2, w3 = row
-                category = category.strip()
-                if category not in questions_by_category:
-                    questions_by_category[category] = []
-                questions_by_category[category].append(
-                    {"question": question, "correct": correct, "wrong": [w1, w2, w3]}
-                )
-    except FileNotFoundError:
-        print(f"Warning: File '{filename}' not found.")
-    return questions_by_category
-
-questions_by_category = load_questions_from_csv("questions.csv")
+questions = load_pack("questions.csv")   # questions.pack, rebuilt when the CSV changes
+
+question_sampler = QuestionSampler(questions)
 
 def get_random_question_any():
-    if not questions_by_category: return None
-    all_cats = list(questions_by_category.keys())
-    category = random.choice(all_cats)
-    if not questions_by_category[category]: return None
-    return random.choice(questions_by_category[category])
+    return question_sampler.draw_any(random)
 
 def get_random_question_from(category):
-    if category in questions_by_category and questions_by_category[category]:
-        return random.choice(questions_by_category[category])
-    else:
-        return get_random_question_any()
+    return question_sampler.draw(category, random)
 
 # --- UI ---
 
@@ -1,17 +1,49 @@
 import pygame
+import os
 import sys
-import csv
-import random
+import time
 import math
+import itertools
 import colorsys
 
-pygame.init()
+from profiler import profiler
+from game_state import GameState, MoveCache, EMPTY, MOVE, PASS
+from board_gen import generate_holes
+from ai import ExpectimaxAI, AccuracyModel
+from mcts import MCTSAI
+from ai_scheduler import shared_scheduler
+from distance_maps import DistanceMaps
+from question_store import shared_questions
+from question_sampler import QuestionSampler, SEEN_FILE
+from difficulty import DifficultyEngine
+from rng_streams import shared_rng, seed_from_env
+from savegame import Autosave, has_save
+from replay import Replay
+
+# spawned AI workers (ai_scheduler) import this file as __mp_main__; they need none of the setup
+IN_AI_WORKER = __name__ == "__mp_main__"
+
+if not IN_AI_WORKER:
+    pygame.init()
 
 # --- Constants ---
 DEFAULT_WINDOW_WIDTH = 900
 DEFAULT_WINDOW_HEIGHT = 700
 FPS = 30
 HOLE_COUNT = 6
+# computer players search in the background (ai_scheduler) for this long per move
+AI_MOVE_TIME = 0.6
+# from this board size on, bots use process-parallel MCTS instead of expectimax
+MCTS_MIN_BOARD = 16
+SAVE_FILE = "savegame.json"   # same file and schema as the Lua build
+REPLAY_DIR = "replays"        # every finished game is kept here as a .srzr replay
+THREAT_STEPS = 3          # enemy pawns this close (walking) to the flag on turn are outlined
+# replay viewer keys -> ReplayPlayer.command(); Esc leaves
+REPLAY_KEYS = {
+    pygame.K_SPACE: "pause", pygame.K_RIGHT: "next", pygame.K_LEFT: "prev",
+    pygame.K_PAGEDOWN: "forward", pygame.K_PAGEUP: "back",
+    pygame.K_UP: "faster", pygame.K_DOWN: "slower", pygame.K_a: "anim",
+}
 
 # Colors
 WHITE = (255, 255, 255)
@@ -200,10 +232,11 @@ class BalatroBackground:
                 pygame.draw.line(self.scanline_surf, (0, 0, 0, 30), (0, y), (w, y))
 
     def generate_static(self):
+        rng = shared_rng().cosmetic
         for x in range(0, self.width, 4):
             for y in range(0, self.height, 4):
-                if random.random() > 0.9:
-                    c = random.randint(50, 80)
+                if rng.random() > 0.9:
+                    c = rng.randint(50, 80)
                     self.static_surf.set_at((x, y), (c, c, c))
                 else:
                     self.static_surf.set_at((x, y), (0, 0, 0))
@@ -294,7 +327,7 @@ class Button:
         text_surf = font.render(self.text, True, (20, 20, 20))
         text_rect = text_surf.get_rect(center=draw_rect.center)
         if abs(gx) > 2:
-            text_rect.x += random.randint(-2, 2)
+            text_rect.x += shared_rng().cosmetic.randint(-2, 2)
         screen.blit(text_surf, text_rect)
 
     def check_hover(self, mouse_pos):
@@ -339,38 +372,23 @@ def load_assets():
 
 # --- Data ---
 
-def load_questions_from_csv(filename):
-    questions_by_category = {}
-    try:
-        with open(filename, mode="r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) < 6:
-                    continue
-                category, question, correct, w1, w2, w3 = row[:6]
-                category = category.strip()
-                questions_by_category.setdefault(category, []).append(
-                    {"question": question, "correct": correct, "wrong": [w1, w2, w3]}
-                )
-    except FileNotFoundError:
-        print(f"Warning: File '{filename}' not found.")
-    return questions_by_category
-
-questions_by_category = load_questions_from_csv("questions.csv")
+if not IN_AI_WORKER:
+    questions = shared_questions()
+    question_sampler = QuestionSampler(questions, seen_path=SEEN_FILE)
+    difficulty_engine = DifficultyEngine(questions)
 
 def get_random_question_any():
-    if not questions_by_category:
-        return None
-    all_cats = list(questions_by_category.keys())
-    category = random.choice(all_cats)
-    if not questions_by_category[category]:
-        return None
-    return random.choice(questions_by_category[category])
-
-def get_random_question_from(category):
-    if category in questions_by_category and questions_by_category[category]:
-        return random.choice(questions_by_category[category])
-    return get_random_question_any()
+    return question_sampler.draw_any(shared_rng().questions)
+
+def get_random_question_from(category, player=None):
+    # with a player: a question near their level, avoiding recently asked ones
+    rng = shared_rng().questions
+    if player is not None:
+        qdata = difficulty_engine.draw(player, category, rng, avoid=question_sampler.is_recent)
+        if qdata is not None:
+            question_sampler.note(qdata["category"], qdata["id"])
+            return qdata
+    return question_sampler.draw(category, rng)
 
 # --- UI ---
 
@@ -415,15 +433,25 @@ def draw_question_background(screen):
     pulse_surf.fill((40, 60, 90, pulse_alpha))
     screen.blit(pulse_surf, (0,0))
 
-def ask_question_from_category(screen, font, category, time_limit):
-    qdata = get_random_question_from(category)
+def ask_question_from_category(screen, font, category, time_limit, player=None, observe=None):
+    # observe(correct) is told every answer (the AI's accuracy model)
+    qdata = get_random_question_from(category, player)
     if not qdata:
         return None
+    correct = show_question(screen, font, qdata, time_limit)
+    if player is not None:
+        difficulty_engine.record(player, qdata, correct)
+    if observe is not None:
+        observe(correct)
+    return correct
+
+def show_question(screen, font, qdata, time_limit):
+    """Ask qdata until answered or time runs out; True for the right answer."""
     question_text = qdata["question"]
     correct_answer = qdata["correct"]
     wrong_answers = qdata["wrong"]
     answers = [correct_answer] + wrong_answers
-    random.shuffle(answers)
+    shared_rng().answers.shuffle(answers)
 
     w, h = screen.get_size()
     question_box = pygame.Rect(0, 0, 600, 300)
@@ -445,52 +473,58 @@ def ask_question_from_category(screen, font, category, time_limit):
     bar_y = 50
 
     while not done_asking:
-        draw_question_background(screen)
-        seconds_passed = (pygame.time.get_ticks() - start_ticks) / 1000.0
-        time_left = max(0.0, time_limit - seconds_passed)
-        if time_left <= 0.0:
-            return False
-
-        pct = time_left / max(0.001, time_limit)
-        fill_width = int(bar_width * pct)
-        bar_color = GREEN_BAR if pct > 0.5 else (YELLOW_BAR if pct > 0.2 else RED_WARNING)
-
-        pygame.draw.rect(screen, GRAY, (bar_x, bar_y, bar_width, bar_height))
-        pygame.draw.rect(screen, bar_color, (bar_x, bar_y, fill_width, bar_height))
-        pygame.draw.rect(screen, BLACK, (bar_x, bar_y, bar_width, bar_height), 2)
-
-        pygame.draw.rect(screen, WHITE, question_box)
-        pygame.draw.rect(screen, BLACK, question_box, 2)
-
-        words = question_text.split(' ')
-        lines = []
-        current_line = ""
-        for word in words:
-            if font.size(current_line + word)[0] < question_box.width - 2*margin:
-                current_line += word + " "
-            else:
-                lines.append(current_line)
-                current_line = word + " "
-        lines.append(current_line)
-
-        y_offset = question_box.y + margin
-        for line in lines:
-            screen.blit(font.render(line, True, BLACK), (question_box.x + margin, y_offset))
-            y_offset += 30
-
-        answer_rects.clear()
-        start_y = y_offset + 20
-        for i, ans in enumerate(answers):
-            ans_surf = font.render(f"{chr(65+i)}: {ans}", True, BLACK)
-            ans_rect = ans_surf.get_rect()
-            ans_rect.topleft = (question_box.x + margin, start_y + i * 40)
-            screen.blit(ans_surf, ans_rect)
-            answer_rects.append((ans_rect, ans))
-
-        pygame.display.flip()
+        with profiler.scope("question_bg"):
+            draw_question_background(screen)
+        with profiler.scope("question_draw"):
+            seconds_passed = (pygame.time.get_ticks() - start_ticks) / 1000.0
+            time_left = max(0.0, time_limit - seconds_passed)
+            if time_left <= 0.0:
+                return False
+
+            pct = time_left / max(0.001, time_limit)
+            fill_width = int(bar_width * pct)
+            bar_color = GREEN_BAR if pct > 0.5 else (YELLOW_BAR if pct > 0.2 else RED_WARNING)
+
+            pygame.draw.rect(screen, GRAY, (bar_x, bar_y, bar_width, bar_height))
+            pygame.draw.rect(screen, bar_color, (bar_x, bar_y, fill_width, bar_height))
+            pygame.draw.rect(screen, BLACK, (bar_x, bar_y, bar_width, bar_height), 2)
+
+            pygame.draw.rect(screen, WHITE, question_box)
+            pygame.draw.rect(screen, BLACK, question_box, 2)
+
+            words = question_text.split(' ')
+            lines = []
+            current_line = ""
+            for word in words:
+                if font.size(current_line + word)[0] < question_box.width - 2*margin:
+                    current_line += word + " "
+                else:
+                    lines.append(current_line)
+                    current_line = word + " "
+            lines.append(current_line)
+
+            y_offset = question_box.y + margin
+            for line in lines:
+                screen.blit(font.render(line, True, BLACK), (question_box.x + margin, y_offset))
+                y_offset += 30
+
+            answer_rects.clear()
+            start_y = y_offset + 20
+            for i, ans in enumerate(answers):
+                ans_surf = font.render(f"{chr(65+i)}: {ans}", True, BLACK)
+                ans_rect = ans_surf.get_rect()
+                ans_rect.topleft = (question_box.x + margin, start_y + i * 40)
+                screen.blit(ans_surf, ans_rect)
+                answer_rects.append((ans_rect, ans))
+
+        profiler.draw_overlay_surface(screen, font)
+        with profiler.scope("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
         clock.tick(FPS)
 
         for event in pygame.event.get():
+            profiler.handle_event(event)
             if event.type == pygame.QUIT:
                 pygame.quit(); sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -503,9 +537,9 @@ def ask_question_from_category(screen, font, category, time_limit):
 
     return chosen_answer == correct_answer
 
-def ask_two_questions_from_category(screen, font, category, time_limit):
+def ask_two_questions_from_category(screen, font, category, time_limit, player=None, observe=None):
     for _ in range(2):
-        result = ask_question_from_category(screen, font, category, time_limit)
+        result = ask_question_from_category(screen, font, category, time_limit, player, observe)
         if result is None or not result:
             return False
     return True
@@ -513,15 +547,11 @@ def ask_two_questions_from_category(screen, font, category, time_limit):
 # --- Game Logic ---
 
 def place_random_holes(board, rows, cols, hole_count=HOLE_COUNT):
-    free_positions = []
-    for r in range(rows):
-        for c in range(cols):
-            if board[r][c].pawn is None:
-                free_positions.append((r, c))
-    hole_count = min(hole_count, len(free_positions))
-    chosen_holes = random.sample(free_positions, hole_count)
-    for r, c in chosen_holes:
-        board[r][c].is_hole = True
+    # same sampling as before, but holes never cut the (square) board apart
+    reserved = [r * cols + c for r in range(rows) for c in range(cols) if board[r][c].pawn is not None]
+    hole = generate_holes(cols, reserved, hole_count, rng=shared_rng().board)
+    for i in itertools.compress(range(rows * cols), hole):
+        board[i // cols][i % cols].is_hole = True
 
 def get_valid_moves(board, selected_pawn, rows, cols):
     directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
@@ -619,12 +649,19 @@ def menu_loop(screen, clock, title_font, option_font):
     num_players = 2
     time_limit = 30
     board_size = 8
+    ai_players = 0
+    load_game = False
     running = True
     bg = BalatroBackground(screen.get_width(), screen.get_height())
 
     def change_players(val):
-        nonlocal num_players
+        nonlocal num_players, ai_players
         num_players = max(2, min(4, num_players + val))
+        ai_players = min(ai_players, num_players - 1)
+
+    def change_ai(val):
+        nonlocal ai_players
+        ai_players = max(0, min(num_players - 1, ai_players + val))
 
     def change_time(val):
         nonlocal time_limit
@@ -638,6 +675,11 @@ def menu_loop(screen, clock, title_font, option_font):
         nonlocal running
         running = False
 
+    def load_saved():
+        nonlocal running, load_game
+        load_game = True
+        running = False
+
     buttons = [
         Button(-100, -120, 50, 50, "-", CARD_BLACK, CARD_RED, lambda: change_players(-1)),
         Button(100, -120, 50, 50, "+", CARD_BLACK, CARD_RED, lambda: change_players(1)),
@@ -645,22 +687,28 @@ def menu_loop(screen, clock, title_font, option_font):
         Button(100, -40, 50, 50, "+", CARD_BLACK, CARD_RED, lambda: change_time(5)),
         Button(-100, 40, 50, 50, "-", CARD_BLACK, CARD_RED, lambda: change_board(-1)),
         Button(100, 40, 50, 50, "+", CARD_BLACK, CARD_RED, lambda: change_board(1)),
-        Button(-80, 130, 160, 60, "PLAY", CARD_BLUE, (100, 149, 237), start_game)
+        Button(-100, 120, 50, 50, "-", CARD_BLACK, CARD_RED, lambda: change_ai(-1)),
+        Button(100, 120, 50, 50, "+", CARD_BLACK, CARD_RED, lambda: change_ai(1)),
+        Button(-80, 210, 160, 60, "PLAY", CARD_BLUE, (100, 149, 237), start_game)
     ]
+    if has_save(SAVE_FILE):
+        buttons.append(Button(-80, 280, 160, 60, "LOAD", CARD_BLUE, (100, 149, 237), load_saved))
     base_pawn_img, base_flag_img = load_assets()
 
     while running:
         w, h = screen.get_size()
-        bg.resize(w, h)
-        bg.update_and_draw(screen)
+        with profiler.scope("background"):
+            bg.resize(w, h)
+            bg.update_and_draw(screen)
         mouse_pos = pygame.mouse.get_pos()
         for btn in buttons:
             btn.update_pos(w, h)
 
         ticks = pygame.time.get_ticks()
         glitch_x, glitch_y = (0, 0)
-        if ticks % 60 == 0 and random.random() < 0.3:
-            glitch_x, glitch_y = random.randint(-4, 4), random.randint(-2, 2)
+        cosmetic = shared_rng().cosmetic
+        if ticks % 60 == 0 and cosmetic.random() < 0.3:
+            glitch_x, glitch_y = cosmetic.randint(-4, 4), cosmetic.randint(-2, 2)
 
         title_surf = title_font.render("MAIN MENU", True, WHITE)
         title_rect = title_surf.get_rect(center=(w//2 + glitch_x, h//2 - 200 + glitch_y))
@@ -681,24 +729,75 @@ def menu_loop(screen, clock, title_font, option_font):
         board_surf = title_font.render(str(board_size), True, WHITE)
         screen.blit(board_surf, board_surf.get_rect(center=(w//2, h//2 + 40)))
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT: pygame.quit(); sys.exit()
-            elif event.type == pygame.VIDEORESIZE: bg.resize(event.w, event.h)
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                for btn in buttons:
-                    btn.check_click(mouse_pos)
-
-        for btn in buttons:
-            btn.check_hover(mouse_pos)
-            btn.draw(screen, option_font, (glitch_x, glitch_y))
-
-        pygame.display.flip()
+        lbl_ai_surf = option_font.render("Computer Players:", True, WHITE)
+        screen.blit(lbl_ai_surf, lbl_ai_surf.get_rect(center=(w//2, h//2 + 90)))
+        ai_surf = title_font.render(str(ai_players), True, WHITE)
+        screen.blit(ai_surf, ai_surf.get_rect(center=(w//2, h//2 + 120)))
+
+        with profiler.scope("events"):
+            for event in pygame.event.get():
+                profiler.handle_event(event)
+                if event.type == pygame.QUIT: pygame.quit(); sys.exit()
+                elif event.type == pygame.VIDEORESIZE: bg.resize(event.w, event.h)
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    for btn in buttons:
+                        btn.check_click(mouse_pos)
+
+        with profiler.scope("buttons"):
+            for btn in buttons:
+                btn.check_hover(mouse_pos)
+                btn.draw(screen, option_font, (glitch_x, glitch_y))
+
+        profiler.draw_overlay_surface(screen, option_font)
+        with profiler.scope("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
         clock.tick(FPS)
 
-    return num_players, time_limit, board_size, base_pawn_img, base_flag_img
-
-def main_game_real(screen, clock, font, num_players, time_limit, board_size, base_pawn_img, base_flag_img):
-    players, pawns = setup_players_and_pawns(num_players, board_size)
+    return num_players, time_limit, board_size, ai_players, base_pawn_img, base_flag_img, load_game
+
+def main_game_real(screen, clock, font, num_players, time_limit, board_size, base_pawn_img, base_flag_img,
+                   ai_players=0, saved=None, replay=None):
+    # every game draws from streams of one seed: SRAZ_SEED=<seed> plays the same board,
+    # questions and answer order again
+    rng = shared_rng()
+    rng.reseed(seed_from_env())
+    print(f"game seed {rng.seed}")
+    # rules live in GameState; this loop only draws it and asks the questions
+    if replay is not None:
+        # playback: the ReplayPlayer owns the state; nothing is asked or saved
+        game = replay.state
+        num_players, board_size = len(game.players), game.board.size
+        ai_players = 0
+        autosave = None
+    elif saved is not None:
+        game = saved.game
+        num_players, board_size = len(game.players), game.board.size
+        time_limit = saved.cfg.get("timeLimit", time_limit)
+        ai_players = saved.cfg.get("aiPlayers", ai_players)
+        autosave = saved
+    else:
+        game = GameState.new(num_players, board_size, list(category_colors.keys()), HOLE_COUNT, rng=rng.board)
+        # one journal line per turn; the snapshot is only rewritten every few hundred turns
+        autosave = Autosave(game, SAVE_FILE, cfg={"timeLimit": time_limit, "aiPlayers": ai_players})
+    replay_start, replay_first = game.copy(), len(game.history)
+    board = game.board
+    # highlight targets per pawn as sets, refreshed only around squares that changed
+    move_cache = MoveCache(game)
+    # walking distances around the holes, shared by the move hint, threat outlines and AI
+    dist_maps = DistanceMaps.of(game)
+
+    # the last ai_players seats are computer opponents sharing one answer model
+    accuracy = AccuracyModel()
+    bots = {}
+    scheduler = shared_scheduler()
+    for i in range(num_players - ai_players, num_players):
+        game.players[i].name = f"CPU {i+1}"
+        if board_size >= MCTS_MIN_BOARD:
+            bots[i] = MCTSAI(i, accuracy, move_time=AI_MOVE_TIME, seed=rng.seed_for(f"ai{i}"))
+        else:
+            bots[i] = ExpectimaxAI(i, accuracy, move_time=AI_MOVE_TIME, rng=rng.stream(f"ai{i}"))
+    players = [Player(p.name, p.color_id) for p in game.players]
     bg = BalatroBackground(screen.get_width(), screen.get_height())
 
     icon_map = {}
@@ -709,14 +808,14 @@ def main_game_real(screen, clock, font, num_players, time_limit, board_size, bas
         icon_map[(p, False)] = pawn_col
         icon_map[(p, True)] = flag_light
 
-    current_player_index = 0
-    selected_pawn = None
+    selected_pawn = None  # pawn id
     running = True
 
     # --- Move animation FIX (your file had start_pos/end_pos wrong) ---
     move_anim = {
         'active': False,
         'pawn': None,
+        'pos': (0, 0),
         'start_pos': (0, 0),
         'end_pos': (0, 0),
         'start_ticks': 0,
@@ -724,30 +823,54 @@ def main_game_real(screen, clock, font, num_players, time_limit, board_size, bas
     }
     ANIM_DURATION = 300
 
-    board_data = [[Cell() for _ in range(board_size)] for _ in range(board_size)]
-    all_cats = list(category_colors.keys())
-    for r in range(board_size):
-        for c in range(board_size):
-            board_data[r][c].category = all_cats[(r + c) % len(all_cats)]
-
-    for p in pawns:
-        board_data[p.row][p.col].pawn = p
-    place_random_holes(board_data, board_size, board_size, HOLE_COUNT)
-
     # --- 3D rotation state per tile (pivoted) ---
-    phases = [[random.random() * (math.pi * 2.0) for _ in range(board_size)] for __ in range(board_size)]
+    phases = [[rng.cosmetic.random() * (math.pi * 2.0) for _ in range(board_size)] for __ in range(board_size)]
     rot_x = [[0.0 for _ in range(board_size)] for __ in range(board_size)]
     rot_y = [[0.0 for _ in range(board_size)] for __ in range(board_size)]
     hover_w = [[0.0 for _ in range(board_size)] for __ in range(board_size)]  # smooth hover
 
+    def play(action, success):
+        """Apply a resolved turn (human or computer), then animate and show feedback."""
+        if action.kind == PASS:
+            game.apply(action)
+            autosave.record(action, True)
+            return
+        pawn = game.pawns[action.pawn]
+        sr, sc = pawn.row, pawn.col
+        game.apply(action, success)
+        autosave.record(action, success)
+        for view, p in zip(players, game.players):
+            view.score = p.score
+
+        if success:
+            animate_step(action.pawn, sr, sc, action.row, action.col)
+        show_feedback(screen, success)
+
+    def animate_step(pawn_id, sr, sc, er, ec):
+        # start->end positions for anim
+        sx = start_x + sc * cell_size + cell_size // 2
+        sy = start_y + sr * cell_size + cell_size // 2
+        ex = start_x + ec * cell_size + cell_size // 2
+        ey = start_y + er * cell_size + cell_size // 2
+        move_anim.update({
+            'active': True,
+            'pawn': pawn_id,
+            'pos': (sx, sy),
+            'start_pos': (sx, sy),
+            'end_pos': (ex, ey),
+            'start_ticks': pygame.time.get_ticks(),
+            'turn_done': False
+        })
+
     while running:
         dt = clock.tick(FPS) / 1000.0
         dt = min(max(dt, 0.0), 1.0 / 20.0)
         t = pygame.time.get_ticks() * 0.001
 
         w, h = screen.get_size()
-        bg.resize(w, h)
-        bg.update_and_draw(screen, colorful=True)
+        with profiler.scope("background"):
+            bg.resize(w, h)
+            bg.update_and_draw(screen, colorful=True)
 
         margin_x = 240 + 240
         margin_y = 180 + 50
@@ -761,110 +884,59 @@ def main_game_real(screen, clock, font, num_players, time_limit, board_size, bas
 
         mx, my = pygame.mouse.get_pos()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
-            elif event.type == pygame.VIDEORESIZE:
-                bg.resize(event.w, event.h)
-
-            if not move_anim['active'] and event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mx0, my0 = pygame.mouse.get_pos()
-                current_player = players[current_player_index]
-
-                def cell_at(x, y):
-                    col = (x - start_x) // cell_size
-                    row = (y - start_y) // cell_size
-                    if 0 <= row < board_size and 0 <= col < board_size:
-                        return int(row), int(col)
-                    return None
-
-                hit = cell_at(mx0, my0)
-                if hit is None:
-                    continue
-                r, c = hit
-                cell = board_data[r][c]
-
-                if not selected_pawn:
-                    if cell.pawn and cell.pawn.player == current_player:
-                        selected_pawn = cell.pawn
-                else:
-                    if abs(selected_pawn.row - r) + abs(selected_pawn.col - c) == 1:
-                        if cell.is_hole:
-                            selected_pawn = None
-                            continue
+        with profiler.scope("events"):
+            for event in pygame.event.get():
+                profiler.handle_event(event)
+                if event.type == pygame.QUIT:
+                    pygame.quit(); sys.exit()
+                elif event.type == pygame.VIDEORESIZE:
+                    bg.resize(event.w, event.h)
+                elif replay is not None and event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        return
+                    if event.key in REPLAY_KEYS:
+                        replay.command(REPLAY_KEYS[event.key])
+                        move_anim.update({'active': False, 'pawn': None, 'turn_done': False})
+
+                if (not move_anim['active'] and game.current not in bots and replay is None
+                        and event.type == pygame.MOUSEBUTTONDOWN and event.button == 1):
+                    mx0, my0 = pygame.mouse.get_pos()
+
+                    def cell_at(x, y):
+                        col = (x - start_x) // cell_size
+                        row = (y - start_y) // cell_size
+                        if 0 <= row < board_size and 0 <= col < board_size:
+                            return int(row), int(col)
+                        return None
+
+                    hit = cell_at(mx0, my0)
+                    if hit is None:
+                        continue
+                    r, c = hit
 
-                        sr, sc = selected_pawn.row, selected_pawn.col
-
-                        # MOVE TO EMPTY
-                        if not cell.pawn:
-                            result = ask_question_from_category(screen, font, cell.category, time_limit)
-                            if result:
-                                board_data[sr][sc].pawn = None
-                                selected_pawn.row, selected_pawn.col = r, c
-                                board_data[r][c].pawn = selected_pawn
-                                current_player.score += 1
-
-                                # start->end positions for anim
-                                sx = start_x + sc * cell_size + cell_size // 2
-                                sy = start_y + sr * cell_size + cell_size // 2
-                                ex = start_x + c * cell_size + cell_size // 2
-                                ey = start_y + r * cell_size + cell_size // 2
-                                move_anim.update({
-                                    'active': True,
-                                    'pawn': selected_pawn,
-                                    'start_pos': (sx, sy),
-                                    'end_pos': (ex, ey),
-                                    'start_ticks': pygame.time.get_ticks(),
-                                    'turn_done': False
-                                })
-                                selected_pawn.anim_x, selected_pawn.anim_y = sx, sy
-
-                                selected_pawn = None
-                                show_feedback(screen, True)
-                            else:
-                                show_feedback(screen, False)
-                                selected_pawn = None
-                                current_player_index = (current_player_index + 1) % len(players)
+                    if selected_pawn is None:
+                        occupant = board.pawn_at(r, c)
+                        if occupant != EMPTY and game.pawns[occupant].player == game.current:
+                            selected_pawn = occupant
+                        continue
 
-                        else:
-                            # ATTACK
-                            occupant = cell.pawn
-                            if occupant.player != current_player:
-                                success = ask_two_questions_from_category(screen, font, cell.category, time_limit)
-                                if success:
-                                    board_data[occupant.row][occupant.col].pawn = None
-                                    if occupant in pawns:
-                                        pawns.remove(occupant)
-
-                                    board_data[sr][sc].pawn = None
-                                    selected_pawn.row, selected_pawn.col = r, c
-                                    board_data[r][c].pawn = selected_pawn
-                                    current_player.score += 5
-
-                                    sx = start_x + sc * cell_size + cell_size // 2
-                                    sy = start_y + sr * cell_size + cell_size // 2
-                                    ex = start_x + c * cell_size + cell_size // 2
-                                    ey = start_y + r * cell_size + cell_size // 2
-                                    move_anim.update({
-                                        'active': True,
-                                        'pawn': selected_pawn,
-                                        'start_pos': (sx, sy),
-                                        'end_pos': (ex, ey),
-                                        'start_ticks': pygame.time.get_ticks(),
-                                        'turn_done': False
-                                    })
-                                    selected_pawn.anim_x, selected_pawn.anim_y = sx, sy
-
-                                    selected_pawn = None
-                                    show_feedback(screen, True)
-                                else:
-                                    show_feedback(screen, False)
-                                    selected_pawn = None
-                                    current_player_index = (current_player_index + 1) % len(players)
-                            else:
-                                selected_pawn = None
+                    # holes, own pawns and far tiles just drop the selection
+                    action = game.action_for(selected_pawn, r, c)
+                    selected_pawn = None
+                    if action is None:
+                        continue
+
+                    category = board.category_at(r, c)
+                    player = game.players[game.current].name
+                    seat = game.current
+                    observe = lambda correct: accuracy.observe(seat, category, correct)
+                    if action.kind == MOVE:
+                        success = bool(ask_question_from_category(screen, font, category, time_limit, player, observe))
                     else:
-                        selected_pawn = None
+                        # ATTACK
+                        success = ask_two_questions_from_category(screen, font, category, time_limit, player, observe)
+
+                    play(action, success)
 
         # --- ANIMATION UPDATE ---
         if move_anim['active']:
@@ -879,169 +951,236 @@ def main_game_real(screen, clock, font, num_players, time_limit, board_size, bas
                 te = 1.0 - (1.0 - progress) * (1.0 - progress)
                 sx, sy = move_anim['start_pos']
                 ex, ey = move_anim['end_pos']
-                cur_x = sx + (ex - sx) * te
-                cur_y = sy + (ey - sy) * te
-                move_anim['pawn'].anim_x = cur_x
-                move_anim['pawn'].anim_y = cur_y
+                move_anim['pos'] = (sx + (ex - sx) * te, sy + (ey - sy) * te)
 
         if move_anim.get('turn_done', False):
             move_anim['turn_done'] = False
-            current_player_index = (current_player_index + 1) % len(players)
-
-        valid_moves = get_valid_moves(board_data, selected_pawn, board_size, board_size) if selected_pawn else []
+            if game.winner is not None and replay is None:
+                print(f"{game.players[game.winner].name} Wins!")
+                scheduler.cancel()
+                autosave.clear()
+                path = os.path.join(REPLAY_DIR, time.strftime("%Y%m%d-%H%M%S") + ".srzr")
+                Replay.capture(replay_start, game, {"seed": rng.seed}, first=replay_first).save(path)
+                print(f"Replay saved to {path}")
+                return
+
+        # --- REPLAY PLAYBACK ---
+        if replay is not None and not move_anim['active']:
+            for action, success, src in replay.tick(dt):
+                if replay.animate and success and src is not None:
+                    animate_step(action.pawn, src[0], src[1], action.row, action.col)
+            for view, p in zip(players, game.players):
+                view.score = p.score
+
+        # --- COMPUTER TURN ---
+        bot = bots.get(game.current)
+        if bot is not None and not move_anim['active'] and game.winner is None:
+            # search runs off the render loop; start it once per turn and poll every frame
+            if not scheduler.running:
+                scheduler.start(bot, game)
+            action = scheduler.poll(game)
+            if action is not None:
+                if action.kind == PASS:
+                    play(action, True)
+                else:
+                    category = board.category_at(action.row, action.col)
+                    answers = bot.roll_answers(category, action.kind)
+                    accuracy.observe_answers(game.current, category, answers)
+                    play(action, all(answers))
+
+        valid_moves = move_cache.moves(selected_pawn) if selected_pawn is not None else ()
+        selected_pos = (game.pawns[selected_pawn].row, game.pawns[selected_pawn].col) if selected_pawn is not None else None
+        selected_owner = game.pawns[selected_pawn].player if selected_pawn is not None else None
+        # hint: the highlighted step that walks closest to an enemy flag
+        hint_step = None
+        if valid_moves:
+            hint_step = min(valid_moves, key=lambda rc: dist_maps.nearest_enemy_flag(selected_owner, rc[0] * board_size + rc[1]))
+        threatened = {pid for _, pid in dist_maps.threats(game.current, THREAT_STEPS)}
 
         # --- DRAW TILES WITH 3D ROTATION ---
-        for r in range(board_size):
-            for c in range(board_size):
-                cell = board_data[r][c]
-                cell.rect = pygame.Rect(start_x + c * cell_size, start_y + r * cell_size, cell_size, cell_size)
-
-                # hover detection
-                is_hover = cell.rect.collidepoint(mx, my) and (not cell.is_hole)
-
-                # smooth hover weight so it doesn't "snap"
-                hover_w[r][c] = exp_smooth(hover_w[r][c], 1.0 if is_hover else 0.0, dt, speed=18.0)
-                hw = clamp(hover_w[r][c], 0.0, 1.0)
-
-                # base colors by state (same logic as your original)
-                base_face = GRAY
-                border_col = BLACK
-
-                if selected_pawn and (r, c) == (selected_pawn.row, selected_pawn.col):
-                    base_face = blend(GRAY, YELLOW, 0.65)
-                    border_col = YELLOW
-                elif (r, c) in valid_moves:
-                    if cell.pawn and selected_pawn and cell.pawn.player != selected_pawn.player:
-                        base_face = blend(GRAY, LIGHT_RED, 0.65)
-                        border_col = LIGHT_RED
+        with profiler.scope("tiles"):
+            for r in range(board_size):
+                for c in range(board_size):
+                    i = r * board_size + c
+                    is_hole = board.hole[i]
+                    occupant = board.occupant[i]
+                    cell_rect = pygame.Rect(start_x + c * cell_size, start_y + r * cell_size, cell_size, cell_size)
+
+                    # hover detection
+                    is_hover = cell_rect.collidepoint(mx, my) and (not is_hole)
+
+                    # smooth hover weight so it doesn't "snap"
+                    hover_w[r][c] = exp_smooth(hover_w[r][c], 1.0 if is_hover else 0.0, dt, speed=18.0)
+                    hw = clamp(hover_w[r][c], 0.0, 1.0)
+
+                    # base colors by state (same logic as your original)
+                    base_face = GRAY
+                    border_col = BLACK
+
+                    if (r, c) == selected_pos:
+                        base_face = blend(GRAY, YELLOW, 0.65)
+                        border_col = YELLOW
+                    elif (r, c) in valid_moves:
+                        if occupant != EMPTY and game.pawns[occupant].player != selected_owner:
+                            base_face = blend(GRAY, LIGHT_RED, 0.65)
+                            border_col = LIGHT_RED
+                        else:
+                            base_face = blend(GRAY, LIGHT_GREEN, 0.65)
+                            border_col = WHITE if (r, c) == hint_step else LIGHT_GREEN
+                    elif occupant in threatened:
+                        base_face = blend(GRAY, RED_WARNING, 0.35)
+                        border_col = RED_WARNING
+                    elif is_hover:
+                        base_face = blend(GRAY, CARD_HOVER, 0.55)
+                        border_col = WHITE
+
+                    cat_color = category_colors.get(board.category[i], (128, 128, 128))
+
+                    # --- ROTATION TARGETS ---
+                    # Idle spherical path: sin for X, cos for Y (your description)
+                    idle_amp = 0.10  # radians-ish
+                    ph = phases[r][c]
+                    idle_rx = math.sin(t * 1.15 + ph) * idle_amp
+                    idle_ry = math.cos(t * 1.15 + ph * 1.13) * idle_amp
+
+                    # Hover: mouse distance from center controls rotation
+                    cx, cy = cell_rect.center
+                    nx = clamp((mx - cx) / max(1.0, cell_rect.w * 0.5), -1.0, 1.0)
+                    ny = clamp((my - cy) / max(1.0, cell_rect.h * 0.5), -1.0, 1.0)
+                    dist = clamp(math.hypot(nx, ny), 0.0, 1.0)
+                    dist = smoothstep01(dist)
+
+                    hover_amp = 0.25  # make it obvious
+                    hov_rx = (-ny) * dist * hover_amp
+                    hov_ry = (nx) * dist * hover_amp
+
+                    # Blend idle->hover by smoothed hover weight
+                    target_rx = lerp(idle_rx, hov_rx, hw)
+                    target_ry = lerp(idle_ry, hov_ry, hw)
+
+                    # Smooth angles to kill jitter/flicker
+                    rot_x[r][c] = exp_smooth(rot_x[r][c], target_rx, dt, speed=14.0)
+                    rot_y[r][c] = exp_smooth(rot_y[r][c], target_ry, dt, speed=14.0)
+
+                    rx = clamp(rot_x[r][c], -1.05, 1.05)
+                    ry = clamp(rot_y[r][c], -1.05, 1.05)
+
+                    if is_hole:
+                        # hole stays flat
+                        flat = render_tile_flat(max(12, int(cell_size * 0.92)), base_face, cat_color, border_col, is_hole=True)
+                        rr = flat.get_rect(center=cell_rect.center)
+                        screen.blit(flat, rr)
+                        continue
+
+                    # render flat tile at slightly smaller size (prevents overlap)
+                    tile_px = max(12, int(cell_size * 0.90))
+                    flat = render_tile_flat(tile_px, base_face, cat_color, border_col, is_hole=False)
+
+                    # apply tilt only if it matters
+                    if abs(rx) + abs(ry) < 0.02:
+                        warped = flat
                     else:
-                        base_face = blend(GRAY, LIGHT_GREEN, 0.65)
-                        border_col = LIGHT_GREEN
-                elif is_hover:
-                    base_face = blend(GRAY, CARD_HOVER, 0.55)
-                    border_col = WHITE
-
-                cat_color = category_colors.get(cell.category, (128, 128, 128))
-
-                # --- ROTATION TARGETS ---
-                # Idle spherical path: sin for X, cos for Y (your description)
-                idle_amp = 0.10  # radians-ish
-                ph = phases[r][c]
-                idle_rx = math.sin(t * 1.15 + ph) * idle_amp
-                idle_ry = math.cos(t * 1.15 + ph * 1.13) * idle_amp
-
-                # Hover: mouse distance from center controls rotation
-                cx, cy = cell.rect.center
-                nx = clamp((mx - cx) / max(1.0, cell.rect.w * 0.5), -1.0, 1.0)
-                ny = clamp((my - cy) / max(1.0, cell.rect.h * 0.5), -1.0, 1.0)
-                dist = clamp(math.hypot(nx, ny), 0.0, 1.0)
-                dist = smoothstep01(dist)
-
-                hover_amp = 0.25  # make it obvious
-                hov_rx = (-ny) * dist * hover_amp
-                hov_ry = (nx) * dist * hover_amp
-
-                # Blend idle->hover by smoothed hover weight
-                target_rx = lerp(idle_rx, hov_rx, hw)
-                target_ry = lerp(idle_ry, hov_ry, hw)
-
-                # Smooth angles to kill jitter/flicker
-                rot_x[r][c] = exp_smooth(rot_x[r][c], target_rx, dt, speed=14.0)
-                rot_y[r][c] = exp_smooth(rot_y[r][c], target_ry, dt, speed=14.0)
-
-                rx = clamp(rot_x[r][c], -1.05, 1.05)
-                ry = clamp(rot_y[r][c], -1.05, 1.05)
-
-                if cell.is_hole:
-                    # hole stays flat
-                    flat = render_tile_flat(max(12, int(cell_size * 0.92)), base_face, cat_color, border_col, is_hole=True)
-                    rr = flat.get_rect(center=cell.rect.center)
-                    screen.blit(flat, rr)
-                    continue
-
-                # render flat tile at slightly smaller size (prevents overlap)
-                tile_px = max(12, int(cell_size * 0.90))
-                flat = render_tile_flat(tile_px, base_face, cat_color, border_col, is_hole=False)
-
-                # apply tilt only if it matters
-                if abs(rx) + abs(ry) < 0.02:
-                    warped = flat
-                else:
-                    warped = tilt_surface(flat, rx, ry)
+                        warped = tilt_surface(flat, rx, ry)
 
-                # shadow from tilt direction
-                sh_off_x = int(math.sin(ry) * (cell_size * 0.14))
-                sh_off_y = int(math.sin(rx) * (cell_size * 0.14)) + 3
+                    # shadow from tilt direction
+                    sh_off_x = int(math.sin(ry) * (cell_size * 0.14))
+                    sh_off_y = int(math.sin(rx) * (cell_size * 0.14)) + 3
 
-                shadow = pygame.Surface(warped.get_size(), pygame.SRCALPHA)
-                shadow.fill((0, 0, 0, 85))
+                    shadow = pygame.Surface(warped.get_size(), pygame.SRCALPHA)
+                    shadow.fill((0, 0, 0, 85))
 
-                # pivot in the middle: always blit centered on cell center
-                cx, cy = cell.rect.center
-                sh_rect = shadow.get_rect(center=(cx + sh_off_x, cy + sh_off_y))
-                wr_rect = warped.get_rect(center=(cx, cy))
+                    # pivot in the middle: always blit centered on cell center
+                    cx, cy = cell_rect.center
+                    sh_rect = shadow.get_rect(center=(cx + sh_off_x, cy + sh_off_y))
+                    wr_rect = warped.get_rect(center=(cx, cy))
 
-                screen.blit(shadow, sh_rect)
-                screen.blit(warped, wr_rect)
+                    screen.blit(shadow, sh_rect)
+                    screen.blit(warped, wr_rect)
 
-                # small category dot in the real board cell corner (optional extra clarity)
-                # (kept subtle so it doesn't fight the warped surface)
-                if not cell.is_hole:
-                    dot = pygame.Rect(cell.rect.x + 2, cell.rect.y + 2, max(3, int(cell_size * 0.10)), max(3, int(cell_size * 0.10)))
-                    pygame.draw.rect(screen, cat_color, dot)
+                    # small category dot in the real board cell corner (optional extra clarity)
+                    # (kept subtle so it doesn't fight the warped surface)
+                    if not is_hole:
+                        dot = pygame.Rect(cell_rect.x + 2, cell_rect.y + 2, max(3, int(cell_size * 0.10)), max(3, int(cell_size * 0.10)))
+                        pygame.draw.rect(screen, cat_color, dot)
 
-                # pawn drawn later (unchanged)
+                    # pawn drawn later (unchanged)
 
         # --- DRAW PAWNS (same as yours, with move anim) ---
-        for r in range(board_size):
-            for c in range(board_size):
-                cell = board_data[r][c]
-                if cell.pawn:
-                    pawn_obj = cell.pawn
-                    base_icon = icon_map.get((pawn_obj.player, pawn_obj.is_flag))
-                    if not base_icon:
-                        continue
+        with profiler.scope("pawns"):
+            for r in range(board_size):
+                for c in range(board_size):
+                    pawn_id = board.occupant[r * board_size + c]
+                    if pawn_id != EMPTY:
+                        pawn_obj = game.pawns[pawn_id]
+                        base_icon = icon_map.get((players[pawn_obj.player], pawn_obj.is_flag))
+                        if not base_icon:
+                            continue
 
-                    is_anim = (move_anim['pawn'] == pawn_obj)
-                    if is_anim:
-                        px, py = int(pawn_obj.anim_x), int(pawn_obj.anim_y)
-                    else:
-                        px, py = cell.rect.center
+                        is_anim = (move_anim['pawn'] == pawn_id)
+                        if is_anim:
+                            px, py = int(move_anim['pos'][0]), int(move_anim['pos'][1])
+                        else:
+                            px = start_x + c * cell_size + cell_size // 2
+                            py = start_y + r * cell_size + cell_size // 2
 
-                    scaled_icon = pygame.transform.scale(base_icon, (pawn_size, pawn_size))
-                    if pawn_obj == selected_pawn and not is_anim:
-                        pulse_scale = 1.0 + 0.1 * math.sin(pygame.time.get_ticks() * 0.01)
-                        final_size = int(pawn_size * pulse_scale)
-                        final_size = max(10, final_size)
-                        scaled_icon = pygame.transform.scale(base_icon, (final_size, final_size))
+                        scaled_icon = pygame.transform.scale(base_icon, (pawn_size, pawn_size))
+                        if pawn_id == selected_pawn and not is_anim:
+                            pulse_scale = 1.0 + 0.1 * math.sin(pygame.time.get_ticks() * 0.01)
+                            final_size = int(pawn_size * pulse_scale)
+                            final_size = max(10, final_size)
+                            scaled_icon = pygame.transform.scale(base_icon, (final_size, final_size))
 
-                    icon_rect = scaled_icon.get_rect(center=(px, py))
-                    screen.blit(scaled_icon, icon_rect)
+                        icon_rect = scaled_icon.get_rect(center=(px, py))
+                        screen.blit(scaled_icon, icon_rect)
 
         # HUD
-        hud_bg = pygame.Surface((180, 150), pygame.SRCALPHA)
-        pygame.draw.rect(hud_bg, (0, 0, 0, 180), (0, 0, 180, 150), border_radius=10)
-        screen.blit(hud_bg, (10, 10))
-        y_offset = 10
-        for p in players:
-            text = f"{p.name} (Score: {p.score})"
-            surf = font.render(text, True, p.color)
-            screen.blit(surf, (20, y_offset))
-            y_offset += 30
-
-        draw_legend(screen, font, x_start=10, y_start=200)
-        draw_current_player_display(screen, font, players[current_player_index], icon_map, x_start=w - 210, y_start=50)
-
-        pygame.display.flip()
-
-if __name__ == "__main__":
+        with profiler.scope("hud"):
+            hud_bg = pygame.Surface((180, 150), pygame.SRCALPHA)
+            pygame.draw.rect(hud_bg, (0, 0, 0, 180), (0, 0, 180, 150), border_radius=10)
+            screen.blit(hud_bg, (10, 10))
+            y_offset = 10
+            for p in players:
+                text = f"{p.name} (Score: {p.score})"
+                surf = font.render(text, True, p.color)
+                screen.blit(surf, (20, y_offset))
+                y_offset += 30
+
+            draw_legend(screen, font, x_start=10, y_start=200)
+            draw_current_player_display(screen, font, players[game.current], icon_map, x_start=w - 210, y_start=50)
+            if scheduler.running:
+                think_surf = font.render(f"Thinking... depth {scheduler.depth}", True, GRAY)
+                screen.blit(think_surf, think_surf.get_rect(center=(w - 110, 325)))
+            if replay is not None:
+                replay_surf = font.render(replay.status(), True, GRAY)
+                screen.blit(replay_surf, replay_surf.get_rect(center=(w - 110, 325)))
+
+        profiler.draw_overlay_surface(screen, font)
+        with profiler.scope("flip"):
+            pygame.display.flip()
+        profiler.end_frame()
+
+def open_window():
     screen = pygame.display.set_mode((DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT), pygame.RESIZABLE)
     pygame.display.set_caption("Trivia Strategy Game")
     clock = pygame.time.Clock()
     title_font = pygame.font.SysFont("Arial", 48, bold=True)
     game_font = pygame.font.SysFont("Arial", 20)
+    return screen, clock, title_font, game_font
+
+def run_replay(player):
+    """Watch a ReplayPlayer on the board view (python replay.py FILE)."""
+    screen, clock, title_font, game_font = open_window()
+    pawn_img, flag_img = load_assets()
+    state = player.state
+    main_game_real(screen, clock, game_font, len(state.players), 30, state.board.size, pawn_img, flag_img,
+                   replay=player)
+
+if __name__ == "__main__":
+    screen, clock, title_font, game_font = open_window()
 
     while True:
         splash_screen(screen, clock, title_font)
-        num_players, time_limit, board_size, pawn_img, flag_img = menu_loop(screen, clock, title_font, game_font)
-        main_game_real(screen, clock, game_font, num_players, time_limit, board_size, pawn_img, flag_img)
+        num_players, time_limit, board_size, ai_players, pawn_img, flag_img, load_game = menu_loop(screen, clock, title_font, game_font)
+        saved = Autosave.resume(SAVE_FILE) if load_game else None
+        main_game_real(screen, clock, game_font, num_players, time_limit, board_size, pawn_img, flag_img,
+                       ai_players, saved)
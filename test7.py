@@ -1,12 +1,33 @@
+import os
 import sys
-import csv
-import random
+import time
 import math
+import itertools
 import pygame
 import numpy as np
 import moderngl
 
-pygame.init()
+from gl_ui import GLUI, SoftwareUI
+from gl_text import localization_charset
+from profiler import profiler
+from game_state import GameState, MoveCache, EMPTY, MOVE, PASS
+from board_gen import generate_holes
+from ai import ExpectimaxAI, AccuracyModel
+from mcts import MCTSAI
+from ai_scheduler import shared_scheduler
+from distance_maps import DistanceMaps
+from question_store import shared_questions
+from question_sampler import QuestionSampler, SEEN_FILE
+from difficulty import DifficultyEngine
+from rng_streams import shared_rng, seed_from_env
+from savegame import Autosave, has_save
+from replay import Replay
+
+# spawned AI workers (ai_scheduler) import this file as __mp_main__; they need none of the setup
+IN_AI_WORKER = __name__ == "__mp_main__"
+
+if not IN_AI_WORKER:
+    pygame.init()
 
 # --- Constants ---
 DEFAULT_WINDOW_WIDTH = 900
@@ -14,6 +35,19 @@ DEFAULT_WINDOW_HEIGHT = 700
 FPS = 60
 
 HOLE_COUNT = 6
+# computer players search in the background (ai_scheduler) for this long per move
+AI_MOVE_TIME = 0.6
+# from this board size on, bots use process-parallel MCTS instead of expectimax
+MCTS_MIN_BOARD = 16
+SAVE_FILE = "savegame.json"   # same file and schema as the Lua build
+REPLAY_DIR = "replays"        # every finished game is kept here as a .srzr replay
+THREAT_STEPS = 3          # enemy pawns this close (walking) to the flag on turn are outlined
+# replay viewer keys -> ReplayPlayer.command(); Esc leaves
+REPLAY_KEYS = {
+    pygame.K_SPACE: "pause", pygame.K_RIGHT: "next", pygame.K_LEFT: "prev",
+    pygame.K_PAGEDOWN: "forward", pygame.K_PAGEUP: "back",
+    pygame.K_UP: "faster", pygame.K_DOWN: "slower", pygame.K_a: "anim",
+}
 
 # Colors
 WHITE = (255, 255, 255)
@@ -38,6 +72,10 @@ category_colors = {
 
 AUDIO_FILE = "shadertoy.mp3"
 
+# Draw board/HUD/panels as batched GL quads; False falls back to the
+# software overlay surface (pygame.draw + full texture upload per frame).
+USE_GL_UI = True
+
 # -----------------------------
 # Galaxy shader background renderer (ModernGL + audio FFT -> iChannel0)
 # -----------------------------
@@ -163,39 +201,49 @@ void main() {
 """
 
 class GalaxyRenderer:
-    def __init__(self, win_w: int, win_h: int, audio_file: str):
+    def __init__(self, win_w: int, win_h: int, audio_file, use_gl_ui: bool = USE_GL_UI, ctx=None):
+        """
+        audio_file=None runs silent (flat FFT texture, no music); passing a
+        standalone ctx renders into an offscreen framebuffer instead of the
+        window (used by the headless benchmarks).
+        """
         # ---- audio ----
-        pygame.mixer.pre_init(44100, -16, 2, 512)
-        pygame.mixer.init()
-
-        try:
-            pygame.mixer.music.load(audio_file)
-            pygame.mixer.music.play(-1)
-        except Exception as e:
-            raise RuntimeError(
-                f"[AUDIO] Can't load/play {audio_file}: {e}\n"
-                f"Put {audio_file} next to the script. If mp3 decode is flaky, convert to WAV."
-            )
-
-        try:
-            snd = pygame.mixer.Sound(audio_file)
-            arr = pygame.sndarray.array(snd)
-        except Exception as e:
-            raise RuntimeError(
-                f"[AUDIO] Can't decode samples for FFT from {audio_file}: {e}\n"
-                f"Convert to WAV (shadertoy.wav) and update AUDIO_FILE."
-            )
-
-        mix_init = pygame.mixer.get_init()
-        if not mix_init:
-            raise RuntimeError("pygame.mixer not initialized")
-        self.sample_rate, _fmt, ch = mix_init
-
-        if arr.ndim == 2:
-            mono = arr.astype(np.float32).mean(axis=1)
+        self.music = audio_file is not None
+        if self.music:
+            pygame.mixer.pre_init(44100, -16, 2, 512)
+            pygame.mixer.init()
+
+            try:
+                pygame.mixer.music.load(audio_file)
+                pygame.mixer.music.play(-1)
+            except Exception as e:
+                raise RuntimeError(
+                    f"[AUDIO] Can't load/play {audio_file}: {e}\n"
+                    f"Put {audio_file} next to the script. If mp3 decode is flaky, convert to WAV."
+                )
+
+            try:
+                snd = pygame.mixer.Sound(audio_file)
+                arr = pygame.sndarray.array(snd)
+            except Exception as e:
+                raise RuntimeError(
+                    f"[AUDIO] Can't decode samples for FFT from {audio_file}: {e}\n"
+                    f"Convert to WAV (shadertoy.wav) and update AUDIO_FILE."
+                )
+
+            mix_init = pygame.mixer.get_init()
+            if not mix_init:
+                raise RuntimeError("pygame.mixer not initialized")
+            self.sample_rate, _fmt, ch = mix_init
+
+            if arr.ndim == 2:
+                mono = arr.astype(np.float32).mean(axis=1)
+            else:
+                mono = arr.astype(np.float32)
+            mono *= (1.0 / 32768.0)
         else:
-            mono = arr.astype(np.float32)
-        mono *= (1.0 / 32768.0)
+            self.sample_rate = 44100
+            mono = np.zeros(self.sample_rate, dtype=np.float32)
         self.mono = mono
         self.total_samples = mono.shape[0]
 
@@ -207,7 +255,9 @@ class GalaxyRenderer:
         self.prev_fft = np.zeros(self.FFT_TEX_W, dtype=np.float32)
 
         # ---- GL ----
-        self.ctx = moderngl.create_context(require=330)
+        self.offscreen = ctx is not None
+        self.ctx = ctx if ctx is not None else moderngl.create_context(require=330)
+        self.fbo = None
         self.ctx.enable(moderngl.BLEND)
         self.ctx.blend_func = (moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA)
 
@@ -235,6 +285,8 @@ class GalaxyRenderer:
 
         # overlay texture (RGBA8)
         self.overlay_tex = None
+        self.use_gl_ui = use_gl_ui
+        self.ui = None
         self.resize(win_w, win_h)
 
     def resize(self, win_w: int, win_h: int):
@@ -244,6 +296,11 @@ class GalaxyRenderer:
         # update shader resolution
         self.bg_prog["iResolution"].value = (float(self.win_w), float(self.win_h), 1.0)
 
+        if self.offscreen:
+            if self.fbo is not None:
+                self.fbo.release()
+            self.fbo = self.ctx.simple_framebuffer((self.win_w, self.win_h))
+
         # recreate overlay texture to match window size
         if self.overlay_tex is not None:
             self.overlay_tex.release()
@@ -252,9 +309,22 @@ class GalaxyRenderer:
         self.overlay_tex.repeat_x = False
         self.overlay_tex.repeat_y = False
 
-        # new software overlay surface (draw everything here)
+        # new software overlay surface (fallback UI path draws everything here)
         self.overlay_surface = pygame.Surface((self.win_w, self.win_h), pygame.SRCALPHA)
 
+        if self.ui is None:
+            if self.use_gl_ui:
+                self.ui = GLUI(self.ctx, self.win_w, self.win_h)
+            else:
+                self.ui = SoftwareUI(self.overlay_surface)
+        elif self.use_gl_ui:
+            self.ui.resize(self.win_w, self.win_h)
+        else:
+            self.ui.resize(self.overlay_surface)
+
+    def begin_frame(self):
+        self.ui.begin()
+
     def _build_fft_row(self, play_time_sec: float) -> np.ndarray:
         center = int(play_time_sec * self.sample_rate) % self.total_samples
         half = self.FFT_WINDOW // 2
@@ -290,7 +360,7 @@ class GalaxyRenderer:
         return out
 
     def _update_audio_tex(self, t: float):
-        pos_ms = pygame.mixer.music.get_pos()
+        pos_ms = pygame.mixer.music.get_pos() if self.music else -1
         play_time = (pos_ms / 1000.0) if pos_ms >= 0 else t
 
         fft_now = self._build_fft_row(play_time)
@@ -303,26 +373,37 @@ class GalaxyRenderer:
         self.audio_tex.write(audio_img.tobytes())
 
     def present(self, t: float):
-        # upload overlay surface into GL texture
+        # upload overlay surface into GL texture (software UI path only;
+        # the GL path draws shapes, sprites and glyph-atlas text as quads)
         # NOTE: flip vertically so uv matches
-        rgba = pygame.image.tostring(self.overlay_surface, "RGBA", True)
-        self.overlay_tex.write(rgba)
+        if not self.use_gl_ui:
+            with profiler.scope("overlay_upload"):
+                rgba = pygame.image.tostring(self.overlay_surface, "RGBA", True)
+                self.overlay_tex.write(rgba)
 
-        self._update_audio_tex(t)
+        with profiler.scope("audio_fft"):
+            self._update_audio_tex(t)
 
         # render background to screen
-        self.ctx.screen.use()
-        self.ctx.viewport = (0, 0, self.win_w, self.win_h)
+        with profiler.scope("galaxy_bg"):
+            (self.fbo if self.offscreen else self.ctx.screen).use()
+            self.ctx.viewport = (0, 0, self.win_w, self.win_h)
 
-        self.bg_prog["iTime"].value = float(t)
-        self.audio_tex.use(location=1)
-        self.bg_vao.render(mode=moderngl.TRIANGLE_STRIP)
+            self.bg_prog["iTime"].value = float(t)
+            self.audio_tex.use(location=1)
+            self.bg_vao.render(mode=moderngl.TRIANGLE_STRIP)
+
+        # batched UI quads (no-op on the software path)
+        with profiler.scope("ui_flush"):
+            self.ui.flush()
 
         # render overlay on top
-        self.overlay_tex.use(location=0)
-        self.ov_vao.render(mode=moderngl.TRIANGLE_STRIP)
+        if not self.use_gl_ui:
+            self.overlay_tex.use(location=0)
+            self.ov_vao.render(mode=moderngl.TRIANGLE_STRIP)
 
-        pygame.display.flip()
+        with profiler.scope("swap"):
+            pygame.display.flip()
 
 
 # --- Classes ---
@@ -364,20 +445,19 @@ class Button:
         self.rect.centerx = screen_w // 2 + self.rel_x
         self.rect.centery = screen_h // 2 + self.rel_y
 
-    def draw(self, screen, font, glitch_offset=(0,0)):
+    def draw(self, ui, font, glitch_offset=(0,0)):
         draw_color = self.hover_color if self.is_hovered else self.color
         gx, gy = glitch_offset
         draw_rect = self.rect.move(gx, gy)
 
-        pygame.draw.rect(screen, (245, 235, 220, 255), draw_rect, border_radius=8)
-        pygame.draw.rect(screen, (*draw_color, 255), draw_rect.inflate(-6, -6), border_radius=4)
-        pygame.draw.rect(screen, (20, 20, 20, 255), draw_rect, 2, border_radius=8)
+        ui.rect(draw_rect, (245, 235, 220, 255), radius=8)
+        ui.rect(draw_rect.inflate(-6, -6), (*draw_color, 255), radius=4)
+        ui.border(draw_rect, (20, 20, 20, 255), 2, radius=8)
 
-        text_surf = font.render(self.text, True, (20, 20, 20))
-        text_rect = text_surf.get_rect(center=draw_rect.center)
+        cx, cy = draw_rect.center
         if abs(gx) > 2:
-            text_rect.x += random.randint(-2, 2)
-        screen.blit(text_surf, text_rect)
+            cx += shared_rng().cosmetic.randint(-2, 2)
+        ui.text(font, self.text, (20, 20, 20), center=(cx, cy))
 
     def check_hover(self, mouse_pos):
         self.is_hovered = self.rect.collidepoint(mouse_pos)
@@ -419,65 +499,56 @@ def load_assets():
     return pawn_img, flag_img
 
 # --- Data ---
-def load_questions_from_csv(filename):
-    questions_by_category = {}
-    try:
-        with open(filename, mode="r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) < 5:
-                    continue
-                category, question, correct, w1, w2, w3 = row
-                category = category.strip()
-                if category not in questions_by_category:
-                    questions_by_category[category] = []
-                questions_by_category[category].append(
-                    {"question": question, "correct": correct, "wrong": [w1, w2, w3]}
-                )
-    except FileNotFoundError:
-        print(f"Warning: File '{filename}' not found.")
-    return questions_by_category
-
-questions_by_category = load_questions_from_csv("questions.csv")
+if not IN_AI_WORKER:
+    questions = shared_questions()
+    question_sampler = QuestionSampler(questions, seen_path=SEEN_FILE)
+    difficulty_engine = DifficultyEngine(questions)
 
 def get_random_question_any():
-    if not questions_by_category:
-        return None
-    all_cats = list(questions_by_category.keys())
-    category = random.choice(all_cats)
-    if not questions_by_category[category]:
-        return None
-    return random.choice(questions_by_category[category])
-
-def get_random_question_from(category):
-    if category in questions_by_category and questions_by_category[category]:
-        return random.choice(questions_by_category[category])
-    return get_random_question_any()
+    return question_sampler.draw_any(shared_rng().questions)
+
+def get_random_question_from(category, player=None):
+    # with a player: a question near their level, avoiding recently asked ones
+    rng = shared_rng().questions
+    if player is not None:
+        qdata = difficulty_engine.draw(player, category, rng, avoid=question_sampler.is_recent)
+        if qdata is not None:
+            question_sampler.note(qdata["category"], qdata["id"])
+            return qdata
+    return question_sampler.draw(category, rng)
 
 # --- UI helpers ---
-def draw_dim_panel(screen, alpha=130):
-    w, h = screen.get_size()
-    dim = pygame.Surface((w, h), pygame.SRCALPHA)
-    dim.fill((0, 0, 0, alpha))
-    screen.blit(dim, (0, 0))
+_font_cache = {}
+
+def get_font(name, size, bold=False):
+    # fonts are glyph-atlas keys, so reuse one object per (name, size, bold)
+    key = (name, size, bold)
+    font = _font_cache.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size, bold=bold)
+        _font_cache[key] = font
+    return font
+
+def draw_dim_panel(ui, alpha=130):
+    ui.fill((0, 0, 0, alpha))
 
 def show_feedback(renderer: GalaxyRenderer, correct: bool):
-    screen = renderer.overlay_surface
-    screen.fill((0, 0, 0, 0))
-    draw_dim_panel(screen, 120)
+    ui = renderer.ui
+    renderer.begin_frame()
+    draw_dim_panel(ui, 120)
 
-    w, h = screen.get_size()
+    w, h = ui.size
     feedback_rect = pygame.Rect(0, 0, 420, 320)
     feedback_rect.center = (w//2, h//2)
 
-    panel = pygame.Surface((feedback_rect.w, feedback_rect.h), pygame.SRCALPHA)
-    panel.fill((245, 245, 245, 240))
-    screen.blit(panel, feedback_rect.topleft)
-    pygame.draw.rect(screen, (10, 10, 10, 255), feedback_rect, 3, border_radius=12)
+    ui.rect(feedback_rect, (245, 245, 245, 240))
+    ui.border(feedback_rect, (10, 10, 10, 255), 3, radius=12)
 
-    big_font = pygame.font.SysFont(None, 200)
-    text_surf = big_font.render("✓", True, (0, 200, 0)) if correct else big_font.render("X", True, (200, 0, 0))
-    screen.blit(text_surf, text_surf.get_rect(center=feedback_rect.center))
+    big_font = get_font(None, 200)
+    if correct:
+        ui.text(big_font, "✓", (0, 200, 0), center=feedback_rect.center)
+    else:
+        ui.text(big_font, "X", (200, 0, 0), center=feedback_rect.center)
 
     renderer.present(pygame.time.get_ticks() * 0.001)
 
@@ -489,19 +560,29 @@ def show_feedback(renderer: GalaxyRenderer, correct: bool):
         if pygame.time.get_ticks() - start_time > 900:
             break
 
-def ask_question_from_category(renderer: GalaxyRenderer, font, category, time_limit):
-    qdata = get_random_question_from(category)
+def ask_question_from_category(renderer: GalaxyRenderer, font, category, time_limit, player=None, observe=None):
+    # observe(correct) is told every answer (the AI's accuracy model)
+    qdata = get_random_question_from(category, player)
     if not qdata:
         return None
+    correct = show_question(renderer, font, qdata, time_limit)
+    if player is not None:
+        difficulty_engine.record(player, qdata, correct)
+    if observe is not None:
+        observe(correct)
+    return correct
+
+def show_question(renderer: GalaxyRenderer, font, qdata, time_limit):
+    """Ask qdata until answered or time runs out; True for the right answer."""
 
     question_text = qdata["question"]
     correct_answer = qdata["correct"]
     wrong_answers = qdata["wrong"]
     answers = [correct_answer] + wrong_answers
-    random.shuffle(answers)
+    shared_rng().answers.shuffle(answers)
 
-    screen = renderer.overlay_surface
-    w, h = screen.get_size()
+    ui = renderer.ui
+    w, h = ui.size
 
     question_box = pygame.Rect(0, 0, 640, 340)
     if w < 740:
@@ -523,12 +604,12 @@ def ask_question_from_category(renderer: GalaxyRenderer, font, category, time_li
     while True:
         # events first
         for event in pygame.event.get():
+            profiler.handle_event(event)
             if event.type == pygame.QUIT:
                 pygame.quit(); sys.exit()
             elif event.type == pygame.VIDEORESIZE:
                 _reset_gl_window(renderer, event.w, event.h)
-                screen = renderer.overlay_surface
-                w, h = screen.get_size()
+                w, h = ui.size
 
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 mx, my = pygame.mouse.get_pos()
@@ -544,70 +625,64 @@ def ask_question_from_category(renderer: GalaxyRenderer, font, category, time_li
             return False
 
         # draw
-        screen.fill((0, 0, 0, 0))
-        draw_dim_panel(screen, 150)
-
-        pct = time_left / time_limit
-        fill_width = int(bar_width * pct)
-        bar_color = GREEN_BAR if pct > 0.5 else (YELLOW_BAR if pct > 0.2 else RED_WARNING)
-
-        pygame.draw.rect(screen, (180, 180, 180, 220), (bar_x, bar_y, bar_width, bar_height), border_radius=6)
-        pygame.draw.rect(screen, (*bar_color, 255), (bar_x, bar_y, fill_width, bar_height), border_radius=6)
-        pygame.draw.rect(screen, (10, 10, 10, 255), (bar_x, bar_y, bar_width, bar_height), 2, border_radius=6)
-
-        panel = pygame.Surface((question_box.w, question_box.h), pygame.SRCALPHA)
-        panel.fill((245, 245, 245, 240))
-        screen.blit(panel, question_box.topleft)
-        pygame.draw.rect(screen, (10, 10, 10, 255), question_box, 3, border_radius=12)
-
-        # word wrap
-        words = question_text.split(' ')
-        lines = []
-        current = ""
-        for word in words:
-            if font.size(current + word)[0] < question_box.width - 2 * margin:
-                current += word + " "
-            else:
-                lines.append(current)
-                current = word + " "
-        lines.append(current)
-
-        y_offset = question_box.y + margin
-        for line in lines:
-            screen.blit(font.render(line, True, (10, 10, 10)), (question_box.x + margin, y_offset))
-            y_offset += 30
-
-        answer_rects.clear()
-        start_y = y_offset + 18
-        for i, ans in enumerate(answers):
-            ans_surf = font.render(f"{chr(65+i)}: {ans}", True, (10, 10, 10))
-            ans_rect = ans_surf.get_rect()
-            ans_rect.topleft = (question_box.x + margin, start_y + i * 40)
-            screen.blit(ans_surf, ans_rect)
-            answer_rects.append((ans_rect, ans))
-
+        with profiler.scope("question_draw"):
+            renderer.begin_frame()
+            draw_dim_panel(ui, 150)
+
+            pct = time_left / time_limit
+            fill_width = int(bar_width * pct)
+            bar_color = GREEN_BAR if pct > 0.5 else (YELLOW_BAR if pct > 0.2 else RED_WARNING)
+
+            ui.rect((bar_x, bar_y, bar_width, bar_height), (180, 180, 180, 220), radius=6)
+            ui.rect((bar_x, bar_y, fill_width, bar_height), (*bar_color, 255), radius=6)
+            ui.border((bar_x, bar_y, bar_width, bar_height), (10, 10, 10, 255), 2, radius=6)
+
+            ui.rect(question_box, (245, 245, 245, 240))
+            ui.border(question_box, (10, 10, 10, 255), 3, radius=12)
+
+            # word wrap
+            words = question_text.split(' ')
+            lines = []
+            current = ""
+            for word in words:
+                if font.size(current + word)[0] < question_box.width - 2 * margin:
+                    current += word + " "
+                else:
+                    lines.append(current)
+                    current = word + " "
+            lines.append(current)
+
+            y_offset = question_box.y + margin
+            for line in lines:
+                ui.text(font, line, (10, 10, 10), topleft=(question_box.x + margin, y_offset))
+                y_offset += 30
+
+            answer_rects.clear()
+            start_y = y_offset + 18
+            for i, ans in enumerate(answers):
+                ans_rect = ui.text(font, f"{chr(65+i)}: {ans}", (10, 10, 10),
+                                   topleft=(question_box.x + margin, start_y + i * 40))
+                answer_rects.append((ans_rect, ans))
+
+        profiler.draw_overlay(ui, font)
         renderer.present(pygame.time.get_ticks() * 0.001)
+        profiler.end_frame()
         clock.tick(FPS)
 
-def ask_two_questions_from_category(renderer: GalaxyRenderer, font, category, time_limit):
+def ask_two_questions_from_category(renderer: GalaxyRenderer, font, category, time_limit, player=None, observe=None):
     for _ in range(2):
-        result = ask_question_from_category(renderer, font, category, time_limit)
+        result = ask_question_from_category(renderer, font, category, time_limit, player, observe)
         if result is None or not result:
             return False
     return True
 
 # --- Game Logic ---
 def place_random_holes(board, rows, cols, hole_count=HOLE_COUNT):
-    free_positions = []
-    for r in range(rows):
-        for c in range(cols):
-            if board[r][c].pawn is None:
-                free_positions.append((r, c))
-    if hole_count > len(free_positions):
-        hole_count = len(free_positions)
-    chosen = random.sample(free_positions, hole_count)
-    for r, c in chosen:
-        board[r][c].is_hole = True
+    # same sampling as before, but holes never cut the (square) board apart
+    reserved = [r * cols + c for r in range(rows) for c in range(cols) if board[r][c].pawn is not None]
+    hole = generate_holes(cols, reserved, hole_count, rng=shared_rng().board)
+    for i in itertools.compress(range(rows * cols), hole):
+        board[i // cols][i % cols].is_hole = True
 
 def get_valid_moves(board, selected_pawn, rows, cols):
     directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
@@ -622,39 +697,38 @@ def get_valid_moves(board, selected_pawn, rows, cols):
                     valid_moves.append((nr, nc))
     return valid_moves
 
-def draw_legend(screen, font, x_start, y_start):
-    screen.blit(font.render("Legend", True, WHITE), (x_start + 70, y_start))
+def draw_legend(ui, font, x_start, y_start):
+    ui.text(font, "Legend", WHITE, topleft=(x_start + 70, y_start))
     y_offset = y_start + 35
 
     for cat, color in category_colors.items():
         color_box = pygame.Rect(x_start, y_offset, 20, 20)
-        pygame.draw.rect(screen, (*color, 255), color_box)
-        pygame.draw.rect(screen, (*WHITE, 255), color_box, 1)
-        screen.blit(font.render(cat, True, WHITE), (x_start + 30, y_offset))
+        ui.rect(color_box, (*color, 255))
+        ui.border(color_box, (*WHITE, 255), 1)
+        ui.text(font, cat, WHITE, topleft=(x_start + 30, y_offset))
         y_offset += 25
 
     y_offset += 20
     for label, color in [("Selected", YELLOW), ("Move Empty", LIGHT_GREEN), ("Attack", LIGHT_RED), ("Hole", WHITE)]:
         color_box = pygame.Rect(x_start, y_offset, 20, 20)
-        pygame.draw.rect(screen, (*color, 255), color_box)
-        pygame.draw.rect(screen, (*WHITE, 255), color_box, 1)
-        screen.blit(font.render(label, True, WHITE), (x_start + 30, y_offset))
+        ui.rect(color_box, (*color, 255))
+        ui.border(color_box, (*WHITE, 255), 1)
+        ui.text(font, label, WHITE, topleft=(x_start + 30, y_offset))
         y_offset += 25
 
-def draw_current_player_display(screen, font, current_player, icon_map, x_start, y_start):
-    screen.blit(font.render("Current Turn", True, WHITE), (x_start + 70, y_start))
+def draw_current_player_display(ui, font, current_player, icon_map, x_start, y_start):
+    ui.text(font, "Current Turn", WHITE, topleft=(x_start + 70, y_start))
     pawn_surf = icon_map.get((current_player, False))
     if pawn_surf:
-        large_icon = pygame.transform.scale(pawn_surf, (100, 100))
-        icon_rect = large_icon.get_rect(center=(x_start + 100, y_start + 110))
-        screen.blit(large_icon, icon_rect)
+        icon_rect = pygame.Rect(0, 0, 100, 100)
+        icon_rect.center = (x_start + 100, y_start + 110)
+        ui.sprite(pawn_surf, icon_rect)
 
-    name_font = pygame.font.SysFont("Arial", 30, bold=True)
-    name_surf = name_font.render(current_player.name, True, current_player.color)
-    screen.blit(name_surf, name_surf.get_rect(center=(x_start + 100, y_start + 200)))
+    name_font = get_font("Arial", 30, bold=True)
+    ui.text(name_font, current_player.name, current_player.color, center=(x_start + 100, y_start + 200))
 
-    score_surf = pygame.font.SysFont("Arial", 24).render(f"Score: {current_player.score}", True, WHITE)
-    screen.blit(score_surf, score_surf.get_rect(center=(x_start + 100, y_start + 240)))
+    score_font = get_font("Arial", 24)
+    ui.text(score_font, f"Score: {current_player.score}", WHITE, center=(x_start + 100, y_start + 240))
 
 def setup_players_and_pawns(num_players, board_size):
     players = []
@@ -694,24 +768,16 @@ def _reset_gl_window(renderer: GalaxyRenderer, w: int, h: int):
 
 # --- Screens ---
 def splash_screen(renderer: GalaxyRenderer, clock, font):
-    screen = renderer.overlay_surface
+    ui = renderer.ui
     running = True
     while running:
-        w, h = screen.get_size()
-        screen.fill((0, 0, 0, 0))
-        draw_dim_panel(screen, 110)
-
-        title_surf = font.render("TRIVIA STRATEGY", True, WHITE)
-        title_rect = title_surf.get_rect(center=(w//2, h//2 - 50))
-        screen.blit(title_surf, title_rect)
+        w, h = ui.size
+        renderer.begin_frame()
+        draw_dim_panel(ui, 110)
 
-        sub_surf = pygame.font.SysFont("Arial", 24).render("Capture the Flag", True, (200, 200, 200))
-        sub_rect = sub_surf.get_rect(center=(w//2, h//2 + 20))
-        screen.blit(sub_surf, sub_rect)
-
-        instr_surf = pygame.font.SysFont("Arial", 20).render("Click anywhere to start", True, YELLOW)
-        instr_rect = instr_surf.get_rect(center=(w//2, h//2 + 80))
-        screen.blit(instr_surf, instr_rect)
+        ui.text(font, "TRIVIA STRATEGY", WHITE, center=(w//2, h//2 - 50))
+        ui.text(get_font("Arial", 24), "Capture the Flag", (200, 200, 200), center=(w//2, h//2 + 20))
+        ui.text(get_font("Arial", 20), "Click anywhere to start", YELLOW, center=(w//2, h//2 + 80))
 
         renderer.present(pygame.time.get_ticks() * 0.001)
 
@@ -722,7 +788,6 @@ def splash_screen(renderer: GalaxyRenderer, clock, font):
                 running = False
             elif event.type == pygame.VIDEORESIZE:
                 _reset_gl_window(renderer, event.w, event.h)
-                screen = renderer.overlay_surface
 
         clock.tick(FPS)
 
@@ -730,11 +795,18 @@ def menu_loop(renderer: GalaxyRenderer, clock, title_font, option_font):
     num_players = 2
     time_limit = 30
     board_size = 8
+    ai_players = 0
+    load_game = False
     running = True
 
     def change_players(val):
-        nonlocal num_players
+        nonlocal num_players, ai_players
         num_players = max(2, min(4, num_players + val))
+        ai_players = min(ai_players, num_players - 1)
+
+    def change_ai(val):
+        nonlocal ai_players
+        ai_players = max(0, min(num_players - 1, ai_players + val))
 
     def change_time(val):
         nonlocal time_limit
@@ -748,6 +820,11 @@ def menu_loop(renderer: GalaxyRenderer, clock, title_font, option_font):
         nonlocal running
         running = False
 
+    def load_saved():
+        nonlocal running, load_game
+        load_game = True
+        running = False
+
     buttons = [
         Button(-100, -120, 50, 50, "-", (20, 20, 20), (200, 50, 50), lambda: change_players(-1)),
         Button(100, -120, 50, 50, "+", (20, 20, 20), (200, 50, 50), lambda: change_players(1)),
@@ -755,15 +832,19 @@ def menu_loop(renderer: GalaxyRenderer, clock, title_font, option_font):
         Button(100, -40, 50, 50, "+", (20, 20, 20), (200, 50, 50), lambda: change_time(5)),
         Button(-100, 40, 50, 50, "-", (20, 20, 20), (200, 50, 50), lambda: change_board(-1)),
         Button(100, 40, 50, 50, "+", (20, 20, 20), (200, 50, 50), lambda: change_board(1)),
-        Button(-80, 130, 160, 60, "PLAY", (50, 50, 200), (100, 149, 237), start_game),
+        Button(-100, 120, 50, 50, "-", (20, 20, 20), (200, 50, 50), lambda: change_ai(-1)),
+        Button(100, 120, 50, 50, "+", (20, 20, 20), (200, 50, 50), lambda: change_ai(1)),
+        Button(-80, 210, 160, 60, "PLAY", (50, 50, 200), (100, 149, 237), start_game),
     ]
+    if has_save(SAVE_FILE):
+        buttons.append(Button(-80, 280, 160, 60, "LOAD", (50, 50, 200), (100, 149, 237), load_saved))
     base_pawn_img, base_flag_img = load_assets()
 
-    screen = renderer.overlay_surface
+    ui = renderer.ui
     while running:
-        w, h = screen.get_size()
-        screen.fill((0, 0, 0, 0))
-        draw_dim_panel(screen, 105)
+        w, h = ui.size
+        renderer.begin_frame()
+        draw_dim_panel(ui, 105)
 
         mouse_pos = pygame.mouse.get_pos()
         for btn in buttons:
@@ -771,52 +852,93 @@ def menu_loop(renderer: GalaxyRenderer, clock, title_font, option_font):
 
         ticks = pygame.time.get_ticks()
         glitch_x, glitch_y = (0, 0)
-        if ticks % 60 == 0 and random.random() < 0.3:
-            glitch_x, glitch_y = random.randint(-4, 4), random.randint(-2, 2)
+        cosmetic = shared_rng().cosmetic
+        if ticks % 60 == 0 and cosmetic.random() < 0.3:
+            glitch_x, glitch_y = cosmetic.randint(-4, 4), cosmetic.randint(-2, 2)
 
-        title_surf = title_font.render("MAIN MENU", True, WHITE)
-        title_rect = title_surf.get_rect(center=(w//2 + glitch_x, h//2 - 200 + glitch_y))
+        title_center = (w//2 + glitch_x, h//2 - 200 + glitch_y)
         if glitch_x != 0:
-            screen.blit(title_font.render("MAIN MENU", True, (255, 0, 0)), (title_rect.x + 4, title_rect.y))
-            screen.blit(title_font.render("MAIN MENU", True, (0, 255, 255)), (title_rect.x - 4, title_rect.y))
-        screen.blit(title_surf, title_rect)
-
-        lbl_surf = option_font.render("Number of Players:", True, WHITE)
-        screen.blit(lbl_surf, lbl_surf.get_rect(center=(w//2 + glitch_x, h//2 - 150 + glitch_y)))
-        num_surf = title_font.render(str(num_players), True, WHITE)
-        screen.blit(num_surf, num_surf.get_rect(center=(w//2, h//2 - 120)))
-
-        lbl_time_surf = option_font.render("Time (sec):", True, WHITE)
-        screen.blit(lbl_time_surf, lbl_time_surf.get_rect(center=(w//2 + glitch_x, h//2 - 70 + glitch_y)))
-        time_surf = title_font.render(str(time_limit), True, WHITE)
-        screen.blit(time_surf, time_surf.get_rect(center=(w//2, h//2 - 40)))
-
-        lbl_board_surf = option_font.render(f"Board Size ({board_size}x{board_size}):", True, WHITE)
-        screen.blit(lbl_board_surf, lbl_board_surf.get_rect(center=(w//2 + glitch_x, h//2 + 10 + glitch_y)))
-        board_surf = title_font.render(str(board_size), True, WHITE)
-        screen.blit(board_surf, board_surf.get_rect(center=(w//2, h//2 + 40)))
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
-            elif event.type == pygame.VIDEORESIZE:
-                _reset_gl_window(renderer, event.w, event.h)
-                screen = renderer.overlay_surface
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                for btn in buttons:
-                    btn.check_click(mouse_pos)
-
-        for btn in buttons:
-            btn.check_hover(mouse_pos)
-            btn.draw(screen, option_font, (glitch_x, glitch_y))
-
+            ui.text(title_font, "MAIN MENU", (255, 0, 0), center=(title_center[0] + 4, title_center[1]))
+            ui.text(title_font, "MAIN MENU", (0, 255, 255), center=(title_center[0] - 4, title_center[1]))
+        ui.text(title_font, "MAIN MENU", WHITE, center=title_center)
+
+        ui.text(option_font, "Number of Players:", WHITE, center=(w//2 + glitch_x, h//2 - 150 + glitch_y))
+        ui.text(title_font, str(num_players), WHITE, center=(w//2, h//2 - 120))
+
+        ui.text(option_font, "Time (sec):", WHITE, center=(w//2 + glitch_x, h//2 - 70 + glitch_y))
+        ui.text(title_font, str(time_limit), WHITE, center=(w//2, h//2 - 40))
+
+        ui.text(option_font, f"Board Size ({board_size}x{board_size}):", WHITE, center=(w//2 + glitch_x, h//2 + 10 + glitch_y))
+        ui.text(title_font, str(board_size), WHITE, center=(w//2, h//2 + 40))
+
+        ui.text(option_font, "Computer Players:", WHITE, center=(w//2 + glitch_x, h//2 + 90 + glitch_y))
+        ui.text(title_font, str(ai_players), WHITE, center=(w//2, h//2 + 120))
+
+        with profiler.scope("events"):
+            for event in pygame.event.get():
+                profiler.handle_event(event)
+                if event.type == pygame.QUIT:
+                    pygame.quit(); sys.exit()
+                elif event.type == pygame.VIDEORESIZE:
+                    _reset_gl_window(renderer, event.w, event.h)
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    for btn in buttons:
+                        btn.check_click(mouse_pos)
+
+        with profiler.scope("buttons"):
+            for btn in buttons:
+                btn.check_hover(mouse_pos)
+                btn.draw(ui, option_font, (glitch_x, glitch_y))
+
+        profiler.draw_overlay(ui, option_font)
         renderer.present(pygame.time.get_ticks() * 0.001)
+        profiler.end_frame()
         clock.tick(FPS)
 
-    return num_players, time_limit, board_size, base_pawn_img, base_flag_img
-
-def main_game_real(renderer: GalaxyRenderer, clock, font, num_players, time_limit, board_size, base_pawn_img, base_flag_img):
-    players, pawns = setup_players_and_pawns(num_players, board_size)
+    return num_players, time_limit, board_size, ai_players, base_pawn_img, base_flag_img, load_game
+
+def main_game_real(renderer: GalaxyRenderer, clock, font, num_players, time_limit, board_size, base_pawn_img, base_flag_img,
+                   ai_players=0, saved=None, replay=None):
+    # every game draws from streams of one seed: SRAZ_SEED=<seed> plays the same board,
+    # questions and answer order again
+    rng = shared_rng()
+    rng.reseed(seed_from_env())
+    print(f"game seed {rng.seed}")
+    # rules live in GameState; this loop only draws it and asks the questions
+    if replay is not None:
+        # playback: the ReplayPlayer owns the state; nothing is asked or saved
+        game = replay.state
+        num_players, board_size = len(game.players), game.board.size
+        ai_players = 0
+        autosave = None
+    elif saved is not None:
+        game = saved.game
+        num_players, board_size = len(game.players), game.board.size
+        time_limit = saved.cfg.get("timeLimit", time_limit)
+        ai_players = saved.cfg.get("aiPlayers", ai_players)
+        autosave = saved
+    else:
+        game = GameState.new(num_players, board_size, list(category_colors.keys()), HOLE_COUNT, rng=rng.board)
+        # one journal line per turn; the snapshot is only rewritten every few hundred turns
+        autosave = Autosave(game, SAVE_FILE, cfg={"timeLimit": time_limit, "aiPlayers": ai_players})
+    replay_start, replay_first = game.copy(), len(game.history)
+    board = game.board
+    # highlight targets per pawn as sets, refreshed only around squares that changed
+    move_cache = MoveCache(game)
+    # walking distances around the holes, shared by the move hint, threat outlines and AI
+    dist_maps = DistanceMaps.of(game)
+
+    # the last ai_players seats are computer opponents sharing one answer model
+    accuracy = AccuracyModel()
+    bots = {}
+    scheduler = shared_scheduler()
+    for i in range(num_players - ai_players, num_players):
+        game.players[i].name = f"CPU {i+1}"
+        if board_size >= MCTS_MIN_BOARD:
+            bots[i] = MCTSAI(i, accuracy, move_time=AI_MOVE_TIME, seed=rng.seed_for(f"ai{i}"))
+        else:
+            bots[i] = ExpectimaxAI(i, accuracy, move_time=AI_MOVE_TIME, rng=rng.stream(f"ai{i}"))
+    players = [Player(p.name, p.color_id) for p in game.players]
 
     icon_map = {}
     for p in players:
@@ -826,8 +948,7 @@ def main_game_real(renderer: GalaxyRenderer, clock, font, num_players, time_limi
         icon_map[(p, False)] = pawn_col
         icon_map[(p, True)] = flag_light
 
-    current_player_index = 0
-    selected_pawn = None
+    selected_pawn = None  # pawn id
     running = True
 
     move_anim = {
@@ -840,24 +961,34 @@ def main_game_real(renderer: GalaxyRenderer, clock, font, num_players, time_limi
     }
     ANIM_DURATION = 300
 
-    board_data = [[Cell() for _ in range(board_size)] for _ in range(board_size)]
-
-    # --- BOARD CREATION ---
-    all_cats = list(category_colors.keys())
-    for r in range(board_size):
-        for c in range(board_size):
-            cat_index = (r + c) % len(all_cats)
-            board_data[r][c].category = all_cats[cat_index]
-
-    for p in pawns:
-        board_data[p.row][p.col].pawn = p
-    place_random_holes(board_data, board_size, board_size, HOLE_COUNT)
-
-    screen = renderer.overlay_surface
+    def play(action, success):
+        """Apply a resolved turn (human or computer), then animate and show feedback."""
+        if action.kind == PASS:
+            game.apply(action)
+            autosave.record(action, True)
+            return
+        game.apply(action, success)
+        autosave.record(action, success)
+        for view, p in zip(players, game.players):
+            view.score = p.score
+
+        if success:
+            animate_step(action.pawn)
+        show_feedback(renderer, success)
+
+    def animate_step(pawn_id):
+        move_anim['pawn'] = pawn_id
+        move_anim['active'] = True
+        move_anim['start_ticks'] = pygame.time.get_ticks()
+        move_anim['turn_done'] = False
+
+    dt = 0.0
+
+    ui = renderer.ui
     while running:
-        w, h = screen.get_size()
-        screen.fill((0, 0, 0, 0))
-        draw_dim_panel(screen, 70)
+        w, h = ui.size
+        renderer.begin_frame()
+        draw_dim_panel(ui, 70)
 
         margin_x = 240 + 240
         margin_y = 180 + 50
@@ -868,99 +999,56 @@ def main_game_real(renderer: GalaxyRenderer, clock, font, num_players, time_limi
         start_y = (h - (board_size * cell_size)) // 2
         pawn_size = int(cell_size * 0.7)
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit(); sys.exit()
-            elif event.type == pygame.VIDEORESIZE:
-                _reset_gl_window(renderer, event.w, event.h)
-                screen = renderer.overlay_surface
+        with profiler.scope("events"):
+            for event in pygame.event.get():
+                profiler.handle_event(event)
+                if event.type == pygame.QUIT:
+                    pygame.quit(); sys.exit()
+                elif event.type == pygame.VIDEORESIZE:
+                    _reset_gl_window(renderer, event.w, event.h)
+
+                elif replay is not None and event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        return
+                    if event.key in REPLAY_KEYS:
+                        replay.command(REPLAY_KEYS[event.key])
+                        move_anim.update({'active': False, 'pawn': None, 'turn_done': False})
+
+                # --- INPUT HANDLING ---
+                if (not move_anim['active']
+                    and game.current not in bots
+                    and replay is None
+                    and event.type == pygame.MOUSEBUTTONDOWN
+                    and event.button == 1):
+                    mx, my = pygame.mouse.get_pos()
+                    col = (mx - start_x) // cell_size if cell_size else -1
+                    row = (my - start_y) // cell_size if cell_size else -1
+                    if not board.in_bounds(row, col):
+                        continue
+
+                    if selected_pawn is None:
+                        occupant = board.pawn_at(row, col)
+                        if occupant != EMPTY and game.pawns[occupant].player == game.current:
+                            selected_pawn = occupant
+                        continue
+
+                    # holes, own pawns and far tiles just drop the selection
+                    action = game.action_for(selected_pawn, row, col)
+                    selected_pawn = None
+                    if action is None:
+                        continue
+
+                    category = board.category_at(row, col)
+                    player = game.players[game.current].name
+                    seat = game.current
+                    observe = lambda correct: accuracy.observe(seat, category, correct)
+                    if action.kind == MOVE:
+                        success = bool(ask_question_from_category(renderer, font, category, time_limit, player, observe))
+                    else:
+                        # ATTACK
+                        success = ask_two_questions_from_category(renderer, font, category, time_limit, player, observe)
 
-            # --- INPUT HANDLING ---
-            if (not move_anim['active']
-                and event.type == pygame.MOUSEBUTTONDOWN
-                and event.button == 1):
-                mx, my = pygame.mouse.get_pos()
-                current_player = players[current_player_index]
-
-                if not selected_pawn:
-                    for r in range(board_size):
-                        for c in range(board_size):
-                            cell_rect = pygame.Rect(start_x + c * cell_size, start_y + r * cell_size, cell_size, cell_size)
-                            cell = board_data[r][c]
-                            if cell_rect.collidepoint(mx, my) and cell.pawn:
-                                if cell.pawn.player == current_player:
-                                    selected_pawn = cell.pawn
-                                    break
-                        else:
-                            continue
-                        break
-                else:
-                    for r in range(board_size):
-                        for c in range(board_size):
-                            cell_rect = pygame.Rect(start_x + c * cell_size, start_y + r * cell_size, cell_size, cell_size)
-                            cell = board_data[r][c]
-                            if cell_rect.collidepoint(mx, my):
-                                if abs(selected_pawn.row - r) + abs(selected_pawn.col - c) == 1:
-                                    if cell.is_hole:
-                                        selected_pawn = None
-                                        break
-
-                                    if not cell.pawn:
-                                        # MOVE
-                                        result = ask_question_from_category(renderer, font, cell.category, time_limit)
-                                        if result:
-                                            board_data[selected_pawn.row][selected_pawn.col].pawn = None
-                                            selected_pawn.row, selected_pawn.col = r, c
-                                            cell.pawn = selected_pawn
-                                            current_player.score += 1
-
-                                            # animation (optional; kept as in original, but end_pos wasn't set)
-                                            move_anim['pawn'] = selected_pawn
-                                            move_anim['start_pos'] = (cell_rect.centerx, cell_rect.centery)
-                                            move_anim['end_pos'] = (cell_rect.centerx, cell_rect.centery)
-                                            move_anim['active'] = True
-                                            move_anim['start_ticks'] = pygame.time.get_ticks()
-                                            move_anim['turn_done'] = False
-
-                                            selected_pawn = None
-                                            show_feedback(renderer, True)
-                                        else:
-                                            show_feedback(renderer, False)
-                                            selected_pawn = None
-                                            current_player_index = (current_player_index + 1) % len(players)
-                                    else:
-                                        # ATTACK
-                                        occupant = cell.pawn
-                                        if occupant.player != current_player:
-                                            success = ask_two_questions_from_category(renderer, font, cell.category, time_limit)
-                                            if success:
-                                                board_data[occupant.row][occupant.col].pawn = None
-                                                if occupant in pawns:
-                                                    pawns.remove(occupant)
-                                                board_data[selected_pawn.row][selected_pawn.col].pawn = None
-                                                selected_pawn.row, selected_pawn.col = r, c
-                                                cell.pawn = selected_pawn
-                                                current_player.score += 5
-
-                                                move_anim['pawn'] = selected_pawn
-                                                move_anim['start_pos'] = (cell_rect.centerx, cell_rect.centery)
-                                                move_anim['end_pos'] = (cell_rect.centerx, cell_rect.centery)
-                                                move_anim['active'] = True
-                                                move_anim['start_ticks'] = pygame.time.get_ticks()
-                                                move_anim['turn_done'] = False
-
-                                                selected_pawn = None
-                                                show_feedback(renderer, True)
-                                            else:
-                                                show_feedback(renderer, False)
-                                                selected_pawn = None
-                                                current_player_index = (current_player_index + 1) % len(players)
-                                        else:
-                                            selected_pawn = None
-                                break
-                        else:
-                            continue
-                        break
+                    play(action, success)
 
         # animation update (kept minimal)
         if move_anim['active']:
@@ -973,71 +1061,123 @@ def main_game_real(renderer: GalaxyRenderer, clock, font, num_players, time_limi
 
         if move_anim.get('turn_done', False):
             move_anim['turn_done'] = False
-            current_player_index = (current_player_index + 1) % len(players)
-
-        # draw board
-        valid_moves = get_valid_moves(board_data, selected_pawn, board_size, board_size) if selected_pawn else []
-
-        for r in range(board_size):
-            for c in range(board_size):
-                cell = board_data[r][c]
-                cell.rect = pygame.Rect(start_x + c * cell_size, start_y + r * cell_size, cell_size, cell_size)
-
-                if cell.is_hole:
-                    cell_color = BLACK
+            if game.winner is not None and replay is None:
+                print(f"{game.players[game.winner].name} Wins!")
+                scheduler.cancel()
+                autosave.clear()
+                path = os.path.join(REPLAY_DIR, time.strftime("%Y%m%d-%H%M%S") + ".srzr")
+                Replay.capture(replay_start, game, {"seed": rng.seed}, first=replay_first).save(path)
+                print(f"Replay saved to {path}")
+                return
+
+        # --- REPLAY PLAYBACK ---
+        if replay is not None and not move_anim['active']:
+            for action, success, src in replay.tick(dt):
+                if replay.animate and success and src is not None:
+                    animate_step(action.pawn)
+            for view, p in zip(players, game.players):
+                view.score = p.score
+
+        # --- COMPUTER TURN ---
+        bot = bots.get(game.current)
+        if bot is not None and not move_anim['active'] and game.winner is None:
+            # search runs off the render loop; start it once per turn and poll every frame
+            if not scheduler.running:
+                scheduler.start(bot, game)
+            action = scheduler.poll(game)
+            if action is not None:
+                if action.kind == PASS:
+                    play(action, True)
                 else:
-                    cell_color = GRAY
+                    category = board.category_at(action.row, action.col)
+                    answers = bot.roll_answers(category, action.kind)
+                    accuracy.observe_answers(game.current, category, answers)
+                    play(action, all(answers))
 
-                if selected_pawn and (r, c) == (selected_pawn.row, selected_pawn.col):
-                    cell_color = YELLOW
-                elif (r, c) in valid_moves:
-                    if cell.pawn and cell.pawn.player != selected_pawn.player:
-                        cell_color = LIGHT_RED
+        # draw board
+        with profiler.scope("board"):
+            if selected_pawn is not None:
+                valid_moves = move_cache.moves(selected_pawn)
+                selected_pos = (game.pawns[selected_pawn].row, game.pawns[selected_pawn].col)
+                selected_owner = game.pawns[selected_pawn].player
+            else:
+                valid_moves, selected_pos, selected_owner = (), None, None
+            # hint: the highlighted step that walks closest to an enemy flag
+            hint_step = None
+            if valid_moves:
+                hint_step = min(valid_moves, key=lambda rc: dist_maps.nearest_enemy_flag(selected_owner, rc[0] * board_size + rc[1]))
+            threatened = {pid for _, pid in dist_maps.threats(game.current, THREAT_STEPS)}
+
+            for r in range(board_size):
+                for c in range(board_size):
+                    i = r * board_size + c
+                    is_hole = board.hole[i]
+                    occupant = board.occupant[i]
+                    cell_rect = pygame.Rect(start_x + c * cell_size, start_y + r * cell_size, cell_size, cell_size)
+
+                    if is_hole:
+                        cell_color = BLACK
                     else:
-                        cell_color = LIGHT_GREEN
-
-                pygame.draw.rect(screen, (*cell_color, 240), cell.rect, border_radius=6)
-                pygame.draw.rect(screen, (10, 10, 10, 255), cell.rect, 2, border_radius=6)
-
-                if not cell.is_hole:
-                    cat_color = category_colors.get(cell.category, (128, 128, 128))
-                    cat_rect = pygame.Rect(cell.rect.x + 4, cell.rect.y + 4, int(cell_size*0.16), int(cell_size*0.16))
-                    pygame.draw.rect(screen, (*cat_color, 255), cat_rect, border_radius=4)
-
-                if cell.pawn:
-                    pawn_obj = cell.pawn
-                    base_icon = icon_map.get((pawn_obj.player, pawn_obj.is_flag))
-                    if base_icon:
-                        scaled_icon = pygame.transform.scale(base_icon, (pawn_size, pawn_size))
-                        if pawn_obj == selected_pawn:
-                            pulse_scale = 1.0 + 0.1 * math.sin(pygame.time.get_ticks() * 0.01)
-                            final_size = int(pawn_size * pulse_scale)
-                            scaled_icon = pygame.transform.scale(base_icon, (final_size, final_size))
-
-                        icon_rect = scaled_icon.get_rect(center=cell.rect.center)
-                        screen.blit(scaled_icon, icon_rect)
+                        cell_color = GRAY
+                    border_col = (10, 10, 10)
+
+                    if (r, c) == selected_pos:
+                        cell_color = YELLOW
+                    elif (r, c) in valid_moves:
+                        if occupant != EMPTY and game.pawns[occupant].player != selected_owner:
+                            cell_color = LIGHT_RED
+                        else:
+                            cell_color = LIGHT_GREEN
+                            if (r, c) == hint_step:
+                                border_col = WHITE
+                    elif occupant in threatened:
+                        border_col = RED_WARNING
+
+                    ui.rect(cell_rect, (*cell_color, 240), radius=6)
+                    ui.border(cell_rect, (*border_col, 255), 2, radius=6)
+
+                    if not is_hole:
+                        cat_color = category_colors.get(board.category[i], (128, 128, 128))
+                        cat_rect = pygame.Rect(cell_rect.x + 4, cell_rect.y + 4, int(cell_size*0.16), int(cell_size*0.16))
+                        ui.rect(cat_rect, (*cat_color, 255), radius=4)
+
+                    if occupant != EMPTY:
+                        pawn_obj = game.pawns[occupant]
+                        base_icon = icon_map.get((players[pawn_obj.player], pawn_obj.is_flag))
+                        if base_icon:
+                            final_size = pawn_size
+                            if occupant == selected_pawn:
+                                pulse_scale = 1.0 + 0.1 * math.sin(pygame.time.get_ticks() * 0.01)
+                                final_size = int(pawn_size * pulse_scale)
+
+                            icon_rect = pygame.Rect(0, 0, final_size, final_size)
+                            icon_rect.center = cell_rect.center
+                            ui.sprite(base_icon, icon_rect)
 
         # HUD
-        hud_bg = pygame.Surface((180, 150), pygame.SRCALPHA)
-        pygame.draw.rect(hud_bg, (0, 0, 0, 180), (0, 0, 180, 150), border_radius=10)
-        screen.blit(hud_bg, (10, 10))
-        y_offset = 10
-        for p in players:
-            text = f"{p.name} (Score: {p.score})"
-            surf = font.render(text, True, p.color)
-            screen.blit(surf, (20, y_offset))
-            y_offset += 30
-
-        draw_legend(screen, font, x_start=10, y_start=200)
-        draw_current_player_display(screen, font, players[current_player_index], icon_map, x_start=w - 210, y_start=50)
-
+        with profiler.scope("hud"):
+            ui.rect((10, 10, 180, 150), (0, 0, 0, 180), radius=10)
+            y_offset = 10
+            for p in players:
+                ui.text(font, f"{p.name} (Score: {p.score})", p.color, topleft=(20, y_offset))
+                y_offset += 30
+
+            draw_legend(ui, font, x_start=10, y_start=200)
+            draw_current_player_display(ui, font, players[game.current], icon_map, x_start=w - 210, y_start=50)
+            if scheduler.running:
+                ui.text(font, f"Thinking... depth {scheduler.depth}", GRAY, center=(w - 110, 325))
+            if replay is not None:
+                ui.text(font, replay.status(), GRAY, center=(w - 110, 325))
+
+        profiler.draw_overlay(ui, font)
         renderer.present(pygame.time.get_ticks() * 0.001)
-        clock.tick(FPS)
+        profiler.end_frame()
+        dt = clock.tick(FPS) / 1000.0
 
 # -----------------------------
 # Entrypoint
 # -----------------------------
-if __name__ == "__main__":
+def open_window():
     # Create OpenGL window (required for ModernGL background)
     pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 3)
     pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
@@ -1054,12 +1194,31 @@ if __name__ == "__main__":
     pygame.display.set_caption("Trivia Strategy Game (Galaxy BG)")
 
     clock = pygame.time.Clock()
-    title_font = pygame.font.SysFont("Arial", 48, bold=True)
-    game_font = pygame.font.SysFont("Arial", 20)
+    title_font = get_font("Arial", 48, bold=True)
+    game_font = get_font("Arial", 20)
 
     renderer = GalaxyRenderer(DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT, AUDIO_FILE)
+    if renderer.use_gl_ui:
+        # rasterize the menu/HUD alphabet (incl. Croatian letters) up front
+        charset = localization_charset()
+        for f in (title_font, game_font):
+            renderer.ui.text_renderer.atlas.preload(f, charset)
+    return renderer, clock, title_font, game_font
+
+def run_replay(player):
+    """Watch a ReplayPlayer on the board view (python replay.py FILE --view test7)."""
+    renderer, clock, title_font, game_font = open_window()
+    pawn_img, flag_img = load_assets()
+    state = player.state
+    main_game_real(renderer, clock, game_font, len(state.players), 30, state.board.size, pawn_img, flag_img,
+                   replay=player)
+
+if __name__ == "__main__":
+    renderer, clock, title_font, game_font = open_window()
 
     while True:
         splash_screen(renderer, clock, title_font)
-        num_players, time_limit, board_size, pawn_img, flag_img = menu_loop(renderer, clock, title_font, game_font)
-        main_game_real(renderer, clock, game_font, num_players, time_limit, board_size, pawn_img, flag_img)
+        num_players, time_limit, board_size, ai_players, pawn_img, flag_img, load_game = menu_loop(renderer, clock, title_font, game_font)
+        saved = Autosave.resume(SAVE_FILE) if load_game else None
+        main_game_real(renderer, clock, game_font, num_players, time_limit, board_size, pawn_img, flag_img,
+                       ai_players, saved)
@@ -0,0 +1,69 @@
+import time
+import pickle
+import random
+
+from game_state import GameState, MOVE, ATTACK
+from ai import AccuracyModel, ExpectimaxAI
+from mcts import MCTSAI
+from ai_scheduler import AIScheduler, PROCESS
+
+
+class ScriptedRng:
+    """random() returns the given values in turn."""
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def random(self):
+        return self.values.pop(0)
+
+
+def test_attack_answers_are_observed_one_by_one():
+    accuracy = AccuracyModel()
+    bot = ExpectimaxAI(0, accuracy, rng=ScriptedRng([0.0, 0.99]))
+    answers = bot.roll_answers("Science", ATTACK)
+    assert answers == [True, False]
+    accuracy.observe_answers(0, "Science", answers)
+    assert accuracy.counts[(0, "Science")] == [1, 2]
+
+
+def test_attack_stops_at_the_first_wrong_answer():
+    bot = ExpectimaxAI(0, AccuracyModel(), rng=ScriptedRng([0.99]))
+    assert bot.roll_answers("Science", ATTACK) == [False]
+    bot = ExpectimaxAI(0, AccuracyModel(), rng=ScriptedRng([0.0]))
+    assert bot.roll_answers("Science", MOVE) == [True]
+
+
+def test_pickled_bot_keeps_its_settings_but_not_its_hooks():
+    bot = ExpectimaxAI(1, AccuracyModel(), move_time=0.2, max_depth=3, tt_bytes=1 << 16,
+                       rng=random.Random(7))
+    bot.stop = bot.on_depth = lambda *a: None
+    bot.tt.store(123, 2, 0.5)
+    copy = pickle.loads(pickle.dumps(bot))
+    assert (copy.player, copy.move_time, copy.max_depth) == (1, 0.2, 3)
+    assert copy.tt.buckets == bot.tt.buckets and len(copy.tt) == 0
+    assert copy.rng.random() == bot.rng.random()
+    assert copy.stop is None and copy.on_depth is None
+
+    bot = MCTSAI(0, AccuracyModel(), workers=3, seed=5)
+    bot.stop = lambda: None
+    copy = pickle.loads(pickle.dumps(bot))
+    assert copy.workers == 3 and copy.stop is None
+    assert copy.rng.random() == bot.rng.random()
+
+
+def test_worker_process_searches_with_the_bots_own_depth():
+    game = GameState.new(2, 6, rng=random.Random(1))
+    bot = ExpectimaxAI(game.current, AccuracyModel(), move_time=5.0, max_depth=1)
+    scheduler = AIScheduler(PROCESS)
+    try:
+        scheduler.start(bot, game)
+        deadline = time.monotonic() + 60
+        action = None
+        while action is None and time.monotonic() < deadline:
+            action = scheduler.poll(game)
+            time.sleep(0.01)
+        assert action in game.legal_actions()
+        assert scheduler.depth <= 1
+    finally:
+        scheduler.close()
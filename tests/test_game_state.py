@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from game_state import GameState, EMPTY, PASS_ACTION
+from board_array import BoardArrays
+from bitboard import BitBoard
+from zobrist import compute_hash
+
+
+def snapshot(game):
+    return (list(game.board.occupant), list(game.board.hole), game.current, game.winner, game.hash,
+            [(p.row, p.col, p.alive) for p in game.pawns],
+            [(p.score, p.alive) for p in game.players])
+
+
+def scatter(game, rng, plies):
+    """Random all-correct play, so perft also starts from positions with contact."""
+    for _ in range(plies):
+        if game.winner is not None:
+            return
+        game.apply(rng.choice(game.legal_actions()), True)
+
+
+def positions():
+    for size in (6, 8):
+        for num_players in (2, 4):
+            for seed in (1, 2):
+                for plies in (0, 12):
+                    yield size, num_players, seed, plies
+
+
+@pytest.mark.parametrize("size,num_players,seed", [(6, 2, 1), (8, 4, 2), (8, 2, 3)])
+def test_apply_undo_restores_board_and_hash(size, num_players, seed):
+    rng = random.Random(seed)
+    game = GameState.new(num_players, size, rng=rng)
+    start = snapshot(game)
+    states = []
+    while game.winner is None and len(states) < 300:
+        states.append(snapshot(game))
+        game.apply(rng.choice(game.legal_actions()), rng.random() < 0.8)
+        assert game.hash == compute_hash(game)
+    while states:
+        game.undo()
+        assert snapshot(game) == states.pop()
+    assert snapshot(game) == start
+    assert not game.history
+
+
+def engine_perft(game, depth):
+    if depth == 0 or game.winner is not None:
+        return 1
+    total = 0
+    for action in game.legal_actions():
+        game.apply(action, True)
+        total += engine_perft(game, depth - 1)
+        game.undo()
+    return total
+
+
+def _next_alive(arr, current, num_players):
+    alive = set(arr.pawn_player[arr.pawn_alive & arr.pawn_flag].tolist())
+    for k in range(1, num_players + 1):
+        i = (current + k) % num_players
+        if i in alive:
+            return i
+    return current
+
+
+def array_perft(arr, current, num_players, depth):
+    if depth == 0 or len(set(arr.pawn_player[arr.pawn_alive & arr.pawn_flag].tolist())) <= 1:
+        return 1
+    actions = arr.legal_actions(current)
+    if actions == [PASS_ACTION]:
+        return array_perft(arr, _next_alive(arr, current, num_players), num_players, depth - 1)
+    total = 0
+    for action in actions:
+        child = arr.copy()
+        captured = child.move(action.pawn, action.row, action.col)
+        if captured != EMPTY and child.pawn_flag[captured]:
+            child.remove_player(int(child.pawn_player[captured]))
+        total += array_perft(child, _next_alive(child, current, num_players), num_players, depth - 1)
+    return total
+
+
+@pytest.mark.parametrize("size,num_players,seed,plies", list(positions()))
+def test_perft_matches_across_board_representations(size, num_players, seed, plies):
+    rng = random.Random(seed)
+    game = GameState.new(num_players, size, rng=rng)
+    scatter(game, rng, plies)
+    if game.winner is not None:
+        pytest.skip("game already over")
+    depth = 4
+    expected = engine_perft(game, depth)
+    assert array_perft(BoardArrays.from_state(game), game.current, num_players, depth) == expected
+    assert BitBoard.from_state(game).perft(game.current, depth) == expected
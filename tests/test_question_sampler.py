@@ -0,0 +1,40 @@
+import random
+from collections import Counter
+
+from question_sampler import ShuffleBag
+from difficulty import AliasTable
+
+
+def test_every_pass_is_a_permutation():
+    rng = random.Random(1)
+    items = list(range(23))
+    bag = ShuffleBag(items, held=[3, 7, 11])
+    for _ in range(5):
+        assert sorted(bag.draw(rng) for _ in items) == items
+
+
+def test_held_items_come_last():
+    rng = random.Random(2)
+    bag = ShuffleBag(list(range(20)), held=[4, 9])
+    assert set(bag.draw(rng) for _ in range(18)).isdisjoint({4, 9})
+
+
+def test_take_counts_as_drawn():
+    rng = random.Random(3)
+    items = list(range(15))
+    bag = ShuffleBag(items, held=[0, 1, 2])
+    drawn = [bag.draw(rng) for _ in range(4)]
+    bag.take(1)        # a held item
+    bag.take(drawn[0])  # already drawn this pass: no-op
+    drawn.append(1)
+    drawn += [bag.draw(rng) for _ in range(len(items) - len(drawn))]
+    assert sorted(drawn) == items
+
+
+def test_alias_table_follows_weights():
+    weights = [1, 2, 3, 4]
+    table = AliasTable(weights)
+    rng = random.Random(4)
+    counts = Counter(table.draw(rng) for _ in range(100000))
+    for i, w in enumerate(weights):
+        assert abs(counts[i] / 100000 - w / sum(weights)) < 0.01
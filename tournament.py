@@ -0,0 +1,364 @@
+"""
+Tournaments between named AI configurations, with Elo ratings.
+
+Configurations are simulate.build_agent specs (policy, search depth,
+time budget, playouts ...), either the built-in set below or a JSON file
+{"name": {"policy": "expectimax", "depth": 3}, ...}. All games are two
+players, and the seats alternate between the games of a pairing.
+
+    python tournament.py                                   # round robin, built-ins
+    python tournament.py --format swiss --rounds 6 --only greedy,exm-d1,exm-d2,mcts-200
+    python tournament.py --configs my_ais.json --games-per-pair 20 --results runs/t1.jsonl
+    python tournament.py --only greedy,exm-d1 --replays replays/t1     # watch with replay.py
+
+Every finished game is appended to the results file (JSON lines) with the
+seed derived from the tournament seed and the game's key, so an
+interrupted run picks up where it stopped when started again with the same
+settings. Ratings are maximum-likelihood Elo (draws count half) with
+bootstrap confidence intervals; CPU time per move is shown next to them so
+strength can be weighed against cost.
+"""
+import os
+import sys
+import json
+import random
+import hashlib
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from game_state import GameState, HOLE_COUNT
+from ai import AccuracyModel, DEFAULT_ACCURACY
+from simulate import build_agent, run_game, parse_accuracy
+from board_gen import shared_cache
+from replay import Replay
+
+DEFAULT_CONFIGS = {
+    "random": {"policy": "random"},
+    "greedy": {"policy": "greedy"},
+    "exm-d1": {"policy": "expectimax", "depth": 1},
+    "exm-d2": {"policy": "expectimax", "depth": 2},
+    "exm-d3": {"policy": "expectimax", "depth": 3},
+    "mcts-200": {"policy": "mcts", "playouts": 200},
+}
+
+ELO_BASE = 1500.0
+PRIOR_DRAWS = 1.0   # virtual drawn game per pairing keeps unbeaten ratings finite
+
+
+# -----------------------------
+# Games
+# -----------------------------
+
+def game_seed(base, key):
+    """Seed from the tournament seed and a game key, independent of run order."""
+    digest = hashlib.blake2b(f"{base}:{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def play_pairing_game(task):
+    """Worker entry point: one game, first name on seat 0."""
+    key, seat0, seat1, configs, settings = task
+    seed = game_seed(settings["seed"], key)
+    rng = random.Random(seed)
+    hole_mask = None
+    if settings["pregen"]:
+        boards = shared_cache().get(settings["board_size"], 2, settings["holes"], settings["pregen"], seed=settings["seed"])
+        hole_mask = boards[seed % settings["pregen"]]
+    game = GameState.new(2, settings["board_size"], hole_count=settings["holes"], rng=rng, hole_mask=hole_mask)
+    accuracy = AccuracyModel(default=settings["default_accuracy"], known=settings["accuracy"])
+    agents = [build_agent(configs[seat0], 0, accuracy, seed + 1),
+              build_agent(configs[seat1], 1, accuracy, seed + 2)]
+    start = game.copy()
+    r = run_game(game, agents, accuracy, rng, settings["max_turns"])
+    if settings.get("replays"):
+        meta = {"key": key, "seat0": seat0, "seat1": seat1, "seed": seed, "winner": r.winner}
+        Replay.capture(start, game, meta).save(os.path.join(settings["replays"], key.replace(":", "_") + ".srzr"))
+    score0 = 0.5 if r.winner < 0 else float(r.winner == 0)
+    return {
+        "key": key, "seat0": seat0, "seat1": seat1, "seed": seed,
+        "score0": score0, "turns": r.turns, "cpu": r.cpu, "moves": r.moves,
+    }
+
+
+# -----------------------------
+# Results file
+# -----------------------------
+
+def load_results(path, header):
+    """Finished games by key; refuses a file written with different settings."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for n, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                # a run killed mid-write leaves a partial last line
+                print(f"Warning: ignoring unreadable line {n + 1} in {path}")
+                continue
+            if "tournament" in row:
+                if row["tournament"] != header:
+                    raise SystemExit(f"{path} was written with different settings; use another --results file")
+                continue
+            results[row["key"]] = row
+    return results
+
+
+class ResultsFile:
+    def __init__(self, path, header, resume):
+        self.path = path
+        self.results = load_results(path, header) if resume else {}
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        fresh = not resume or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, "a" if resume else "w")
+        if not fresh:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # end the partial line a killed run left behind
+                    self._write_raw("\n")
+        if fresh:
+            self._write({"tournament": header})
+
+    def _write_raw(self, text):
+        self._f.write(text)
+        self._f.flush()
+
+    def _write(self, row):
+        self._write_raw(json.dumps(row) + "\n")
+
+    def add(self, row):
+        self.results[row["key"]] = row
+        self._write(row)
+
+    def close(self):
+        self._f.close()
+
+
+def run_games(tasks, results, workers):
+    """Play every task whose key is not in results yet (in parallel)."""
+    todo = [t for t in tasks if t[0] not in results.results]
+    if not todo:
+        return
+    print(f"playing {len(todo)} game(s) ({len(tasks) - len(todo)} already in {results.path})")
+    if workers > 1 and len(todo) > 1:
+        with multiprocessing.Pool(min(workers, len(todo))) as pool:
+            for row in pool.imap_unordered(play_pairing_game, todo):
+                results.add(row)
+    else:
+        for task in todo:
+            results.add(play_pairing_game(task))
+
+
+# -----------------------------
+# Pairings
+# -----------------------------
+
+def pairing_tasks(prefix, a, b, games, configs, settings):
+    """games games between a and b, alternating who moves first."""
+    tasks = []
+    for k in range(games):
+        seat0, seat1 = (a, b) if k % 2 == 0 else (b, a)
+        tasks.append((f"{prefix}:{a}:{b}:{k}", seat0, seat1, configs, settings))
+    return tasks
+
+
+def round_robin(names, configs, settings, games, results, workers):
+    tasks = []
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            tasks += pairing_tasks("rr", a, b, games, configs, settings)
+    run_games(tasks, results, workers)
+    return [results.results[t[0]] for t in tasks]
+
+
+def swiss_pairs(names, points, met, rng):
+    """Pair neighbours in the standings, avoiding rematches where possible; odd one out gets a bye."""
+    order = sorted(names, key=lambda n: (-points[n], rng.random()))
+    pairs = []
+    bye = None
+    if len(order) % 2:
+        # the lowest-ranked player without a bye sits out
+        for n in reversed(order):
+            if ("bye", n) not in met:
+                bye = n
+                break
+        bye = bye or order[-1]
+        order.remove(bye)
+    while order:
+        a = order.pop(0)
+        j = next((k for k, b in enumerate(order) if (a, b) not in met), 0)
+        pairs.append((a, order.pop(j)))
+    return pairs, bye
+
+
+def swiss(names, configs, settings, rounds, games, results, workers):
+    points = {n: 0.0 for n in names}
+    met = set()
+    played = []
+    for rnd in range(rounds):
+        # pairings only depend on earlier rounds, so a resumed run rebuilds the same ones
+        rng = random.Random(game_seed(settings["seed"], f"swiss{rnd}"))
+        pairs, bye = swiss_pairs(names, points, met, rng)
+        tasks = []
+        for a, b in pairs:
+            tasks += pairing_tasks(f"sw{rnd}", a, b, games, configs, settings)
+        print(f"round {rnd + 1}: " + ", ".join(f"{a}-{b}" for a, b in pairs) + (f", bye {bye}" if bye else ""))
+        run_games(tasks, results, workers)
+        for a, b in pairs:
+            met.add((a, b))
+            met.add((b, a))
+        if bye:
+            met.add(("bye", bye))
+            points[bye] += games / 2.0
+        for task in tasks:
+            row = results.results[task[0]]
+            points[row["seat0"]] += row["score0"]
+            points[row["seat1"]] += 1.0 - row["score0"]
+            played.append(row)
+    return played
+
+
+# -----------------------------
+# Elo
+# -----------------------------
+
+def score_matrices(rows, index):
+    n = len(index)
+    wins = np.zeros((n, n))
+    games = np.zeros((n, n))
+    for row in rows:
+        i, j = index[row["seat0"]], index[row["seat1"]]
+        wins[i, j] += row["score0"]
+        wins[j, i] += 1.0 - row["score0"]
+        games[i, j] += 1
+        games[j, i] += 1
+    return wins, games
+
+
+def fit_elo(wins, games, iterations=500):
+    """Bradley-Terry maximum likelihood (minorization-maximization), as Elo around ELO_BASE."""
+    met = games > 0
+    wins = wins + PRIOR_DRAWS * 0.5 * met
+    games = games + PRIOR_DRAWS * met
+    total = wins.sum(axis=1)
+    gamma = np.ones(len(wins))
+    for _ in range(iterations):
+        denom = (games / (gamma[:, None] + gamma[None, :])).sum(axis=1)
+        new = np.where(denom > 0, total / np.maximum(denom, 1e-300), 1.0)
+        new /= np.exp(np.log(new).mean())
+        if np.allclose(new, gamma, rtol=1e-9):
+            gamma = new
+            break
+        gamma = new
+    return ELO_BASE + 400.0 * np.log10(gamma)
+
+
+def elo_with_intervals(rows, names, samples, seed, level=0.95):
+    index = {n: i for i, n in enumerate(names)}
+    elo = fit_elo(*score_matrices(rows, index))
+    if not samples or not rows:
+        return elo, elo, elo
+    rng = np.random.default_rng(seed)
+    boot = np.empty((samples, len(names)))
+    for s in range(samples):
+        pick = rng.integers(0, len(rows), len(rows))
+        boot[s] = fit_elo(*score_matrices([rows[k] for k in pick], index))
+    tail = (1.0 - level) / 2.0 * 100.0
+    low, high = np.percentile(boot, [tail, 100.0 - tail], axis=0)
+    return elo, low, high
+
+
+def report(rows, names, samples, seed):
+    elo, low, high = elo_with_intervals(rows, names, samples, seed)
+    stats = {n: {"games": 0, "points": 0.0, "cpu": 0.0, "moves": 0} for n in names}
+    for row in rows:
+        for seat, name in enumerate((row["seat0"], row["seat1"])):
+            s = stats[name]
+            s["games"] += 1
+            s["points"] += row["score0"] if seat == 0 else 1.0 - row["score0"]
+            s["cpu"] += row["cpu"][seat]
+            s["moves"] += row["moves"][seat]
+    print(f"\n{'config':<14} {'games':>6} {'score':>6} {'elo':>7} {'95% interval':>15} {'ms/move':>9} {'cpu s/game':>10}")
+    for i in sorted(range(len(names)), key=lambda i: -elo[i]):
+        s = stats[names[i]]
+        games = max(s["games"], 1)
+        print(f"{names[i]:<14} {s['games']:6d} {s['points'] / games:6.3f} {elo[i]:7.0f} "
+              f"{f'{low[i]:.0f}..{high[i]:.0f}':>15} {1000.0 * s['cpu'] / max(s['moves'], 1):9.2f} "
+              f"{s['cpu'] / games:10.3f}")
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--configs", help="JSON file of named build_agent specs (default: built-ins)")
+    ap.add_argument("--only", help="comma list of config names to enter")
+    ap.add_argument("--format", choices=["roundrobin", "swiss"], default="roundrobin")
+    ap.add_argument("--rounds", type=int, default=5, help="swiss rounds")
+    ap.add_argument("--games-per-pair", type=int, default=4, help="per pairing (per round in swiss), seats alternate")
+    ap.add_argument("--board-size", type=int, default=8)
+    ap.add_argument("--holes", type=int, default=HOLE_COUNT)
+    ap.add_argument("--hole-density", type=float, help="holes as a fraction of the board (overrides --holes)")
+    ap.add_argument("--pregen", type=int, default=0, help="play on this many pre-generated connected layouts")
+    ap.add_argument("--accuracy", type=parse_accuracy, default=(DEFAULT_ACCURACY, {}))
+    ap.add_argument("--max-turns", type=int, default=1000, help="longer games are draws")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--results", default="tournament.jsonl")
+    ap.add_argument("--replays", help="save every game as a .srzr replay in this folder")
+    ap.add_argument("--fresh", action="store_true", help="overwrite the results file instead of resuming")
+    ap.add_argument("--bootstrap", type=int, default=200, help="resamples for the confidence intervals")
+    args = ap.parse_args(argv)
+
+    configs = DEFAULT_CONFIGS
+    if args.configs:
+        with open(args.configs) as f:
+            configs = json.load(f)
+    names = list(configs)
+    if args.only:
+        names = [n for n in args.only.split(",") if n]
+        missing = [n for n in names if n not in configs]
+        if missing:
+            ap.error(f"unknown config(s): {', '.join(missing)}")
+    if len(names) < 2:
+        ap.error("need at least two configurations")
+    configs = {n: configs[n] for n in names}
+
+    default_accuracy, accuracy = args.accuracy
+    if args.hole_density is not None:
+        args.holes = int(round(args.hole_density * args.board_size ** 2))
+    if args.pregen:
+        shared_cache().get(args.board_size, 2, args.holes, args.pregen, seed=args.seed, workers=args.workers)
+    settings = {
+        "seed": args.seed, "board_size": args.board_size, "holes": args.holes, "pregen": args.pregen,
+        "default_accuracy": default_accuracy, "accuracy": accuracy, "max_turns": args.max_turns,
+    }
+    header = {"format": args.format, "games_per_pair": args.games_per_pair, "configs": configs,
+              "rounds": args.rounds if args.format == "swiss" else None, **settings}
+    settings["replays"] = args.replays     # not part of the header: it does not change results
+
+    results = ResultsFile(args.results, header, resume=not args.fresh)
+    try:
+        if args.format == "swiss":
+            rows = swiss(names, configs, settings, args.rounds, args.games_per_pair, results, args.workers)
+        else:
+            rows = round_robin(names, configs, settings, args.games_per_pair, results, args.workers)
+    finally:
+        results.close()
+    report(rows, names, args.bootstrap, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
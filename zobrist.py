@@ -0,0 +1,153 @@
+import random
+
+# -----------------------------
+# Zobrist keys + transposition table
+#
+# A position hash is the XOR of one 64-bit key per (player, pawn/flag,
+# square), one per hole and one for the side to move. GameState.apply /
+# undo keep it up to date incrementally, so search and replay tools get a
+# position key for free:
+#
+#   tt = TranspositionTable(max_bytes=32 << 20)
+#   hit = tt.probe(game.hash)
+#   ...
+#   tt.store(game.hash, depth, value, EXACT, best_action)
+#
+# Scores are not hashed: they never change which moves are legal.
+# -----------------------------
+
+ZOBRIST_SEED = 0x5352415A  # "SRAZ"
+MAX_PLAYERS = 4
+
+_tables = {}
+
+
+class ZobristKeys:
+    __slots__ = ("pieces", "holes", "side")
+
+    def __init__(self, size, seed=ZOBRIST_SEED):
+        rng = random.Random(seed * 1000003 + size)
+        n = size * size
+        # pieces[player][is_flag][square]
+        self.pieces = [[[rng.getrandbits(64) for _ in range(n)] for _ in range(2)]
+                       for _ in range(MAX_PLAYERS)]
+        self.holes = [rng.getrandbits(64) for _ in range(n)]
+        self.side = [rng.getrandbits(64) for _ in range(MAX_PLAYERS)]
+
+
+def keys_for(size):
+    """Shared key table per board size (built once)."""
+    keys = _tables.get(size)
+    if keys is None:
+        keys = _tables[size] = ZobristKeys(size)
+    return keys
+
+
+def compute_hash(state):
+    """Full recompute; apply/undo maintain the same value incrementally."""
+    board = state.board
+    size = board.size
+    keys = keys_for(size)
+    h = keys.side[state.current]
+    for i, is_hole in enumerate(board.hole):
+        if is_hole:
+            h ^= keys.holes[i]
+    for pawn in state.pawns:
+        if pawn.alive:
+            h ^= keys.pieces[pawn.player][pawn.is_flag][pawn.row * size + pawn.col]
+    return h
+
+
+# -----------------------------
+# Transposition table
+# -----------------------------
+
+EXACT = 0
+LOWER = 1   # value is a lower bound (fail high)
+UPPER = 2   # value is an upper bound (fail low)
+
+# rough CPython footprint of one stored entry tuple + its ints
+ENTRY_BYTES = 200
+DEFAULT_TT_BYTES = 32 << 20
+
+
+class TranspositionTable:
+    """
+    Fixed-size, two-slot buckets indexed by key:
+      slot 0 keeps the deepest result (replaced only by a deeper or equal
+             search, or by anything once it is from an older search)
+      slot 1 always takes the newest result
+    Memory is bounded by max_bytes; nothing ever grows past it.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_TT_BYTES):
+        self.buckets = max(1, max_bytes // (2 * ENTRY_BYTES))
+        self.deep = [None] * self.buckets
+        self.recent = [None] * self.buckets
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __getstate__(self):
+        # pickles as an empty table of the same size (ai_scheduler ships bots to a worker)
+        return {"buckets": self.buckets, "generation": self.generation}
+
+    def __setstate__(self, state):
+        self.buckets = state["buckets"]
+        self.generation = state["generation"]
+        self.clear()
+
+    def __len__(self):
+        return sum(e is not None for e in self.deep) + sum(e is not None for e in self.recent)
+
+    def new_search(self):
+        """Age existing entries so slot 0 can be reclaimed by the next search."""
+        self.generation += 1
+
+    def clear(self):
+        self.deep = [None] * self.buckets
+        self.recent = [None] * self.buckets
+        self.hits = self.misses = self.stores = 0
+
+    def probe(self, key):
+        """Returns (depth, value, bound, move) or None."""
+        i = key % self.buckets
+        e = self.deep[i]
+        if e is not None and e[0] == key:
+            self.hits += 1
+            return e[1:5]
+        e = self.recent[i]
+        if e is not None and e[0] == key:
+            self.hits += 1
+            return e[1:5]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, bound=EXACT, move=None):
+        i = key % self.buckets
+        entry = (key, depth, value, bound, move, self.generation)
+        self.stores += 1
+        old = self.deep[i]
+        if old is not None and old[0] == key:
+            # the same position searched again: a shallower result never replaces a deeper one
+            if depth >= old[1] or old[5] != self.generation:
+                self.deep[i] = entry
+        elif old is None or depth >= old[1] or old[5] != self.generation:
+            # keep the displaced deep entry around in the always-replace slot
+            if old is not None:
+                self.recent[i] = old
+            self.deep[i] = entry
+        else:
+            self.recent[i] = entry
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "buckets": self.buckets,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+        }